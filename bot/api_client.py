@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import httpx
 
@@ -44,6 +44,22 @@ async def run_action(
         return response.json()
 
 
+async def run_actions(
+    telegram_id: int,
+    username: str | None,
+    actions: List[str],
+) -> Dict[str, Any]:
+    payload = {
+        "telegram_id": telegram_id,
+        "username": username,
+        "actions": actions,
+    }
+    async with _client() as client:
+        response = await client.post("/v1/runs/actions", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+
 async def start_state(telegram_id: int, username: str | None) -> Dict[str, Any]:
     payload = {"telegram_id": telegram_id, "username": username}
     async with _client() as client:
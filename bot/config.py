@@ -40,3 +40,13 @@ def is_test_mode() -> bool:
 def is_image_sending_enabled() -> bool:
     raw = _strip_wrapping_quotes(os.getenv("BOT_SEND_IMAGES", "0"))
     return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def is_auto_battle_enabled() -> bool:
+    raw = _strip_wrapping_quotes(os.getenv("BOT_AUTO_BATTLE", "0"))
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def is_batch_actions_enabled() -> bool:
+    raw = _strip_wrapping_quotes(os.getenv("BOT_BATCH_ACTIONS", "0"))
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
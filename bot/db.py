@@ -1,29 +1,221 @@
 import asyncio
+from array import array
+from functools import partial
+import logging
+from bisect import bisect_left, insort
 import json
 from contextlib import asynccontextmanager
-from datetime import date, datetime, time, timezone
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
 import os
-from typing import Any, Dict, List, Optional, Tuple
+from time import monotonic, perf_counter_ns
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse, urlunparse
 
 import asyncpg
 from asyncpg import exceptions as pg_exc
 
+logger = logging.getLogger(__name__)
+
 DB_DSN_ENV = ("DATABASE_URL", "POSTGRES_DSN", "POSTGRES_URL")
 PG_POOL_MIN = max(1, int(os.getenv("PG_POOL_MIN", "1")))
 PG_POOL_MAX = max(PG_POOL_MIN, int(os.getenv("PG_POOL_MAX", "10")))
 PG_COMMAND_TIMEOUT = float(os.getenv("PG_COMMAND_TIMEOUT", "30"))
+SQL_CACHE_SIZE = 512
+_SQL_CACHE: Dict[str, Tuple[str, bool, bool]] = {}
+_STATEMENT_STATS: Dict[str, List[int]] = {}
 _POOL: asyncpg.Pool | None = None
 _POOL_LOCK = asyncio.Lock()
+# 0 disables the in-process season rank cache (ranks and deep pages then come from SQL only)
+SEASON_RANK_CACHE_TTL = float(os.getenv("SEASON_RANK_CACHE_TTL", "300"))
+SEASON_RANK_CACHE_SEASONS = 2
+SEASON_RANK_LOAD_CHUNK = 50_000
+SEASON_RANK_USER_BITS = 40
 PIONEER_BADGE_ID = "first_pioneer"
 PIONEER_BADGE_CUTOFF = "2026-01-01"
 PIONEER_BADGE_CUTOFF_DATE = date.fromisoformat(PIONEER_BADGE_CUTOFF)
-SEASON0_KEY = "2025-12"
-SEASON0_START = "2025-12-20"
-SEASON0_START_DATE = date.fromisoformat(SEASON0_START)
-SEASON0_START_TS = datetime.combine(SEASON0_START_DATE, time.min)
-SEASON0_BACKFILL_SETTING = "season0_backfill_done"
+# season_id of all-time rows in user_kills / user_deaths (mirror user_stats)
+ALL_TIME_SEASON_ID = 0
+ADMIN_COUNTER_SHARDS = 8
+ADMIN_TOP_KILLERS = 10
+ADMIN_RUN_HOURS_KEPT = 48
 TREASURE_REWARD_XP = 5
+# pg_advisory_lock key held while bot/migrations are applied, so only one process migrates at a time
+SCHEMA_MIGRATION_LOCK = 0x5275696E73
+# pg_advisory_xact_lock key held while admin_top_killers is trimmed after a finish
+ADMIN_TOP_KILLERS_LOCK = 0x546F704B696C
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+JSON_OBJECT_ENTRIES_SQL = (
+    "jsonb_each(CASE WHEN jsonb_typeof({column}) = 'object' THEN {column} ELSE '{{}}'::jsonb END) AS entry"
+)
+JSON_ENTRY_COUNT_SQL = "trunc((entry.value #>> '{}')::numeric)::bigint"
+
+
+def _json_counts_merge_sql(table: str, column: str) -> str:
+    current = f"CASE WHEN jsonb_typeof({table}.{column}) = 'object' THEN {table}.{column} ELSE '{{}}'::jsonb END"
+    return (
+        f"(SELECT COALESCE(jsonb_object_agg(merged.key, merged.total), '{{}}'::jsonb) FROM ("
+        f"SELECT entry.key, SUM({JSON_ENTRY_COUNT_SQL}) AS total FROM ("
+        f"SELECT * FROM jsonb_each({current}) UNION ALL SELECT * FROM jsonb_each(EXCLUDED.{column})"
+        f") AS entry WHERE jsonb_typeof(entry.value) = 'number' GROUP BY entry.key) AS merged)"
+    )
+
+
+RECORD_RUN_STATS_SQL = (
+    "INSERT INTO user_stats (user_id, total_runs, deaths, deaths_by_floor, kills_json, hero_runs_json, "
+    "treasures_found, chests_opened, updated_at) "
+    "VALUES (?, 1, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP) "
+    "ON CONFLICT (user_id) DO UPDATE SET "
+    "total_runs = COALESCE(user_stats.total_runs, 0) + 1, "
+    "deaths = COALESCE(user_stats.deaths, 0) + EXCLUDED.deaths, "
+    "deaths_by_floor = " + _json_counts_merge_sql("user_stats", "deaths_by_floor") + ", "
+    "kills_json = " + _json_counts_merge_sql("user_stats", "kills_json") + ", "
+    "hero_runs_json = " + _json_counts_merge_sql("user_stats", "hero_runs_json") + ", "
+    "treasures_found = COALESCE(user_stats.treasures_found, 0) + EXCLUDED.treasures_found, "
+    "chests_opened = COALESCE(user_stats.chests_opened, 0) + EXCLUDED.chests_opened, "
+    "updated_at = CURRENT_TIMESTAMP"
+)
+RECORD_SEASON_STATS_SQL = (
+    "WITH previous AS (SELECT max_floor FROM user_season_stats WHERE user_id = ? AND season_id = ?) "
+    "INSERT INTO user_season_stats (user_id, season_id, max_floor, max_floor_character, total_runs, deaths, "
+    "deaths_by_floor, kills_json, treasures_found, chests_opened, xp_gained, updated_at) "
+    "VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP) "
+    "ON CONFLICT (user_id, season_id) DO UPDATE SET "
+    "max_floor = GREATEST(COALESCE(user_season_stats.max_floor, 0), EXCLUDED.max_floor), "
+    "max_floor_character = CASE WHEN EXCLUDED.max_floor > COALESCE(user_season_stats.max_floor, 0) "
+    "THEN EXCLUDED.max_floor_character "
+    "ELSE COALESCE(NULLIF(user_season_stats.max_floor_character, ''), 'wanderer') END, "
+    "total_runs = COALESCE(user_season_stats.total_runs, 0) + 1, "
+    "deaths = COALESCE(user_season_stats.deaths, 0) + EXCLUDED.deaths, "
+    "deaths_by_floor = " + _json_counts_merge_sql("user_season_stats", "deaths_by_floor") + ", "
+    "kills_json = " + _json_counts_merge_sql("user_season_stats", "kills_json") + ", "
+    "treasures_found = COALESCE(user_season_stats.treasures_found, 0) + EXCLUDED.treasures_found, "
+    "chests_opened = COALESCE(user_season_stats.chests_opened, 0) + EXCLUDED.chests_opened, "
+    "xp_gained = COALESCE(user_season_stats.xp_gained, 0) + EXCLUDED.xp_gained, "
+    "updated_at = CURRENT_TIMESTAMP "
+    "RETURNING user_season_stats.max_floor, (SELECT max_floor FROM previous)"
+)
+RECORD_KILLS_SQL = (
+    "INSERT INTO user_kills (user_id, season_id, enemy_id, count) "
+    "SELECT ?, ?, kill.enemy_id, kill.count FROM unnest(?::text[], ?::bigint[]) AS kill(enemy_id, count) "
+    "ORDER BY kill.enemy_id "
+    "ON CONFLICT (user_id, season_id, enemy_id) DO UPDATE SET count = user_kills.count + EXCLUDED.count"
+)
+RECORD_DEATH_SQL = (
+    "INSERT INTO user_deaths (user_id, season_id, floor, deaths) VALUES (?, ?, ?, 1) "
+    "ON CONFLICT (user_id, season_id, floor) DO UPDATE SET deaths = user_deaths.deaths + 1"
+)
+# max_floor keeps a per-shard maximum, every other counter is a per-shard sum
+ADD_ADMIN_COUNTERS_SQL = (
+    "INSERT INTO admin_counters (key, shard, value) "
+    "SELECT counter.key, ?, counter.value FROM unnest(?::text[], ?::bigint[]) AS counter(key, value) "
+    "ORDER BY counter.key "
+    "ON CONFLICT (key, shard) DO UPDATE SET value = CASE WHEN admin_counters.key = 'max_floor' "
+    "THEN GREATEST(admin_counters.value, EXCLUDED.value) ELSE admin_counters.value + EXCLUDED.value END"
+)
+ADMIN_RUN_STARTED_SQL = (
+    "WITH hour_runs AS ("
+    "INSERT INTO admin_run_hours (hour, shard, runs) VALUES (date_trunc('hour', CURRENT_TIMESTAMP)::timestamp, ?, 1) "
+    "ON CONFLICT (hour, shard) DO UPDATE SET runs = admin_run_hours.runs + 1"
+    "), hour_users AS ("
+    "INSERT INTO admin_run_users (hour, user_id) VALUES (date_trunc('hour', CURRENT_TIMESTAMP)::timestamp, ?) "
+    "ON CONFLICT DO NOTHING"
+    ") "
+    "INSERT INTO admin_counters (key, shard, value) VALUES ('active_runs', ?, 1), ('total_runs', ?, 1) "
+    "ON CONFLICT (key, shard) DO UPDATE SET value = admin_counters.value + EXCLUDED.value"
+)
+ADMIN_TOP_KILLERS_UPSERT_SQL = (
+    "WITH total AS ("
+    "SELECT COALESCE(SUM(count), 0)::bigint AS kills FROM user_kills WHERE user_id = ? AND season_id = ?"
+    ") "
+    "INSERT INTO admin_top_killers (user_id, kills) SELECT ?, total.kills FROM total "
+    "WHERE total.kills > 0 AND ((SELECT COUNT(*) FROM admin_top_killers) < ? "
+    "OR total.kills >= (SELECT MIN(kills) FROM admin_top_killers) "
+    "OR EXISTS (SELECT 1 FROM admin_top_killers WHERE user_id = ?)) "
+    "ON CONFLICT (user_id) DO UPDATE SET kills = EXCLUDED.kills "
+    "RETURNING user_id"
+)
+# a separate statement so the trim sees the row just upserted; ADMIN_TOP_KILLERS_LOCK orders the trims, and
+# SKIP LOCKED leaves rows upserted by a finish still waiting for the lock to that finish's own trim
+ADMIN_TOP_KILLERS_TRIM_SQL = (
+    "DELETE FROM admin_top_killers WHERE user_id IN ("
+    "SELECT user_id FROM admin_top_killers ORDER BY kills DESC, user_id ASC OFFSET ? FOR UPDATE SKIP LOCKED)"
+)
+ADMIN_HOURS_SINCE_SQL = "date_trunc('hour', CURRENT_TIMESTAMP - INTERVAL '1 day')::timestamp"
+SEASON_LEADERBOARD_FIRST_SQL = (
+    "SELECT users.id, users.username, ranked.max_floor, users.xp, ranked.max_floor_character FROM ("
+    "SELECT user_id, max_floor, max_floor_character FROM user_season_stats "
+    "WHERE season_id = ? AND max_floor > 0 ORDER BY max_floor DESC, user_id ASC LIMIT ?"
+    ") AS ranked JOIN users ON users.id = ranked.user_id "
+    "ORDER BY ranked.max_floor DESC, ranked.user_id ASC"
+)
+# keyset page after (max_floor, user_id): the rest of that floor, then lower floors; both are index range scans
+SEASON_LEADERBOARD_AFTER_SQL = (
+    "SELECT users.id, users.username, ranked.max_floor, users.xp, ranked.max_floor_character FROM ("
+    "(SELECT user_id, max_floor, max_floor_character FROM user_season_stats "
+    "WHERE season_id = ? AND max_floor = ? AND user_id > ? ORDER BY user_id ASC LIMIT ?) "
+    "UNION ALL "
+    "(SELECT user_id, max_floor, max_floor_character FROM user_season_stats "
+    "WHERE season_id = ? AND max_floor < ? AND max_floor > 0 ORDER BY max_floor DESC, user_id ASC LIMIT ?)"
+    ") AS ranked JOIN users ON users.id = ranked.user_id "
+    "ORDER BY ranked.max_floor DESC, ranked.user_id ASC LIMIT ?"
+)
+SEASON_RANK_COUNT_SQL = (
+    "SELECT COUNT(*) + 1 FROM user_season_stats "
+    "WHERE season_id = ? AND max_floor > 0 AND (max_floor > ? OR (max_floor = ? AND user_id < ?))"
+)
+SEASON_RANK_KEYS_SQL = (
+    "SELECT max_floor, user_id FROM user_season_stats "
+    "WHERE season_id = ? AND max_floor > 0 ORDER BY max_floor DESC, user_id ASC"
+)
+
+
+def _rank_key(max_floor: int, user_id: int) -> int:
+    return (-int(max_floor) << SEASON_RANK_USER_BITS) | int(user_id)
+
+
+class _SeasonRanks:
+    __slots__ = ("keys", "loaded_at")
+
+    def __init__(self, keys: array, loaded_at: float) -> None:
+        self.keys = keys
+        self.loaded_at = loaded_at
+
+    def rank(self, max_floor: int, user_id: int) -> Optional[int]:
+        key = _rank_key(max_floor, user_id)
+        idx = bisect_left(self.keys, key)
+        if idx < len(self.keys) and self.keys[idx] == key:
+            return idx + 1
+        return None
+
+    def cursor_at(self, offset: int) -> Optional[Tuple[int, int]]:
+        if offset <= 0 or offset > len(self.keys):
+            return None
+        key = self.keys[offset - 1]
+        return -(key >> SEASON_RANK_USER_BITS), key & ((1 << SEASON_RANK_USER_BITS) - 1)
+
+    def move(self, user_id: int, old_floor: int, new_floor: int) -> bool:
+        if old_floor > 0:
+            key = _rank_key(old_floor, user_id)
+            idx = bisect_left(self.keys, key)
+            if idx >= len(self.keys) or self.keys[idx] != key:
+                return False
+            del self.keys[idx]
+        insort(self.keys, _rank_key(new_floor, user_id))
+        return True
+
+
+_SEASON_RANKS: Dict[int, _SeasonRanks] = {}
+_SEASON_RANK_REFRESH: Dict[int, "asyncio.Task[Optional[_SeasonRanks]]"] = {}
+# moves committed while a season is being reloaded, replayed onto the loaded keys
+_SEASON_RANK_PENDING: Dict[int, List[Tuple[int, int, int]]] = {}
+_ADMIN_PRUNED_HOUR = -1
 
 
 def _get_db_dsn() -> str:
@@ -83,6 +275,8 @@ async def _get_pool() -> asyncpg.Pool:
                 max_size=PG_POOL_MAX,
                 command_timeout=PG_COMMAND_TIMEOUT,
                 server_settings={"timezone": "UTC"},
+                connection_class=_RegistryConnection,
+                init=_init_connection,
             )
         except pg_exc.InvalidCatalogNameError:
             await _ensure_database_exists(dsn)
@@ -92,13 +286,75 @@ async def _get_pool() -> asyncpg.Pool:
                 max_size=PG_POOL_MAX,
                 command_timeout=PG_COMMAND_TIMEOUT,
                 server_settings={"timezone": "UTC"},
+                connection_class=_RegistryConnection,
+                init=_init_connection,
             )
         return _POOL
 
 
+async def _open_connection() -> asyncpg.Connection:
+    # a connection outside the pool, set up like the pooled ones
+    conn = await asyncpg.connect(
+        dsn=_get_db_dsn(),
+        command_timeout=PG_COMMAND_TIMEOUT,
+        server_settings={"timezone": "UTC"},
+        connection_class=_RegistryConnection,
+    )
+    await _init_connection(conn)
+    return conn
+
+
+def _encode_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    for type_name in ("jsonb", "json"):
+        await conn.set_type_codec(type_name, encoder=_encode_json, decoder=json.loads, schema="pg_catalog")
+
+
+class _RegistryConnection(asyncpg.Connection):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._named_statements: Dict[str, Any] = {}
+
+    async def named_statement(self, name: str, sql: str):
+        statement = self._named_statements.get(name)
+        if statement is None:
+            statement = await self.prepare(sql)
+            self._named_statements[name] = statement
+        return statement
+
+    def drop_named_statement(self, name: str) -> None:
+        self._named_statements.pop(name, None)
+
+
 class _PgConn:
     def __init__(self, conn: asyncpg.Connection) -> None:
         self._conn = conn
+        self._owner = asyncio.current_task()
+        self._after_commit: List[Callable[[], None]] = []
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        # in-process caches must only see committed rows: run once the outermost transaction commits
+        if self._conn.is_in_transaction():
+            self._after_commit.append(callback)
+        else:
+            callback()
+
+    def _run_after_commit(self) -> None:
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    async def prepared(self, name: str, sql: str):
+        return await self._conn.named_statement(name, sql)
+
+    def drop_prepared(self, name: str) -> None:
+        self._conn.drop_named_statement(name)
+
+    def in_transaction(self) -> bool:
+        return self._conn.is_in_transaction()
 
     async def execute(self, sql: str, *params):
         return await self._conn.execute(sql, *params)
@@ -115,19 +371,92 @@ class _PgConn:
     async def executemany(self, sql: str, seq_of_params):
         return await self._conn.executemany(sql, seq_of_params)
 
+    def transaction(self):
+        return self._conn.transaction()
+
     async def commit(self) -> None:
         return None
 
 
+_SESSION: ContextVar[Optional[_PgConn]] = ContextVar("db_session", default=None)
+
+
+def _current_session() -> Optional[_PgConn]:
+    current = _SESSION.get()
+    # tasks created inside a session inherit the ContextVar, but must not share its connection
+    if current is not None and current._owner is not asyncio.current_task():
+        raise RuntimeError("db.session() connection used from another task; run db calls of a session in its own task")
+    return current
+
+
+@asynccontextmanager
+async def _connect() -> AsyncIterator[_PgConn]:
+    current = _current_session()
+    if current is not None:
+        yield current
+        return
+    pool = await _get_pool()
+    async with pool.acquire() as conn:
+        db = _PgConn(conn)
+        async with conn.transaction():
+            yield db
+        db._run_after_commit()
+
+
+@asynccontextmanager
+async def _read() -> AsyncIterator[_PgConn]:
+    current = _current_session()
+    if current is not None:
+        yield current
+        return
+    pool = await _get_pool()
+    async with pool.acquire() as conn:
+        db = _PgConn(conn)
+        yield db
+        db._run_after_commit()
+
+
 @asynccontextmanager
-async def _connect() -> _PgConn:
+async def session() -> AsyncIterator[_PgConn]:
+    # Every db.* call made inside the block (in the same task) reuses this connection and transaction,
+    # so the block commits or rolls back as a whole. db calls from tasks spawned inside it raise RuntimeError.
+    current = _current_session()
+    if current is not None:
+        yield current
+        return
     pool = await _get_pool()
     async with pool.acquire() as conn:
+        db = _PgConn(conn)
         async with conn.transaction():
-            yield _PgConn(conn)
+            token = _SESSION.set(db)
+            try:
+                yield db
+            finally:
+                _SESSION.reset(token)
+        db._run_after_commit()
+
+
+def in_session() -> bool:
+    return _SESSION.get() is not None
 
 
 def _translate_sql(sql: str) -> str:
+    cached = _SQL_CACHE.get(sql)
+    if cached is None:
+        cached = _cache_sql(sql)
+    return cached[0]
+
+
+def _cache_sql(sql: str) -> Tuple[str, bool, bool]:
+    translated = _translate_placeholders(sql)
+    cached = (translated, _returns_rows(translated), "returning" in translated.lower())
+    if len(_SQL_CACHE) >= SQL_CACHE_SIZE:
+        _SQL_CACHE.pop(next(iter(_SQL_CACHE)))
+    _SQL_CACHE[sql] = cached
+    return cached
+
+
+def _translate_placeholders(sql: str) -> str:
     index = 0
     out = []
     in_single = False
@@ -186,6 +515,13 @@ class _Cursor:
         return remaining
 
 
+def _run_kills(state: Dict[str, Any]) -> Dict[str, int]:
+    kills: Dict[str, int] = {}
+    for enemy_id, count in (state.get("kills", {}) or {}).items():
+        kills[str(enemy_id)] = kills.get(str(enemy_id), 0) + int(count)
+    return kills
+
+
 def _json_dict(value: Any) -> Dict[str, Any]:
     parsed = value
     for _ in range(10):
@@ -224,360 +560,223 @@ def _json_list(value: Any) -> List[Any]:
     return parsed if isinstance(parsed, list) else []
 
 
+def _row_cursor(rows, returning: bool) -> _Cursor:
+    lastrowid = None
+    if rows and returning:
+        try:
+            lastrowid = int(rows[0][0])
+        except (TypeError, ValueError, IndexError):
+            lastrowid = None
+    return _Cursor(rows, lastrowid=lastrowid)
+
+
 async def _execute(db: _PgConn, sql: str, params: tuple = ()):
-    translated = _translate_sql(sql)
+    translated, returns_rows, returning = _SQL_CACHE.get(sql) or _cache_sql(sql)
     params = params or ()
     if not isinstance(params, (tuple, list)):
         params = (params,)
-    if _returns_rows(translated):
+    if returns_rows:
         rows = await db.fetch(translated, *params)
-        lastrowid = None
-        if rows and "returning" in translated.lower():
-            try:
-                lastrowid = int(rows[0][0])
-            except (TypeError, ValueError, IndexError):
-                lastrowid = None
-        return _Cursor(rows, lastrowid=lastrowid)
+        return _row_cursor(rows, returning)
     status = await db.execute(translated, *params)
     return _Cursor([], status=status)
 
 
+async def _execute_named(db: _PgConn, name: str, sql: str, params: tuple = ()):
+    translated, returns_rows, returning = _SQL_CACHE.get(sql) or _cache_sql(sql)
+    params = params or ()
+    if not isinstance(params, (tuple, list)):
+        params = (params,)
+    started = perf_counter_ns()
+    try:
+        statement = await db.prepared(name, translated)
+        try:
+            rows = await statement.fetch(*params)
+        except pg_exc.InvalidCachedStatementError:
+            # the schema changed under the cached plan: re-prepare and retry once, unless the error has
+            # already aborted the surrounding transaction (then only the caller can retry it)
+            db.drop_prepared(name)
+            if db.in_transaction():
+                raise
+            statement = await db.prepared(name, translated)
+            rows = await statement.fetch(*params)
+    finally:
+        _record_statement(name, perf_counter_ns() - started)
+    if returns_rows:
+        return _row_cursor(rows, returning)
+    return _Cursor([], status=statement.get_statusmsg())
+
+
+def _record_statement(name: str, elapsed_ns: int) -> None:
+    stats = _STATEMENT_STATS.get(name)
+    if stats is None:
+        stats = _STATEMENT_STATS[name] = [0, 0, 0]
+    stats[0] += 1
+    stats[1] += elapsed_ns
+    if elapsed_ns > stats[2]:
+        stats[2] = elapsed_ns
+
+
+def get_statement_stats() -> Dict[str, Dict[str, int]]:
+    return {
+        name: {
+            "calls": calls,
+            "total_us": total_ns // 1000,
+            "mean_us": total_ns // max(1, calls) // 1000,
+            "max_us": max_ns // 1000,
+        }
+        for name, (calls, total_ns, max_ns) in sorted(_STATEMENT_STATS.items(), key=lambda item: -item[1][1])
+    }
+
+
+def reset_statement_stats() -> None:
+    _STATEMENT_STATS.clear()
+
+
+def format_statement_stats() -> List[str]:
+    lines = [f"{'statement':<32} {'calls':>8} {'mean us':>10} {'max us':>10} {'total ms':>10}"]
+    for name, item in get_statement_stats().items():
+        lines.append(
+            f"{name:<32} {item['calls']:>8} {item['mean_us']:>10} {item['max_us']:>10} {item['total_us'] // 1000:>10}"
+        )
+    return lines
+
+
 async def _executemany(db: _PgConn, sql: str, seq_of_params):
     translated = _translate_sql(sql)
     return await db.executemany(translated, seq_of_params)
 
 
 async def init_db() -> None:
-    async with _connect() as db:
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id BIGSERIAL PRIMARY KEY,
-                telegram_id BIGINT UNIQUE NOT NULL,
-                username TEXT,
-                max_floor INTEGER DEFAULT 0,
-                xp INTEGER DEFAULT 0,
-                tutorial_done INTEGER DEFAULT 0,
-                unlocked_heroes_json TEXT DEFAULT '["wanderer"]',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS runs (
-                id BIGSERIAL PRIMARY KEY,
-                user_id BIGINT NOT NULL,
-                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ended_at TIMESTAMP,
-                max_floor INTEGER DEFAULT 0,
-                is_active INTEGER DEFAULT 1,
-                is_tutorial INTEGER DEFAULT 0,
-                state_json TEXT,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS user_stats (
-                user_id BIGINT PRIMARY KEY,
-                total_runs INTEGER DEFAULT 0,
-                deaths INTEGER DEFAULT 0,
-                deaths_by_floor TEXT DEFAULT '{}',
-                kills_json TEXT DEFAULT '{}',
-                hero_runs_json TEXT DEFAULT '{}',
-                treasures_found INTEGER DEFAULT 0,
-                chests_opened INTEGER DEFAULT 0,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS user_broadcasts (
-                user_id BIGINT NOT NULL,
-                broadcast_key TEXT NOT NULL,
-                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, broadcast_key),
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS seasons (
-                id BIGSERIAL PRIMARY KEY,
-                season_key TEXT UNIQUE NOT NULL,
-                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ended_at TIMESTAMP
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS user_season_stats (
-                user_id BIGINT NOT NULL,
-                season_id BIGINT NOT NULL,
-                max_floor INTEGER DEFAULT 0,
-                max_floor_character TEXT DEFAULT 'wanderer',
-                total_runs INTEGER DEFAULT 0,
-                deaths INTEGER DEFAULT 0,
-                deaths_by_floor TEXT DEFAULT '{}',
-                kills_json TEXT DEFAULT '{}',
-                treasures_found INTEGER DEFAULT 0,
-                chests_opened INTEGER DEFAULT 0,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, season_id),
-                FOREIGN KEY(user_id) REFERENCES users(id),
-                FOREIGN KEY(season_id) REFERENCES seasons(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS user_badges (
-                user_id BIGINT NOT NULL,
-                badge_id TEXT NOT NULL,
-                count INTEGER DEFAULT 1,
-                last_awarded_season TEXT,
-                last_awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (user_id, badge_id),
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS star_purchases (
-                id BIGSERIAL PRIMARY KEY,
-                user_id BIGINT NOT NULL,
-                telegram_payment_charge_id TEXT UNIQUE NOT NULL,
-                provider_payment_charge_id TEXT,
-                levels INTEGER NOT NULL,
-                stars INTEGER NOT NULL,
-                xp_added INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS star_actions (
-                id BIGSERIAL PRIMARY KEY,
-                user_id BIGINT NOT NULL,
-                telegram_payment_charge_id TEXT UNIQUE NOT NULL,
-                provider_payment_charge_id TEXT,
-                action TEXT NOT NULL,
-                stars INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """,
-        )
-        await _execute(
-            db,
-            """
-            CREATE TABLE IF NOT EXISTS season_history (
-                season_id BIGINT PRIMARY KEY,
-                season_number INTEGER NOT NULL,
-                season_key TEXT NOT NULL,
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                winners_json TEXT DEFAULT '{}',
-                summary_json TEXT DEFAULT '{}',
-                FOREIGN KEY(season_id) REFERENCES seasons(id)
-            )
-            """,
-        )
-        await _ensure_user_columns(db)
-        await _ensure_run_columns(db)
-        await _ensure_user_stats_columns(db)
-        await _ensure_user_season_columns(db)
-        await _backfill_season0_stats(db)
-        await _execute(db, 
-            "INSERT INTO user_badges (user_id, badge_id, count, last_awarded_season) "
-            "SELECT id, ?, 1, NULL FROM users WHERE created_at::date < ?::date "
-            "ON CONFLICT DO NOTHING",
-            (PIONEER_BADGE_ID, PIONEER_BADGE_CUTOFF_DATE),
-        )
+    from bot.migrations import load_migrations
+
+    migrations = load_migrations()
+    latest = migrations[-1][0] if migrations else 0
+    async with _read() as db:
+        if await _schema_version(db) >= latest:
+            return
+        await _execute(db, "SELECT pg_advisory_lock(?)", (SCHEMA_MIGRATION_LOCK,))
+        try:
+            await _execute(db, SCHEMA_VERSION_DDL)
+            current = await _schema_version(db)
+            for version, name, migrate, atomic in migrations:
+                if version <= current:
+                    continue
+                if not atomic:
+                    await migrate(db)
+                    await _record_schema_version(db, version, name)
+                    continue
+                async with db.transaction():
+                    await migrate(db)
+                    await _record_schema_version(db, version, name)
+        finally:
+            await _execute(db, "SELECT pg_advisory_unlock(?)", (SCHEMA_MIGRATION_LOCK,))
 
 
-async def _ensure_user_columns(db: _PgConn) -> None:
-    await _execute(db, "ALTER TABLE users ADD COLUMN IF NOT EXISTS xp INTEGER DEFAULT 0")
-    await _execute(db, "ALTER TABLE users ADD COLUMN IF NOT EXISTS tutorial_done INTEGER DEFAULT 0")
-    await _execute(
-        db,
-        "ALTER TABLE users ADD COLUMN IF NOT EXISTS unlocked_heroes_json TEXT DEFAULT '[\"wanderer\"]'",
-    )
-    await _execute(
-        db,
-        "UPDATE users SET unlocked_heroes_json = '[\"wanderer\"]' "
-        "WHERE unlocked_heroes_json IS NULL OR unlocked_heroes_json = '' OR unlocked_heroes_json = '[]'",
-    )
+async def _record_schema_version(db: _PgConn, version: int, name: str) -> None:
+    await _execute(db, "INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
 
 
-async def _ensure_run_columns(db: _PgConn) -> None:
-    await _execute(db, "ALTER TABLE runs ADD COLUMN IF NOT EXISTS is_tutorial INTEGER DEFAULT 0")
+async def get_schema_version() -> int:
+    async with _read() as db:
+        return await _schema_version(db)
 
 
-async def _ensure_user_stats_columns(db: _PgConn) -> None:
-    await _execute(
-        db,
-        "ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS hero_runs_json TEXT DEFAULT '{}'",
-    )
-    cursor = await _execute(
-        db,
-        "SELECT user_id, total_runs, hero_runs_json FROM user_stats",
-    )
-    rows = await cursor.fetchall()
-    for user_id, total_runs, hero_runs_json in rows:
-        if hero_runs_json and hero_runs_json != "{}":
-            continue
-        hero_runs = {"wanderer": int(total_runs or 0)}
-        await _execute(
-            db,
-            "UPDATE user_stats SET hero_runs_json = ? WHERE user_id = ?",
-            (json.dumps(hero_runs), user_id),
-        )
+async def _schema_version(db: _PgConn) -> int:
+    try:
+        cursor = await _execute(db, "SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    except pg_exc.UndefinedTableError:
+        return 0
+    row = await cursor.fetchone()
+    return int(row[0]) if row else 0
 
 
-async def _ensure_user_season_columns(db: _PgConn) -> None:
-    await _execute(
-        db,
-        "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS xp_gained INTEGER DEFAULT 0",
-    )
+async def rebuild_admin_counters() -> None:
+    async with _connect() as db:
+        await _rebuild_admin_counters(db)
+
+
+async def _rebuild_admin_counters(db: _PgConn) -> None:
+    since = f"date_trunc('hour', CURRENT_TIMESTAMP - INTERVAL '{ADMIN_RUN_HOURS_KEPT} hours')::timestamp"
+    await _execute(db, "DELETE FROM admin_counters")
     await _execute(
         db,
-        "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS deaths INTEGER DEFAULT 0",
+        "INSERT INTO admin_counters (key, shard, value) "
+        "SELECT 'total_users', 0, COUNT(*) FROM users "
+        "UNION ALL SELECT 'total_runs', 0, COUNT(*) FROM runs WHERE is_tutorial = 0 "
+        "UNION ALL SELECT 'active_runs', 0, COUNT(*) FROM runs WHERE is_active = 1 AND is_tutorial = 0 "
+        "UNION ALL SELECT 'total_deaths', 0, COALESCE(SUM(deaths), 0) FROM user_stats "
+        "UNION ALL SELECT 'total_treasures', 0, COALESCE(SUM(treasures_found), 0) FROM user_stats "
+        "UNION ALL SELECT 'total_chests', 0, COALESCE(SUM(chests_opened), 0) FROM user_stats "
+        "UNION ALL SELECT 'max_floor', 0, COALESCE(MAX(max_floor), 0) FROM users "
+        "UNION ALL SELECT 'death_floor_sum', 0, COALESCE(SUM(floor::bigint * deaths), 0) "
+        "FROM user_deaths WHERE season_id = ? AND floor >= 0 "
+        "UNION ALL SELECT 'death_floor_count', 0, COALESCE(SUM(deaths), 0) "
+        "FROM user_deaths WHERE season_id = ? AND floor >= 0",
+        (ALL_TIME_SEASON_ID, ALL_TIME_SEASON_ID),
     )
+    await _execute(db, "DELETE FROM admin_run_hours")
     await _execute(
         db,
-        "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS deaths_by_floor TEXT DEFAULT '{}'",
+        "INSERT INTO admin_run_hours (hour, shard, runs) "
+        "SELECT date_trunc('hour', started_at), 0, COUNT(*) FROM runs "
+        f"WHERE is_tutorial = 0 AND started_at >= {since} GROUP BY 1",
     )
+    await _execute(db, "DELETE FROM admin_run_users")
     await _execute(
         db,
-        "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS max_floor_character TEXT DEFAULT 'wanderer'",
+        "INSERT INTO admin_run_users (hour, user_id) "
+        "SELECT DISTINCT date_trunc('hour', started_at), user_id FROM runs "
+        f"WHERE is_tutorial = 0 AND started_at >= {since}",
     )
+    await _execute(db, "DELETE FROM admin_top_killers")
     await _execute(
         db,
-        "UPDATE user_season_stats SET max_floor_character = 'wanderer' "
-        "WHERE max_floor_character IS NULL OR max_floor_character = ''",
+        "INSERT INTO admin_top_killers (user_id, kills) "
+        "SELECT user_id, kills FROM user_kill_totals WHERE season_id = ? AND kills > 0 "
+        "ORDER BY kills DESC, user_id ASC LIMIT ?",
+        (ALL_TIME_SEASON_ID, ADMIN_TOP_KILLERS),
     )
 
 
-async def _backfill_season0_stats(db: _PgConn) -> None:
-    cursor = await _execute(db, "SELECT value FROM settings WHERE key = ?", (SEASON0_BACKFILL_SETTING,))
-    row = await cursor.fetchone()
-    if row and row[0] == "1":
+async def _add_admin_counters(db: _PgConn, user_id: int, counters: Dict[str, int]) -> None:
+    counters = {key: int(value) for key, value in counters.items() if value}
+    if not counters:
         return
+    await _execute_named(db, "admin_counters.add", ADD_ADMIN_COUNTERS_SQL, (
+        user_id % ADMIN_COUNTER_SHARDS,
+        list(counters),
+        list(counters.values()),
+    ))
 
-    cursor = await _execute(db, "SELECT id FROM seasons WHERE season_key = ?", (SEASON0_KEY,))
-    row = await cursor.fetchone()
-    if row:
-        season_id = int(row[0])
-    else:
-        cursor = await _execute(
-            db,
-            "INSERT INTO seasons (season_key, started_at) VALUES (?, ?) RETURNING id",
-            (SEASON0_KEY, SEASON0_START_TS),
-        )
-        row = await cursor.fetchone()
-        season_id = int(row[0]) if row else 0
 
-    cursor = await _execute(db, 
-        "SELECT user_id, state_json, max_floor FROM runs "
-        "WHERE is_active = 0 AND is_tutorial = 0 AND started_at >= ?",
-        (SEASON0_START_TS,),
-    )
-    rows = await cursor.fetchall()
-    if not rows:
-        await _execute(
-            db,
-            "INSERT INTO settings (key, value) VALUES (?, ?) "
-            "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
-            (SEASON0_BACKFILL_SETTING, "1"),
-        )
+async def _prune_admin_run_hours(db: _PgConn) -> None:
+    global _ADMIN_PRUNED_HOUR
+    hour = int(datetime.now(timezone.utc).timestamp() // 3600)
+    if hour == _ADMIN_PRUNED_HOUR:
         return
+    _ADMIN_PRUNED_HOUR = hour
+    since = f"date_trunc('hour', CURRENT_TIMESTAMP - INTERVAL '{ADMIN_RUN_HOURS_KEPT} hours')::timestamp"
+    await _execute(db, f"DELETE FROM admin_run_hours WHERE hour < {since}")
+    await _execute(db, f"DELETE FROM admin_run_users WHERE hour < {since}")
 
-    aggregates: Dict[int, Dict[str, Any]] = {}
-    for user_id, state_json, max_floor in rows:
-        agg = aggregates.setdefault(
-            user_id,
-            {
-                "max_floor": 0,
-                "max_floor_character": "wanderer",
-                "total_runs": 0,
-                "kills": {},
-                "treasures_found": 0,
-                "chests_opened": 0,
-                "xp_gained": 0,
-            },
-        )
-        agg["total_runs"] += 1
-        state = _json_dict(state_json)
-        floor_value = int(state.get("floor", 0) or max_floor or 0)
-        if floor_value > agg["max_floor"]:
-            agg["max_floor"] = floor_value
-            agg["max_floor_character"] = state.get("character_id") or "wanderer"
-        agg["treasures_found"] += int(state.get("treasures_found", 0))
-        agg["chests_opened"] += int(state.get("chests_opened", 0))
-        treasure_xp = int(state.get("treasure_xp", 0))
-        if treasure_xp <= 0:
-            treasure_xp = int(state.get("treasures_found", 0)) * TREASURE_REWARD_XP
-        agg["xp_gained"] += max(0, floor_value) + treasure_xp
-        for enemy_id, count in (state.get("kills", {}) or {}).items():
-            agg["kills"][enemy_id] = agg["kills"].get(enemy_id, 0) + int(count)
-
-    for user_id, data in aggregates.items():
-        await _execute(
-            db,
-            "INSERT INTO user_season_stats (user_id, season_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
-            (user_id, season_id),
-        )
-        await _execute(
-            db,
-            "UPDATE user_season_stats SET max_floor = ?, max_floor_character = ?, total_runs = ?, kills_json = ?, "
-            "treasures_found = ?, chests_opened = ?, xp_gained = ?, updated_at = CURRENT_TIMESTAMP "
-            "WHERE user_id = ? AND season_id = ?",
-            (
-                data["max_floor"],
-                data.get("max_floor_character", "wanderer"),
-                data["total_runs"],
-                json.dumps(data["kills"]),
-                data["treasures_found"],
-                data["chests_opened"],
-                data["xp_gained"],
-                user_id,
-                season_id,
-            ),
-        )
 
-    await _execute(
-        db,
-        "INSERT INTO settings (key, value) VALUES (?, ?) "
-        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
-        (SEASON0_BACKFILL_SETTING, "1"),
-    )
+async def _record_normalized_stats(
+    db: _PgConn,
+    user_id: int,
+    season_id: int,
+    kills: Dict[str, int],
+    death_floor: Optional[int],
+) -> None:
+    if kills:
+        await _execute_named(db, "record_kills.upsert", RECORD_KILLS_SQL, (
+            user_id,
+            season_id,
+            list(kills),
+            list(kills.values()),
+        ))
+    if death_floor is not None:
+        await _execute_named(db, "record_death.upsert", RECORD_DEATH_SQL, (user_id, season_id, death_floor))
 
 
 def _current_season_key() -> str:
@@ -604,7 +803,7 @@ async def get_or_create_current_season() -> Tuple[int, str, Optional[Tuple[int,
 
 
 async def get_active_season() -> Optional[Tuple[int, str]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT id, season_key FROM seasons WHERE ended_at IS NULL ORDER BY started_at DESC LIMIT 1"
         )
@@ -615,7 +814,7 @@ async def get_active_season() -> Optional[Tuple[int, str]]:
 
 
 async def get_season_by_key(season_key: str) -> Optional[Tuple[int, str]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT id, season_key FROM seasons WHERE season_key = ?",
             (season_key,),
@@ -664,7 +863,7 @@ async def create_season(season_key: str) -> int:
 
 
 async def get_last_season(ended_only: bool = False) -> Optional[Tuple[int, str]]:
-    async with _connect() as db:
+    async with _read() as db:
         if ended_only:
             cursor = await _execute(db, 
                 "SELECT id, season_key FROM seasons "
@@ -687,12 +886,13 @@ async def save_season_history(
     winners_json: str,
     summary_json: str,
 ) -> None:
+    # winners_json/summary_json arrive already encoded: bound as text and cast, not passed through the JSON codec
     async with _connect() as db:
         await _execute(
             db,
             "INSERT INTO season_history "
             "(season_id, season_number, season_key, processed_at, winners_json, summary_json) "
-            "VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?) "
+            "VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?::text::jsonb, ?::text::jsonb) "
             "ON CONFLICT (season_id) DO UPDATE SET "
             "season_number = EXCLUDED.season_number, "
             "season_key = EXCLUDED.season_key, "
@@ -704,9 +904,9 @@ async def save_season_history(
 
 
 async def get_season_history(season_number: int) -> Optional[Tuple[int, str, str, str]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
-            "SELECT season_id, season_key, winners_json, summary_json "
+            "SELECT season_id, season_key, winners_json::text, summary_json::text "
             "FROM season_history WHERE season_number = ?",
             (season_number,),
         )
@@ -717,7 +917,7 @@ async def get_season_history(season_number: int) -> Optional[Tuple[int, str, str
 
 
 async def get_user_profile(user_id: int) -> Optional[Dict[str, Any]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT username, xp, created_at FROM users WHERE id = ?",
             (user_id,),
@@ -734,7 +934,7 @@ async def get_user_profile(user_id: int) -> Optional[Dict[str, Any]]:
 
 
 async def get_unlocked_heroes(user_id: int) -> List[str]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(
             db,
             "SELECT unlocked_heroes_json FROM users WHERE id = ?",
@@ -764,7 +964,7 @@ async def set_unlocked_heroes(user_id: int, heroes: List[str]) -> None:
         await _execute(
             db,
             "UPDATE users SET unlocked_heroes_json = ? WHERE id = ?",
-            (json.dumps(unique), user_id),
+            (unique, user_id),
         )
         await db.commit()
 
@@ -782,7 +982,7 @@ async def add_user_xp(user_id: int, amount: int) -> None:
     if amount <= 0:
         return
     async with _connect() as db:
-        await _execute(db, 
+        await _execute_named(db, "add_user_xp",
             "UPDATE users SET xp = COALESCE(xp, 0) + ? WHERE id = ?",
             (amount, user_id),
         )
@@ -811,7 +1011,7 @@ async def add_season_xp(user_id: int, season_id: int, amount: int) -> None:
 async def has_star_purchase(telegram_payment_charge_id: str) -> bool:
     if not telegram_payment_charge_id:
         return False
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(
             db,
             "SELECT 1 FROM star_purchases WHERE telegram_payment_charge_id = ?",
@@ -823,7 +1023,7 @@ async def has_star_purchase(telegram_payment_charge_id: str) -> bool:
 async def has_star_action(telegram_payment_charge_id: str) -> bool:
     if not telegram_payment_charge_id:
         return False
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(
             db,
             "SELECT 1 FROM star_actions WHERE telegram_payment_charge_id = ?",
@@ -887,7 +1087,7 @@ async def record_star_action(
 
 
 async def get_star_purchase_summary(user_id: int) -> List[Dict[str, int]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(
             db,
             "SELECT levels, COUNT(*), COALESCE(SUM(stars), 0), COALESCE(SUM(xp_added), 0) "
@@ -909,7 +1109,7 @@ async def get_star_purchase_summary(user_id: int) -> List[Dict[str, int]]:
 
 
 async def get_user_season_stats(user_id: int, season_id: int) -> Dict[str, Any]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT max_floor, total_runs, deaths, deaths_by_floor, kills_json, treasures_found, "
             "chests_opened, xp_gained "
@@ -956,87 +1156,35 @@ async def record_season_stats(
     state: Dict[str, Any],
     died: bool | None = None,
 ) -> None:
+    floor_value = int(state.get("floor", 0))
+    character_id = state.get("character_id") or "wanderer"
+    deaths_by_floor = {str(state.get("floor", 0)): 1} if died else {}
+    kills = _run_kills(state)
     async with _connect() as db:
-        await _execute(db, 
-            "INSERT INTO user_season_stats (user_id, season_id) VALUES (?, ?) ON CONFLICT DO NOTHING",
-            (user_id, season_id),
-        )
-        cursor = await _execute(db, 
-            "SELECT max_floor, max_floor_character, total_runs, deaths, deaths_by_floor, kills_json, "
-            "treasures_found, chests_opened, xp_gained "
-            "FROM user_season_stats WHERE user_id = ? AND season_id = ?",
-            (user_id, season_id),
-        )
-        row = await cursor.fetchone()
-        (
-            max_floor,
-            max_floor_character,
-            total_runs,
-            deaths,
+        cursor = await _execute_named(db, "record_season_stats.upsert", RECORD_SEASON_STATS_SQL, (
+            user_id,
+            season_id,
+            user_id,
+            season_id,
+            floor_value,
+            character_id if floor_value > 0 else "wanderer",
+            1 if died else 0,
             deaths_by_floor,
-            kills_json,
-            treasures_found,
-            chests_opened,
-            xp_gained,
-        ) = row or (
-            0,
-            "wanderer",
-            0,
-            0,
-            "{}",
-            "{}",
-            0,
-            0,
-            0,
-        )
-
-        old_max_floor = max_floor or 0
-        floor_value = int(state.get("floor", 0))
-        max_floor = max(old_max_floor, floor_value)
-        max_floor_character = max_floor_character or "wanderer"
-        if floor_value > old_max_floor:
-            max_floor_character = state.get("character_id") or "wanderer"
-        total_runs = (total_runs or 0) + 1
-        deaths = deaths or 0
-        deaths_by_floor = _json_dict(deaths_by_floor)
-        kills = _json_dict(kills_json)
-        treasures_found = (treasures_found or 0) + int(state.get("treasures_found", 0))
-        chests_opened = (chests_opened or 0) + int(state.get("chests_opened", 0))
-        xp_bonus = int(state.get("xp_bonus", 0))
-        xp_gained = (xp_gained or 0) + int(state.get("floor", 0)) + xp_bonus
-
-        if died:
-            deaths += 1
-            floor = str(state.get("floor", 0))
-            deaths_by_floor[floor] = deaths_by_floor.get(floor, 0) + 1
-
-        for enemy_id, count in (state.get("kills", {}) or {}).items():
-            kills[enemy_id] = kills.get(enemy_id, 0) + int(count)
-
-        await _execute(db, 
-            "UPDATE user_season_stats SET max_floor = ?, max_floor_character = ?, total_runs = ?, deaths = ?, "
-            "deaths_by_floor = ?, kills_json = ?, treasures_found = ?, chests_opened = ?, "
-            "xp_gained = ?, updated_at = CURRENT_TIMESTAMP "
-            "WHERE user_id = ? AND season_id = ?",
-            (
-                max_floor,
-                max_floor_character,
-                total_runs,
-                deaths,
-                json.dumps(deaths_by_floor),
-                json.dumps(kills),
-                treasures_found,
-                chests_opened,
-                xp_gained,
-                user_id,
-                season_id,
-            ),
-        )
+            kills,
+            int(state.get("treasures_found", 0)),
+            int(state.get("chests_opened", 0)),
+            floor_value + int(state.get("xp_bonus", 0)),
+        ))
+        row = await cursor.fetchone()
+        await _record_normalized_stats(db, user_id, season_id, kills, floor_value if died else None)
+        if row:
+            old_floor, new_floor = row[1] or 0, row[0] or 0
+            db.after_commit(lambda: _note_season_floor(season_id, user_id, old_floor, new_floor))
         await db.commit()
 
 
 async def get_season_death_stats(season_id: int) -> tuple[int, float]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(
             db,
             "SELECT COALESCE(SUM(deaths), 0) FROM user_season_stats WHERE season_id = ?",
@@ -1044,32 +1192,25 @@ async def get_season_death_stats(season_id: int) -> tuple[int, float]:
         )
         row = await cursor.fetchone()
         total_deaths = int(row[0]) if row else 0
-
-        cursor = await _execute(
-            db,
-            "SELECT deaths_by_floor FROM user_season_stats WHERE season_id = ?",
-            (season_id,),
-        )
-        rows = await cursor.fetchall()
-        weighted_sum = 0
-        death_total = 0
-        for (deaths_by_floor,) in rows:
-            data = _json_dict(deaths_by_floor)
-            for floor_str, count in data.items():
-                try:
-                    floor = int(floor_str)
-                except (TypeError, ValueError):
-                    continue
-                count_int = int(count)
-                weighted_sum += floor * count_int
-                death_total += count_int
-        avg_death_floor = (weighted_sum / death_total) if death_total else 0.0
+        avg_death_floor = await _avg_death_floor(db, season_id)
         return total_deaths, avg_death_floor
 
 
+async def _avg_death_floor(db: _PgConn, season_id: int) -> float:
+    cursor = await _execute(
+        db,
+        "SELECT COALESCE(SUM(floor::bigint * deaths), 0), COALESCE(SUM(deaths), 0) "
+        "FROM user_deaths WHERE season_id = ? AND floor >= 0",
+        (season_id,),
+    )
+    row = await cursor.fetchone()
+    weighted_sum, death_total = (int(row[0]), int(row[1])) if row else (0, 0)
+    return (weighted_sum / death_total) if death_total else 0.0
+
+
 async def get_season_leaderboard_total(season_id: int) -> int:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_season_leaderboard_total",
             "SELECT COUNT(*) FROM user_season_stats WHERE season_id = ? AND max_floor > 0",
             (season_id,),
         )
@@ -1078,49 +1219,167 @@ async def get_season_leaderboard_total(season_id: int) -> int:
 
 
 async def get_season_leaderboard_page(season_id: int, limit: int, offset: int) -> List[Tuple]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
-            "SELECT users.username, user_season_stats.max_floor, users.xp, user_season_stats.max_floor_character "
-            "FROM user_season_stats "
-            "JOIN users ON users.id = user_season_stats.user_id "
-            "WHERE user_season_stats.season_id = ? "
-            "ORDER BY user_season_stats.max_floor DESC, users.username ASC "
-            "LIMIT ? OFFSET ?",
-            (season_id, limit, offset),
-        )
-        return await cursor.fetchall()
+    async with _read() as db:
+        after = None
+        if offset > 0:
+            ranks = _season_ranks(season_id)
+            after = ranks.cursor_at(offset) if ranks else None
+            if after is None:
+                cursor = await _execute_named(db, "get_season_leaderboard_page",
+                    "SELECT users.username, ranked.max_floor, users.xp, ranked.max_floor_character FROM ("
+                    "SELECT user_id, max_floor, max_floor_character FROM user_season_stats "
+                    "WHERE season_id = ? AND max_floor > 0 "
+                    "ORDER BY max_floor DESC, user_id ASC LIMIT ? OFFSET ?"
+                    ") AS ranked JOIN users ON users.id = ranked.user_id "
+                    "ORDER BY ranked.max_floor DESC, ranked.user_id ASC",
+                    (season_id, limit, offset),
+                )
+                return await cursor.fetchall()
+        rows = await _season_leaderboard_rows(db, season_id, limit, after)
+        return [row[1:] for row in rows]
+
+
+async def get_season_leaderboard_after(
+    season_id: int,
+    limit: int,
+    after: Optional[Tuple[int, int]] = None,
+) -> List[Tuple]:
+    async with _read() as db:
+        return await _season_leaderboard_rows(db, season_id, limit, after)
+
+
+async def _season_leaderboard_rows(
+    db: _PgConn,
+    season_id: int,
+    limit: int,
+    after: Optional[Tuple[int, int]],
+) -> List[Tuple]:
+    if after is None:
+        cursor = await _execute_named(db, "season_leaderboard.first", SEASON_LEADERBOARD_FIRST_SQL, (season_id, limit))
+    else:
+        max_floor, user_id = after
+        cursor = await _execute_named(db, "season_leaderboard.after", SEASON_LEADERBOARD_AFTER_SQL, (
+            season_id,
+            max_floor,
+            user_id,
+            limit,
+            season_id,
+            max_floor,
+            limit,
+            limit,
+        ))
+    return await cursor.fetchall()
 
 
 async def get_user_season_rank(user_id: int, season_id: int) -> Optional[int]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
-            "SELECT rank FROM ("
-            "SELECT user_id, ROW_NUMBER() OVER (ORDER BY max_floor DESC, user_id ASC) AS rank "
-            "FROM user_season_stats WHERE season_id = ? AND max_floor > 0"
-            ") WHERE user_id = ?",
-            (season_id, user_id),
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_user_season_rank.floor",
+            "SELECT max_floor FROM user_season_stats WHERE user_id = ? AND season_id = ?",
+            (user_id, season_id),
         )
         row = await cursor.fetchone()
+        max_floor = int(row[0] or 0) if row else 0
+        if max_floor <= 0:
+            return None
+        ranks = _season_ranks(season_id)
+        rank = ranks.rank(max_floor, user_id) if ranks else None
+        if rank is not None:
+            return rank
+        cursor = await _execute_named(db, "get_user_season_rank.count", SEASON_RANK_COUNT_SQL, (
+            season_id,
+            max_floor,
+            max_floor,
+            user_id,
+        ))
+        row = await cursor.fetchone()
         return int(row[0]) if row else None
 
 
+def _season_ranks(season_id: int) -> Optional[_SeasonRanks]:
+    # never loads inline: a missing or expired cache is reloaded in the background, callers use SQL meanwhile
+    # (an expired one keeps serving, it is kept current by _note_season_floor)
+    if SEASON_RANK_CACHE_TTL <= 0:
+        return None
+    ranks = _SEASON_RANKS.get(season_id)
+    if ranks is None or monotonic() - ranks.loaded_at >= SEASON_RANK_CACHE_TTL:
+        _schedule_season_ranks_refresh(season_id)
+    return ranks
+
+
+def _schedule_season_ranks_refresh(season_id: int) -> None:
+    if season_id in _SEASON_RANK_REFRESH:
+        return
+    task = asyncio.get_running_loop().create_task(refresh_season_ranks(season_id))
+    _SEASON_RANK_REFRESH[season_id] = task
+    task.add_done_callback(partial(_season_ranks_refreshed, season_id))
+
+
+def _season_ranks_refreshed(season_id: int, task: "asyncio.Task[Optional[_SeasonRanks]]") -> None:
+    _SEASON_RANK_REFRESH.pop(season_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Season %s rank cache refresh failed", season_id, exc_info=task.exception())
+
+
+async def refresh_season_ranks(season_id: int) -> Optional[_SeasonRanks]:
+    _SEASON_RANK_PENDING[season_id] = []
+    try:
+        keys = array("q")
+        pool = await _get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction(readonly=True):
+                cursor = await conn.cursor(_translate_sql(SEASON_RANK_KEYS_SQL), season_id)
+                while True:
+                    rows = await cursor.fetch(SEASON_RANK_LOAD_CHUNK)
+                    if not rows:
+                        break
+                    keys.extend(_rank_key(max_floor, user_id) for max_floor, user_id in rows)
+        ranks = _SeasonRanks(keys, monotonic())
+        for user_id, old_floor, new_floor in _SEASON_RANK_PENDING[season_id]:
+            if ranks.rank(new_floor, user_id) is None and not ranks.move(user_id, old_floor, new_floor):
+                _SEASON_RANKS.pop(season_id, None)
+                return None
+        _SEASON_RANKS[season_id] = ranks
+        while len(_SEASON_RANKS) > SEASON_RANK_CACHE_SEASONS:
+            _SEASON_RANKS.pop(next(iter(_SEASON_RANKS)))
+        return ranks
+    finally:
+        _SEASON_RANK_PENDING.pop(season_id, None)
+
+
+def _note_season_floor(season_id: int, user_id: int, old_floor: int, new_floor: int) -> None:
+    if new_floor <= 0 or new_floor == old_floor:
+        return
+    pending = _SEASON_RANK_PENDING.get(season_id)
+    if pending is not None:
+        pending.append((user_id, old_floor, new_floor))
+    ranks = _SEASON_RANKS.get(season_id)
+    if ranks is None:
+        return
+    if not ranks.move(user_id, old_floor, new_floor):
+        _SEASON_RANKS.pop(season_id, None)
+
+
 async def get_season_stats_rows(season_id: int) -> List[Dict[str, Any]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
-            "SELECT user_id, max_floor, total_runs, kills_json, treasures_found, chests_opened, xp_gained "
-            "FROM user_season_stats WHERE season_id = ?",
+            "SELECT stats.user_id, stats.max_floor, stats.total_runs, COALESCE(kills.kills, 0), "
+            "stats.treasures_found, stats.chests_opened, stats.xp_gained "
+            "FROM user_season_stats AS stats "
+            "LEFT JOIN user_kill_totals AS kills "
+            "ON kills.user_id = stats.user_id AND kills.season_id = stats.season_id "
+            "WHERE stats.season_id = ?",
             (season_id,),
         )
         rows = await cursor.fetchall()
         results = []
         for row in rows:
-            user_id, max_floor, total_runs, kills_json, treasures_found, chests_opened, xp_gained = row
+            user_id, max_floor, total_runs, kills_total, treasures_found, chests_opened, xp_gained = row
             results.append(
                 {
                     "user_id": user_id,
                     "max_floor": max_floor or 0,
                     "total_runs": total_runs or 0,
-                    "kills": _json_dict(kills_json),
+                    "kills_total": int(kills_total),
                     "treasures_found": treasures_found or 0,
                     "chests_opened": chests_opened or 0,
                     "xp_gained": xp_gained or 0,
@@ -1130,14 +1389,16 @@ async def get_season_stats_rows(season_id: int) -> List[Dict[str, Any]]:
 
 
 async def get_season_player_rows(season_id: int) -> List[Dict[str, Any]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT users.id, users.telegram_id, users.username, "
             "user_season_stats.max_floor, user_season_stats.total_runs, "
-            "user_season_stats.kills_json, user_season_stats.treasures_found, "
+            "COALESCE(kills.kills, 0), user_season_stats.treasures_found, "
             "user_season_stats.chests_opened, user_season_stats.xp_gained "
             "FROM user_season_stats "
             "JOIN users ON users.id = user_season_stats.user_id "
+            "LEFT JOIN user_kill_totals AS kills "
+            "ON kills.user_id = user_season_stats.user_id AND kills.season_id = user_season_stats.season_id "
             "WHERE user_season_stats.season_id = ?",
             (season_id,),
         )
@@ -1150,7 +1411,7 @@ async def get_season_player_rows(season_id: int) -> List[Dict[str, Any]]:
                 username,
                 max_floor,
                 total_runs,
-                kills_json,
+                kills_total,
                 treasures_found,
                 chests_opened,
                 xp_gained,
@@ -1162,7 +1423,7 @@ async def get_season_player_rows(season_id: int) -> List[Dict[str, Any]]:
                     "username": username,
                     "max_floor": max_floor or 0,
                     "total_runs": total_runs or 0,
-                    "kills": _json_dict(kills_json),
+                    "kills_total": int(kills_total),
                     "treasures_found": treasures_found or 0,
                     "chests_opened": chests_opened or 0,
                     "xp_gained": xp_gained or 0,
@@ -1175,7 +1436,7 @@ async def get_users_by_ids(user_ids: List[int]) -> Dict[int, Tuple[Optional[str]
     if not user_ids:
         return {}
     placeholders = ",".join("?" for _ in user_ids)
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             f"SELECT id, username, telegram_id FROM users WHERE id IN ({placeholders})",
             tuple(user_ids),
@@ -1185,7 +1446,7 @@ async def get_users_by_ids(user_ids: List[int]) -> Dict[int, Tuple[Optional[str]
 
 
 async def get_user_badges(user_id: int) -> List[Dict[str, Any]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT badge_id, count, last_awarded_season FROM user_badges WHERE user_id = ?",
             (user_id,),
@@ -1231,29 +1492,32 @@ async def award_badge(
 
 async def ensure_user(telegram_id: int, username: Optional[str]) -> int:
     async with _connect() as db:
-        await _execute(db, 
+        cursor = await _execute_named(db, "ensure_user.insert",
             "INSERT INTO users (telegram_id, username) VALUES (?, ?) ON CONFLICT (telegram_id) DO NOTHING",
             (telegram_id, username),
         )
-        await _execute(db, 
+        created = (cursor.status or "").endswith(" 1")
+        await _execute_named(db, "ensure_user.rename",
             "UPDATE users SET username = ? WHERE telegram_id = ?",
             (username, telegram_id),
         )
         await db.commit()
-        cursor = await _execute(db, 
+        cursor = await _execute_named(db, "ensure_user.select_id",
             "SELECT id FROM users WHERE telegram_id = ?",
             (telegram_id,),
         )
         row = await cursor.fetchone()
         user_id = row[0]
-        cursor = await _execute(db, 
+        if created:
+            await _add_admin_counters(db, user_id, {"total_users": 1})
+        cursor = await _execute_named(db, "ensure_user.created_at",
             "SELECT created_at FROM users WHERE id = ?",
             (user_id,),
         )
         created_row = await cursor.fetchone()
         created_at = created_row[0] if created_row else None
         if created_at:
-            await _execute(db, 
+            await _execute_named(db, "ensure_user.pioneer",
                 "INSERT INTO user_badges (user_id, badge_id, count, last_awarded_season) "
                 "SELECT ?, ?, 1, NULL WHERE ?::date < ?::date "
                 "ON CONFLICT DO NOTHING",
@@ -1264,7 +1528,7 @@ async def ensure_user(telegram_id: int, username: Optional[str]) -> int:
 
 
 async def get_user(user_id: int) -> Optional[Tuple]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT id, telegram_id, username, max_floor FROM users WHERE id = ?",
             (user_id,),
@@ -1273,8 +1537,8 @@ async def get_user(user_id: int) -> Optional[Tuple]:
 
 
 async def get_user_by_telegram(telegram_id: int) -> Optional[Tuple]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_user_by_telegram",
             "SELECT id, telegram_id, username, max_floor FROM users WHERE telegram_id = ?",
             (telegram_id,),
         )
@@ -1282,7 +1546,7 @@ async def get_user_by_telegram(telegram_id: int) -> Optional[Tuple]:
 
 
 async def get_tutorial_done(telegram_id: int) -> bool:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT tutorial_done FROM users WHERE telegram_id = ?",
             (telegram_id,),
@@ -1304,8 +1568,8 @@ async def set_tutorial_done(telegram_id: int, done: bool) -> None:
 
 
 async def get_active_run(user_id: int) -> Optional[Tuple[int, Dict[str, Any]]]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_active_run",
             "SELECT id, state_json FROM runs "
             "WHERE user_id = ? AND is_active = 1 AND is_tutorial = 0 "
             "ORDER BY started_at DESC LIMIT 1",
@@ -1318,7 +1582,7 @@ async def get_active_run(user_id: int) -> Optional[Tuple[int, Dict[str, Any]]]:
         return run_id, _json_dict(state_json)
 
 async def get_active_tutorial(user_id: int) -> Optional[Tuple[int, Dict[str, Any]]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT id, state_json FROM runs "
             "WHERE user_id = ? AND is_active = 1 AND is_tutorial = 1 "
@@ -1332,7 +1596,7 @@ async def get_active_tutorial(user_id: int) -> Optional[Tuple[int, Dict[str, Any
         return run_id, _json_dict(state_json)
 
 async def get_run_by_id(run_id: int) -> Optional[Tuple[int, bool, Dict[str, Any]]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(
             db,
             "SELECT user_id, is_active, state_json FROM runs WHERE id = ?",
@@ -1351,9 +1615,12 @@ async def create_run(user_id: int, state: Dict[str, Any]) -> int:
         cursor = await _execute(db, 
             "INSERT INTO runs (user_id, state_json, max_floor, is_active, is_tutorial) "
             "VALUES (?, ?, ?, 1, 0) RETURNING id",
-            (user_id, json.dumps(state), state.get("floor", 0)),
+            (user_id, state, state.get("floor", 0)),
         )
         row = await cursor.fetchone()
+        shard = user_id % ADMIN_COUNTER_SHARDS
+        await _execute_named(db, "admin_counters.run_started", ADMIN_RUN_STARTED_SQL, (shard, user_id, shard, shard))
+        await _prune_admin_run_hours(db)
         return int(row[0]) if row else 0
 
 async def create_tutorial_run(user_id: int, state: Dict[str, Any]) -> int:
@@ -1361,7 +1628,7 @@ async def create_tutorial_run(user_id: int, state: Dict[str, Any]) -> int:
         cursor = await _execute(db, 
             "INSERT INTO runs (user_id, state_json, max_floor, is_active, is_tutorial) "
             "VALUES (?, ?, ?, 1, 1) RETURNING id",
-            (user_id, json.dumps(state), state.get("floor", 0)),
+            (user_id, state, state.get("floor", 0)),
         )
         row = await cursor.fetchone()
         return int(row[0]) if row else 0
@@ -1369,20 +1636,80 @@ async def create_tutorial_run(user_id: int, state: Dict[str, Any]) -> int:
 
 async def update_run(run_id: int, state: Dict[str, Any]) -> None:
     async with _connect() as db:
-        await _execute(db, 
+        await _execute_named(db, "update_run",
             "UPDATE runs SET state_json = ?, max_floor = ? WHERE id = ?",
-            (json.dumps(state), state.get("floor", 0), run_id),
+            (state, state.get("floor", 0), run_id),
         )
         await db.commit()
 
 
-async def finish_run(run_id: int, final_floor: int) -> None:
+async def append_run_actions(run_id: int, entries: List[Dict[str, Any]]) -> None:
+    if not entries:
+        return
     async with _connect() as db:
-        await _execute(db, 
-            "UPDATE runs SET is_active = 0, ended_at = CURRENT_TIMESTAMP, max_floor = ? WHERE id = ?",
-            (final_floor, run_id),
+        await _executemany(
+            db,
+            "INSERT INTO run_actions (run_id, seq, action, rng, elapsed_us, inputs_json) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT DO NOTHING",
+            [
+                (
+                    run_id,
+                    int(entry["seq"]),
+                    entry["action"],
+                    int(entry.get("rng", entry["seq"])),
+                    int(entry.get("us", 0)),
+                    entry["inputs"] if entry.get("inputs") else None,
+                )
+                for entry in entries
+            ],
+        )
+
+
+async def get_run_journal(run_id: int) -> List[Dict[str, Any]]:
+    async with _read() as db:
+        cursor = await _execute(
+            db,
+            "SELECT seq, action, rng, elapsed_us, inputs_json FROM run_actions "
+            "WHERE run_id = ? ORDER BY seq",
+            (run_id,),
         )
+        rows = await cursor.fetchall()
+    journal = []
+    for seq, action, rng, elapsed_us, inputs_json in rows:
+        entry = {"seq": int(seq), "action": action, "rng": int(rng), "us": int(elapsed_us or 0)}
+        inputs = _json_dict(inputs_json)
+        if inputs:
+            entry["inputs"] = inputs
+        journal.append(entry)
+    return journal
+
+
+async def get_journaled_run_ids(limit: int, after_run_id: int = 0) -> List[int]:
+    async with _read() as db:
+        cursor = await _execute(
+            db,
+            "SELECT DISTINCT run_id FROM run_actions WHERE run_id > ? AND seq = 0 "
+            "ORDER BY run_id LIMIT ?",
+            (after_run_id, limit),
+        )
+        rows = await cursor.fetchall()
+    return [int(row[0]) for row in rows]
+
+
+async def finish_run(run_id: int, final_floor: int) -> bool:
+    async with _connect() as db:
+        cursor = await _execute_named(db, "finish_run",
+            "WITH previous AS (SELECT is_active FROM runs WHERE id = ? FOR UPDATE) "
+            "UPDATE runs SET is_active = 0, ended_at = CURRENT_TIMESTAMP, max_floor = ? WHERE id = ? "
+            "RETURNING user_id, is_tutorial, (SELECT is_active FROM previous)",
+            (run_id, final_floor, run_id),
+        )
+        row = await cursor.fetchone()
+        was_active = bool(row and row[2] == 1)
+        if was_active and row[1] == 0:
+            await _add_admin_counters(db, row[0], {"active_runs": -1})
         await db.commit()
+        return was_active
 
 async def finish_tutorial_run(run_id: int) -> None:
     async with _connect() as db:
@@ -1395,16 +1722,17 @@ async def finish_tutorial_run(run_id: int) -> None:
 
 async def update_user_max_floor(user_id: int, floor: int) -> None:
     async with _connect() as db:
-        await _execute(db, 
+        await _execute_named(db, "update_user_max_floor",
             "UPDATE users SET max_floor = GREATEST(max_floor, ?) WHERE id = ?",
             (floor, user_id),
         )
+        await _add_admin_counters(db, user_id, {"max_floor": floor})
         await db.commit()
 
 
 async def get_leaderboard(limit: int = 10) -> List[Tuple]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_leaderboard",
             "SELECT username, max_floor FROM users ORDER BY max_floor DESC, username ASC LIMIT ?",
             (limit,),
         )
@@ -1412,8 +1740,8 @@ async def get_leaderboard(limit: int = 10) -> List[Tuple]:
 
 
 async def get_leaderboard_page(limit: int, offset: int) -> List[Tuple]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_leaderboard_page",
             "SELECT username, max_floor FROM users "
             "ORDER BY max_floor DESC, username ASC LIMIT ? OFFSET ?",
             (limit, offset),
@@ -1422,14 +1750,14 @@ async def get_leaderboard_page(limit: int, offset: int) -> List[Tuple]:
 
 
 async def get_leaderboard_total() -> int:
-    async with _connect() as db:
-        cursor = await _execute(db, "SELECT COUNT(*) FROM users")
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_leaderboard_total", "SELECT COUNT(*) FROM users")
         row = await cursor.fetchone()
         return int(row[0]) if row else 0
 
 
 async def get_last_run(user_id: int) -> Optional[Tuple[int, int, Dict[str, Any]]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT id, max_floor, state_json FROM runs "
             "WHERE user_id = ? AND is_tutorial = 0 "
@@ -1445,8 +1773,8 @@ async def get_last_run(user_id: int) -> Optional[Tuple[int, int, Dict[str, Any]]
 
 
 async def get_leaderboard_with_ids(limit: int = 10) -> List[Tuple]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_leaderboard_with_ids",
             "SELECT id, username, max_floor FROM users "
             "ORDER BY max_floor DESC, username ASC LIMIT ?",
             (limit,),
@@ -1455,20 +1783,20 @@ async def get_leaderboard_with_ids(limit: int = 10) -> List[Tuple]:
 
 
 async def get_season_leaderboard_with_ids(season_id: int, limit: int = 10) -> List[Tuple]:
-    async with _connect() as db:
-        cursor = await _execute(db, 
+    async with _read() as db:
+        cursor = await _execute_named(db, "get_season_leaderboard_with_ids",
             "SELECT users.id, users.username, user_season_stats.max_floor, user_season_stats.max_floor_character "
             "FROM user_season_stats "
             "JOIN users ON users.id = user_season_stats.user_id "
             "WHERE user_season_stats.season_id = ? AND user_season_stats.max_floor > 0 "
-            "ORDER BY user_season_stats.max_floor DESC, users.username ASC LIMIT ?",
+            "ORDER BY user_season_stats.max_floor DESC, user_season_stats.user_id ASC LIMIT ?",
             (season_id, limit),
         )
         return await cursor.fetchall()
 
 
 async def get_user_stats(user_id: int) -> Optional[Dict[str, Any]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT total_runs, deaths, deaths_by_floor, kills_json, hero_runs_json, "
             "treasures_found, chests_opened "
@@ -1491,65 +1819,45 @@ async def get_user_stats(user_id: int) -> Optional[Dict[str, Any]]:
 
 
 async def record_run_stats(user_id: int, state: Dict[str, Any], died: bool) -> None:
+    deaths_by_floor = {str(state.get("floor", 0)): 1} if died else {}
+    hero_runs = {state.get("character_id") or "wanderer": 1}
+    kills = _run_kills(state)
     async with _connect() as db:
-        await _execute(db, 
-            "INSERT INTO user_stats (user_id) VALUES (?) ON CONFLICT DO NOTHING",
-            (user_id,),
-        )
-        cursor = await _execute(db, 
-            "SELECT total_runs, deaths, deaths_by_floor, kills_json, hero_runs_json, treasures_found, chests_opened "
-            "FROM user_stats WHERE user_id = ?",
-            (user_id,),
-        )
-        row = await cursor.fetchone()
-        total_runs, deaths, deaths_by_floor, kills_json, hero_runs_json, treasures_found, chests_opened = row or (
-            0,
-            0,
-            "{}",
-            "{}",
-            "{}",
-            0,
-            0,
-        )
-
-        total_runs = (total_runs or 0) + 1
-        deaths = deaths or 0
-        deaths_by_floor = _json_dict(deaths_by_floor)
-        kills = _json_dict(kills_json)
-        hero_runs = _json_dict(hero_runs_json)
-        treasures_found = (treasures_found or 0) + int(state.get("treasures_found", 0))
-        chests_opened = (chests_opened or 0) + int(state.get("chests_opened", 0))
-        hero_id = state.get("character_id") or "wanderer"
-        hero_runs[hero_id] = hero_runs.get(hero_id, 0) + 1
-
-        if died:
-            deaths += 1
-            floor = str(state.get("floor", 0))
-            deaths_by_floor[floor] = deaths_by_floor.get(floor, 0) + 1
-
-        for enemy_id, count in (state.get("kills", {}) or {}).items():
-            kills[enemy_id] = kills.get(enemy_id, 0) + int(count)
-
-        await _execute(db, 
-            "UPDATE user_stats SET total_runs = ?, deaths = ?, deaths_by_floor = ?, "
-            "kills_json = ?, hero_runs_json = ?, treasures_found = ?, chests_opened = ?, "
-            "updated_at = CURRENT_TIMESTAMP "
-            "WHERE user_id = ?",
-            (
-                total_runs,
-                deaths,
-                json.dumps(deaths_by_floor),
-                json.dumps(kills),
-                json.dumps(hero_runs),
-                treasures_found,
-                chests_opened,
+        await _execute_named(db, "record_run_stats.upsert", RECORD_RUN_STATS_SQL, (
+            user_id,
+            1 if died else 0,
+            deaths_by_floor,
+            kills,
+            hero_runs,
+            int(state.get("treasures_found", 0)),
+            int(state.get("chests_opened", 0)),
+        ))
+        death_floor = int(state.get("floor", 0)) if died else None
+        await _record_normalized_stats(db, user_id, ALL_TIME_SEASON_ID, kills, death_floor)
+        counted_death = death_floor is not None and death_floor >= 0
+        await _add_admin_counters(db, user_id, {
+            "total_deaths": 1 if died else 0,
+            "total_treasures": int(state.get("treasures_found", 0)),
+            "total_chests": int(state.get("chests_opened", 0)),
+            "death_floor_sum": death_floor if counted_death else 0,
+            "death_floor_count": 1 if counted_death else 0,
+        })
+        if kills:
+            cursor = await _execute_named(db, "admin_top_killers.upsert", ADMIN_TOP_KILLERS_UPSERT_SQL, (
                 user_id,
-            ),
-        )
+                ALL_TIME_SEASON_ID,
+                user_id,
+                ADMIN_TOP_KILLERS,
+                user_id,
+            ))
+            if await cursor.fetchone() is not None:
+                await _execute(db, "SELECT pg_advisory_xact_lock(?)", (ADMIN_TOP_KILLERS_LOCK,))
+                await _execute_named(db, "admin_top_killers.trim", ADMIN_TOP_KILLERS_TRIM_SQL, (ADMIN_TOP_KILLERS,))
         await db.commit()
 
+
 async def get_broadcast_targets(broadcast_key: str) -> List[Tuple[int, int]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, 
             "SELECT id, telegram_id FROM users WHERE id NOT IN ("
             "SELECT user_id FROM user_broadcasts WHERE broadcast_key = ?)",
@@ -1559,13 +1867,13 @@ async def get_broadcast_targets(broadcast_key: str) -> List[Tuple[int, int]]:
 
 
 async def get_all_user_targets() -> List[Tuple[int, int]]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, "SELECT id, telegram_id FROM users")
         return await cursor.fetchall()
 
 
 async def get_setting(key: str) -> Optional[str]:
-    async with _connect() as db:
+    async with _read() as db:
         cursor = await _execute(db, "SELECT value FROM settings WHERE key = ?", (key,))
         row = await cursor.fetchone()
         return row[0] if row else None
@@ -1591,81 +1899,34 @@ async def mark_broadcast_sent(user_id: int, broadcast_key: str) -> None:
 
 
 async def get_admin_stats(broadcast_key: Optional[str] = None) -> Dict[str, object]:
-    async with _connect() as db:
-        cursor = await _execute(db, "SELECT COUNT(*) FROM users")
-        row = await cursor.fetchone()
-        total_users = int(row[0]) if row else 0
-
-        cursor = await _execute(db, "SELECT COUNT(*) FROM runs WHERE is_active = 1 AND is_tutorial = 0")
-        row = await cursor.fetchone()
-        active_runs = int(row[0]) if row else 0
-
-        cursor = await _execute(db, "SELECT COUNT(*) FROM runs WHERE is_tutorial = 0")
-        row = await cursor.fetchone()
-        total_runs = int(row[0]) if row else 0
-
-        cursor = await _execute(db, 
-            "SELECT COALESCE(SUM(deaths), 0), COALESCE(SUM(treasures_found), 0), "
-            "COALESCE(SUM(chests_opened), 0) FROM user_stats"
+    async with _read() as db:
+        cursor = await _execute_named(db, "admin_counters.read",
+            "SELECT key, SUM(value), MAX(value) FROM admin_counters GROUP BY key",
         )
-        row = await cursor.fetchone()
-        total_deaths = int(row[0]) if row else 0
-        total_treasures = int(row[1]) if row else 0
-        total_chests = int(row[2]) if row else 0
-
-        cursor = await _execute(db, "SELECT COALESCE(MAX(max_floor), 0) FROM users")
-        row = await cursor.fetchone()
-        max_floor = int(row[0]) if row else 0
+        counters = {
+            key: int(maximum if key == "max_floor" else total)
+            for key, total, maximum in await cursor.fetchall()
+        }
+        total_users = counters.get("total_users", 0)
+        death_floor_count = counters.get("death_floor_count", 0)
+        avg_death_floor = (counters.get("death_floor_sum", 0) / death_floor_count) if death_floor_count else 0.0
 
-        cursor = await _execute(db, 
-            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM runs "
-            "WHERE started_at >= (CURRENT_TIMESTAMP - INTERVAL '1 day') AND is_tutorial = 0"
+        cursor = await _execute_named(db, "admin_counters.last_day",
+            f"SELECT (SELECT COALESCE(SUM(runs), 0) FROM admin_run_hours WHERE hour >= {ADMIN_HOURS_SINCE_SQL}), "
+            f"(SELECT COUNT(DISTINCT user_id) FROM admin_run_users WHERE hour >= {ADMIN_HOURS_SINCE_SQL})",
         )
         row = await cursor.fetchone()
         runs_24h = int(row[0]) if row else 0
         users_24h = int(row[1]) if row else 0
 
-        cursor = await _execute(db, "SELECT deaths_by_floor FROM user_stats")
-        rows = await cursor.fetchall()
-        weighted_sum = 0
-        death_total = 0
-        for (deaths_by_floor,) in rows:
-            data = _json_dict(deaths_by_floor)
-            for floor_str, count in data.items():
-                try:
-                    floor = int(floor_str)
-                except (TypeError, ValueError):
-                    continue
-                count_int = int(count)
-                weighted_sum += floor * count_int
-                death_total += count_int
-        avg_death_floor = (weighted_sum / death_total) if death_total else 0.0
-
-        cursor = await _execute(db, "SELECT user_id, kills_json FROM user_stats")
-        rows = await cursor.fetchall()
-        kill_totals = []
-        user_ids = []
-        for user_id, kills_json in rows:
-            kills = _json_dict(kills_json)
-            total_kills = sum(int(value) for value in kills.values())
-            if total_kills > 0:
-                kill_totals.append((user_id, total_kills))
-                user_ids.append(user_id)
-
-        username_map = {}
-        if user_ids:
-            placeholders = ",".join("?" for _ in user_ids)
-            cursor = await _execute(db, 
-                f"SELECT id, username FROM users WHERE id IN ({placeholders})",
-                tuple(user_ids),
-            )
-            for user_id, username in await cursor.fetchall():
-                username_map[user_id] = username
-
-        top_killers = sorted(kill_totals, key=lambda item: item[1], reverse=True)[:3]
+        cursor = await _execute_named(db, "admin_counters.top_killers",
+            "SELECT users.username, top.kills FROM admin_top_killers AS top "
+            "JOIN users ON users.id = top.user_id "
+            "ORDER BY top.kills DESC, top.user_id ASC LIMIT 3",
+        )
         top_killers = [
-            (username_map.get(user_id) or "Без имени", total)
-            for user_id, total in top_killers
+            (username or "Без имени", int(total))
+            for username, total in await cursor.fetchall()
         ]
 
         broadcast_sent = 0
@@ -1680,12 +1941,12 @@ async def get_admin_stats(broadcast_key: Optional[str] = None) -> Dict[str, obje
 
         return {
             "total_users": total_users,
-            "active_runs": active_runs,
-            "total_runs": total_runs,
-            "total_deaths": total_deaths,
-            "total_treasures": total_treasures,
-            "total_chests": total_chests,
-            "max_floor": max_floor,
+            "active_runs": counters.get("active_runs", 0),
+            "total_runs": counters.get("total_runs", 0),
+            "total_deaths": counters.get("total_deaths", 0),
+            "total_treasures": counters.get("total_treasures", 0),
+            "total_chests": counters.get("total_chests", 0),
+            "max_floor": counters.get("max_floor", 0),
             "runs_24h": runs_24h,
             "users_24h": users_24h,
             "avg_death_floor": avg_death_floor,
@@ -1698,7 +1959,7 @@ async def get_random_boss_name(
     min_floor: int = 10,
     exclude_telegram_id: int | None = None,
 ) -> Optional[str]:
-    async with _connect() as db:
+    async with _read() as db:
         if exclude_telegram_id is None:
             cursor = await _execute(db, 
                 "SELECT username FROM users "
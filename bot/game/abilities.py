@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+
+from .characters import (
+    ASSASSIN_BACKSTAB_BONUS,
+    ASSASSIN_ECHO_RATIO,
+    ASSASSIN_FULL_HP_BONUS,
+    ASSASSIN_ID,
+    ASSASSIN_POTION_HP_BONUS,
+    BERSERK_ID,
+    DEFAULT_CHARACTER_ID,
+    DUELIST_DUEL_ACCURACY_BONUS,
+    DUELIST_DUEL_DAMAGE_BONUS,
+    DUELIST_ID,
+    EXECUTIONER_BLEED_DAMAGE_BONUS,
+    EXECUTIONER_ID,
+    FULL_HEALTH_DAMAGE_BONUS,
+    HUNTER_ID,
+    HUNTER_MARK_ACCURACY_BONUS,
+    HUNTER_MARK_DAMAGE_BONUS,
+    RUNE_GUARD_ID,
+    _berserk_rage_tier,
+    _is_full_hp,
+)
+from .combat_utils import _duel_engaged
+from .common import EVENT_BERSERK_KILL_AP, EVENT_HUNTER_KILL_AP
+
+PowerHook = Callable[[Dict, Dict], float]
+TargetHook = Callable[[Dict, Dict], float]
+AccuracyHook = Callable[[Dict, bool], float]
+
+
+def _resolve_power(_state: Dict, player: Dict) -> float:
+    return FULL_HEALTH_DAMAGE_BONUS if _is_full_hp(player) else 0.0
+
+
+def _rage_power(_state: Dict, player: Dict) -> float:
+    rage = _berserk_rage_tier(player)
+    return rage[1] if rage else 0.0
+
+
+def _assassin_power(_state: Dict, player: Dict) -> float:
+    return ASSASSIN_FULL_HP_BONUS if _is_full_hp(player) else 0.0
+
+
+def _duel_power(state: Dict, _player: Dict) -> float:
+    return DUELIST_DUEL_DAMAGE_BONUS if _duel_engaged(state) else 0.0
+
+
+def _backstab_damage(_state: Dict, target: Dict) -> float:
+    max_hp = int(target.get("max_hp", 0))
+    if max_hp > 0 and int(target.get("hp", 0)) >= max_hp:
+        return ASSASSIN_BACKSTAB_BONUS
+    return 0.0
+
+
+def _mark_damage(_state: Dict, target: Dict) -> float:
+    return HUNTER_MARK_DAMAGE_BONUS if target.get("hunter_mark") else 0.0
+
+
+def _bleed_damage(_state: Dict, target: Dict) -> float:
+    return EXECUTIONER_BLEED_DAMAGE_BONUS if target.get("bleed_turns", 0) > 0 else 0.0
+
+
+def _mark_accuracy(target: Dict, _duel_active: bool) -> float:
+    return HUNTER_MARK_ACCURACY_BONUS if target.get("hunter_mark") else 0.0
+
+
+def _duel_accuracy(_target: Dict, duel_active: bool) -> float:
+    return DUELIST_DUEL_ACCURACY_BONUS if duel_active else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class AbilityProfile:
+    character_id: str
+    power: Tuple[PowerHook, ...] = ()
+    target: Tuple[TargetHook, ...] = ()
+    spell: Tuple[TargetHook, ...] = ()
+    accuracy: Tuple[AccuracyHook, ...] = ()
+    kill_ap: Tuple[str, int] | None = None
+    echo_ratio: float = 0.0
+    potion_bonus: int = 0
+    last_breath: bool = False
+    splash: bool = True
+    bleed_heal: bool = False
+    parry: bool = False
+    second_wind: bool = False
+
+
+ABILITY_PROFILES: Dict[str, AbilityProfile] = {}
+
+
+def register_abilities(profile: AbilityProfile) -> AbilityProfile:
+    ABILITY_PROFILES[profile.character_id] = profile
+    return profile
+
+
+def ability_profile(state: Dict) -> AbilityProfile:
+    profile = ABILITY_PROFILES.get(state.get("character_id"))
+    if profile is None:
+        return ABILITY_PROFILES[DEFAULT_CHARACTER_ID]
+    return profile
+
+
+def apply_power_bonuses(profile: AbilityProfile, state: Dict, player: Dict, dmg: int, minimum: int = 0) -> int:
+    for hook in profile.power:
+        bonus = hook(state, player)
+        if bonus:
+            dmg = max(minimum, int(round(dmg * (1.0 + bonus))))
+    return dmg
+
+
+def apply_target_bonuses(hooks: Tuple[TargetHook, ...], state: Dict, target: Dict, dmg: int) -> int:
+    for hook in hooks:
+        bonus = hook(state, target)
+        if bonus:
+            dmg = max(1, int(round(dmg * (1.0 + bonus))))
+    return dmg
+
+
+def ability_accuracy(profile: AbilityProfile, target: Dict, duel_active: bool) -> float:
+    total = 0.0
+    for hook in profile.accuracy:
+        total += hook(target, duel_active)
+    return total
+
+
+register_abilities(AbilityProfile(DEFAULT_CHARACTER_ID, power=(_resolve_power,), last_breath=True))
+register_abilities(AbilityProfile(RUNE_GUARD_ID))
+register_abilities(
+    AbilityProfile(
+        BERSERK_ID,
+        power=(_rage_power,),
+        kill_ap=("berserk_kill_used", EVENT_BERSERK_KILL_AP),
+        second_wind=True,
+    )
+)
+register_abilities(
+    AbilityProfile(
+        ASSASSIN_ID,
+        power=(_assassin_power,),
+        target=(_backstab_damage,),
+        echo_ratio=ASSASSIN_ECHO_RATIO,
+        potion_bonus=ASSASSIN_POTION_HP_BONUS,
+    )
+)
+register_abilities(
+    AbilityProfile(
+        HUNTER_ID,
+        target=(_mark_damage,),
+        spell=(_mark_damage,),
+        accuracy=(_mark_accuracy,),
+        kill_ap=("hunter_kill_used", EVENT_HUNTER_KILL_AP),
+        last_breath=True,
+    )
+)
+register_abilities(
+    AbilityProfile(
+        EXECUTIONER_ID,
+        target=(_bleed_damage,),
+        spell=(_bleed_damage,),
+        last_breath=True,
+        bleed_heal=True,
+    )
+)
+register_abilities(
+    AbilityProfile(
+        DUELIST_ID,
+        power=(_duel_power,),
+        accuracy=(_duel_accuracy,),
+        last_breath=True,
+        splash=False,
+        parry=True,
+    )
+)
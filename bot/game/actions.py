@@ -0,0 +1,241 @@
+from typing import Callable, Dict, List, Tuple
+
+from .auto_battle import auto_battle
+from .characters import is_desperate_charge_available, potion_empty_message
+from .combat_utils import backfill_kills_total
+from .common import EVENT_KILLS_THIS_TURN, _append_log, _log_event
+from .items import normalize_inventory, total_potions
+from .logic import (
+    apply_boss_artifact_choice,
+    apply_event_choice,
+    apply_reward,
+    apply_second_chance,
+    apply_treasure_choice,
+    end_turn,
+    player_attack,
+    player_use_potion_by_id,
+    player_use_scroll,
+    use_duel_zone,
+    use_hunter_trap,
+    use_rune_guard_shield,
+    use_rune_guard_throw,
+)
+
+POTION_ACTIONS = {
+    "small": "potion_small",
+    "medium": "potion_medium",
+    "strong": "potion_strong",
+}
+BATTLE_SUBMENU_PHASES = {"potion_select", "inventory", "run_tasks", "forfeit_confirm"}
+DEATH_PHASES = {"dead", "second_chance_offer"}
+MAX_BATCH_ACTIONS = 16
+
+
+def action_type(action: str) -> str:
+    prefix, _, rest = action.partition(":")
+    if prefix in {"reward", "event", "boss"}:
+        return prefix
+    if prefix == "inventory" and rest.startswith("use_id:"):
+        return "inventory:use_id"
+    return action
+
+
+def _can_attack(state: Dict) -> bool:
+    player = state["player"]
+    return player.get("ap", 0) > 0 or is_desperate_charge_available(state)
+
+
+def _attack(state: Dict) -> bool:
+    if not _can_attack(state):
+        return False
+    player_attack(state)
+    return True
+
+
+def _attack_all(state: Dict) -> bool:
+    if state["player"].get("ap", 0) <= 1:
+        return False
+    alive_before = sum(1 for enemy in state.get("enemies", []) if enemy.get("hp", 0) > 0)
+    while state["phase"] == "battle" and _can_attack(state):
+        player_attack(state, log_kills=False)
+    killed = alive_before - sum(1 for enemy in state.get("enemies", []) if enemy.get("hp", 0) > 0)
+    if killed and state["phase"] == "battle":
+        _log_event(state, EVENT_KILLS_THIS_TURN, killed)
+    return True
+
+
+def _end_turn(state: Dict) -> bool:
+    end_turn(state)
+    return True
+
+
+def _open_potions(state: Dict) -> bool:
+    if not total_potions(state["player"]):
+        _append_log(state, potion_empty_message(state.get("character_id")))
+        return True
+    state["phase"] = "potion_select"
+    return True
+
+
+def _open_phase(phase: str) -> Callable[[Dict], bool]:
+    def _handler(state: Dict) -> bool:
+        state["phase"] = phase
+        return True
+
+    return _handler
+
+
+def _toggle_info(state: Dict) -> bool:
+    state["show_info"] = not state.get("show_info")
+    return True
+
+
+def _back_to_battle(state: Dict) -> bool:
+    state["phase"] = "battle"
+    return True
+
+
+def _use_potion(potion_id: str) -> Callable[[Dict], bool]:
+    def _handler(state: Dict) -> bool:
+        player_use_potion_by_id(state, potion_id)
+        if state["phase"] == "potion_select":
+            state["phase"] = "battle"
+        return True
+
+    return _handler
+
+
+def _inventory_action(handler: Callable[[Dict], None]) -> Callable[[Dict], bool]:
+    def _wrapped(state: Dict) -> bool:
+        handler(state)
+        if state["phase"] == "inventory":
+            state["phase"] = "battle"
+        return True
+
+    return _wrapped
+
+
+def _use_scroll_by_id(state: Dict, scroll_id: str) -> bool:
+    scrolls = state["player"].get("scrolls", [])
+    for idx, scroll in enumerate(scrolls):
+        if scroll.get("id") == scroll_id:
+            player_use_scroll(state, idx)
+            if state["phase"] == "inventory":
+                state["phase"] = "battle"
+            return True
+    return False
+
+
+def _forfeit(state: Dict) -> bool:
+    state["phase"] = "dead"
+    state["forfeit"] = True
+    _append_log(state, "Вы сдаётесь. Забег завершен.")
+    return True
+
+
+BATTLE_ACTIONS: Dict[str, Callable[[Dict], bool]] = {
+    "action:attack": _attack,
+    "action:attack_all": _attack_all,
+    "action:endturn": _end_turn,
+    "action:auto": auto_battle,
+    "action:potion": _open_potions,
+    "action:inventory": _open_phase("inventory"),
+    "action:run_tasks": _open_phase("run_tasks"),
+    "action:info": _toggle_info,
+    "action:forfeit": _open_phase("forfeit_confirm"),
+}
+
+SUBMENU_ACTIONS: Dict[str, Dict[str, Callable[[Dict], bool]]] = {
+    "potion_select": {
+        "potion:small": _use_potion(POTION_ACTIONS["small"]),
+        "potion:medium": _use_potion(POTION_ACTIONS["medium"]),
+        "potion:strong": _use_potion(POTION_ACTIONS["strong"]),
+        "potion:back": _back_to_battle,
+    },
+    "inventory": {
+        "inventory:duel_zone": _inventory_action(use_duel_zone),
+        "inventory:rune_guard_shield": _inventory_action(use_rune_guard_shield),
+        "inventory:rune_guard_throw": _inventory_action(use_rune_guard_throw),
+        "inventory:hunter_trap": _inventory_action(use_hunter_trap),
+        "inventory:back": _back_to_battle,
+    },
+    "run_tasks": {
+        "run_tasks:back": _back_to_battle,
+    },
+    "forfeit_confirm": {
+        "forfeit:confirm": _forfeit,
+        "forfeit:cancel": _back_to_battle,
+    },
+}
+
+
+def normalize_run_state(state: Dict) -> Dict:
+    if isinstance(state.get("player"), dict):
+        normalize_inventory(state["player"])
+    backfill_kills_total(state)
+    return state
+
+
+def apply_action(state: Dict, action: str) -> bool:
+    normalize_run_state(state)
+    phase = state.get("phase")
+    if phase == "battle":
+        handler = BATTLE_ACTIONS.get(action)
+        return handler(state) if handler else False
+    if phase in BATTLE_SUBMENU_PHASES:
+        handler = SUBMENU_ACTIONS[phase].get(action)
+        if handler:
+            return handler(state)
+        if phase == "inventory" and action.startswith("inventory:use_id:"):
+            return _use_scroll_by_id(state, action.split(":", 2)[2])
+        return False
+    prefix, _, value = action.partition(":")
+    if phase in DEATH_PHASES and prefix == "second_chance":
+        if state.get("forfeit"):
+            return False
+        if value == "use" and state["player"].get("second_chance"):
+            apply_second_chance(state, consume=True)
+            return True
+        if value == "buy":
+            apply_second_chance(state)
+            return True
+        return False
+    if phase == "reward" and prefix == "reward":
+        try:
+            reward_index = int(value)
+        except ValueError:
+            return False
+        if reward_index < 0 or reward_index >= len(state.get("rewards", [])):
+            return False
+        apply_reward(state, reward_index)
+        return True
+    if phase == "event" and prefix == "event":
+        if not any(option.get("id") == value for option in state.get("event_options", [])):
+            return False
+        apply_event_choice(state, value)
+        return True
+    if phase == "boss_prep" and prefix == "boss":
+        if not any(option.get("id") == value for option in state.get("boss_artifacts", [])):
+            return False
+        apply_boss_artifact_choice(state, value)
+        return True
+    if phase == "treasure" and prefix == "treasure" and value in {"equip", "leave"}:
+        apply_treasure_choice(state, value == "equip")
+        return True
+    return False
+
+
+def apply_actions(
+    state: Dict,
+    actions: List[str],
+    apply: Callable[[Dict, str], bool] = apply_action,
+) -> Tuple[int, str | None]:
+    applied = 0
+    for action in actions[:MAX_BATCH_ACTIONS]:
+        phase = state.get("phase")
+        if not apply(state, action):
+            return applied, "invalid"
+        applied += 1
+        if state.get("phase") != phase:
+            return applied, "phase_change"
+    return applied, None
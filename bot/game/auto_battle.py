@@ -0,0 +1,51 @@
+from typing import Dict
+
+from .characters import is_desperate_charge_available
+from .combat_utils import total_kills
+from .common import EVENT_AUTO_BATTLE, _append_log, _log_event
+from .logic import end_turn, player_attack
+
+AUTO_BATTLE_HP_RATIO = 0.35
+AUTO_BATTLE_MAX_TURNS = 40
+
+
+def _hp_threshold(player: Dict) -> int:
+    return max(1, int(player.get("hp_max", 1) * AUTO_BATTLE_HP_RATIO))
+
+
+def auto_battle_available(state: Dict) -> bool:
+    if state.get("phase") != "battle":
+        return False
+    player = state.get("player") or {}
+    return player.get("hp", 0) > _hp_threshold(player)
+
+
+def auto_battle(state: Dict) -> bool:
+    if not auto_battle_available(state):
+        return False
+    player = state["player"]
+    threshold = _hp_threshold(player)
+    hp_before = player["hp"]
+    kills_before = total_kills(state)
+    turns = 0
+    attacks = 0
+    stopped_by_hp = False
+    while state["phase"] == "battle" and turns < AUTO_BATTLE_MAX_TURNS:
+        if player["ap"] > 0 or is_desperate_charge_available(state):
+            player_attack(state, log_kills=False)
+            attacks += 1
+            continue
+        end_turn(state)
+        turns += 1
+        if state["phase"] == "battle" and player["hp"] <= threshold:
+            stopped_by_hp = True
+            break
+
+    killed = total_kills(state) - kills_before
+    taken = max(0, hp_before - player["hp"])
+    _log_event(state, EVENT_AUTO_BATTLE, turns, attacks, killed, taken)
+    if stopped_by_hp:
+        _append_log(state, f"Автобой остановлен: HP {player['hp']}/{player['hp_max']}.")
+    elif state["phase"] == "battle":
+        _append_log(state, "Автобой остановлен: бой затянулся.")
+    return True
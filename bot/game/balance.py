@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .abilities import ability_accuracy, ability_profile
+from .characters import ASSASSIN_ID, _desperate_charge_accuracy_bonus, _is_duelist, _is_last_breath
+from .data import ENEMIES
+from .logic import (
+    BOSS_FLOOR,
+    ELITE_TRAIT_SHADOW,
+    ELITE_TRAIT_TRUE_STRIKE,
+    ENEMY_ARMOR_REDUCED_RATIO,
+    MUTATED_NAME_PREFIX,
+    SURVIVE_ONE_TURN_FLOOR,
+    _mutate_enemy_template,
+    floor_rules,
+)
+
+TTK_HORIZON = 30
+SPLASH_TARGETS = 3
+MAX_REPORT_FLOOR = 500
+FORECAST_CACHE_SIZE = 512
+TEMPLATE_FIELDS = (
+    "base_hp",
+    "hp_per_floor",
+    "base_attack",
+    "attack_per_floor",
+    "base_armor",
+    "armor_per_floor",
+    "base_accuracy",
+    "base_evasion",
+    "min_floor",
+    "max_floor",
+)
+
+_FORECAST_CACHE: Dict[Tuple, str] = {}
+
+
+@dataclass(slots=True)
+class Outcomes:
+    hp: Any
+    damage: Any
+    hit_chance: Any
+    expected_damage: Any
+    player_hit_chance: Any
+    player_damage: Any
+    ttk_cdf: Any
+    expected_ttk: Any
+    win_chance: Any = None
+    player_splash: Any = None
+
+
+@dataclass(slots=True)
+class BalanceTable:
+    template_ids: List[str]
+    names: List[str]
+    floors: Any
+    available: Any
+    outcomes: Outcomes
+
+
+def _floor_rule_values(floors, rule: str, default: float = 0.0):
+    # per-floor values from floor_rules(), looked up once per distinct floor
+    unique, inverse = np.unique(np.asarray(floors), return_inverse=True)
+    values = []
+    for floor in unique:
+        value = getattr(floor_rules(int(floor)), rule)
+        values.append(default if value is None else value)
+    return np.asarray(values, dtype=float)[inverse].reshape(np.shape(floors))
+
+
+def _effective_evasion(evasion, floors):
+    return np.maximum(0.0, evasion * _floor_rule_values(floors, "evasion_factor", 1.0))
+
+
+def _floor_armor_pierce(floors):
+    return _floor_rule_values(floors, "armor_pierce")
+
+
+def _normal_cdf(values):
+    sign = np.sign(values)
+    x = np.abs(values) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + sign * erf)
+
+
+def _player_hit_values(player: Dict):
+    weapon = player.get("weapon", {})
+    power = int(player.get("power", 0))
+    low = int(weapon.get("min_dmg", 1)) + power
+    high = max(low, int(weapon.get("max_dmg", 1)) + power)
+    return np.arange(low, high + 1, dtype=float)
+
+
+def _outcomes(
+    player: Dict,
+    floors,
+    hp,
+    attack,
+    armor,
+    accuracy,
+    evasion,
+    armor_pierce,
+    always_hit,
+    true_strike,
+    evasion_pierce,
+    guaranteed_every,
+    horizon: int,
+    with_win_chance: bool = False,
+    accuracy_bonus=0.0,
+    player_always_hit=False,
+    pierce_bonus: float = 0.0,
+    power_bonuses: Sequence[float] = (),
+    target_bonuses: Sequence[Any] = (),
+    splash_ratio: float = 0.0,
+) -> Outcomes:
+    weapon = player.get("weapon", {})
+    player_hp = max(1, int(player.get("hp", player.get("hp_max", 1))))
+    player_armor = float(player.get("armor", 0.0))
+    player_evasion = float(player.get("evasion", 0.0))
+    player_accuracy = float(player.get("accuracy", 0.0)) + float(weapon.get("accuracy_bonus", 0.0))
+    ap = max(1, int(player.get("ap_max", 1)))
+
+    dodge = np.where(true_strike, 0.0, player_evasion)
+    dodge = np.where(evasion_pierce > 0, np.maximum(0.0, dodge * (1.0 - evasion_pierce)), dodge)
+    hit_chance = np.clip(accuracy - _effective_evasion(dodge, floors), 0.15, 0.95)
+    hit_chance = np.where(always_hit, 1.0, hit_chance)
+    every = np.maximum(guaranteed_every, 1)
+    hit_chance = np.where(
+        (guaranteed_every > 0) & (hit_chance < 1.0),
+        np.minimum(1.0, hit_chance + (1.0 - hit_chance) / every),
+        hit_chance,
+    )
+    effective_armor = player_armor * (1.0 - armor_pierce)
+    reduced = np.maximum(0.0, attack * ENEMY_ARMOR_REDUCED_RATIO - effective_armor)
+    damage = np.maximum(1.0, np.round(reduced + attack * (1.0 - ENEMY_ARMOR_REDUCED_RATIO)))
+
+    values = _player_hit_values(player)
+    pierce = min(1.0, float(weapon.get("armor_pierce", 0.0)) + pierce_bonus)
+    target_armor = np.maximum(0.0, armor * (1.0 - pierce))[..., None]
+    per_hit = np.maximum(
+        1.0,
+        np.round(
+            np.maximum(0.0, values * ENEMY_ARMOR_REDUCED_RATIO - target_armor)
+            + values * (1.0 - ENEMY_ARMOR_REDUCED_RATIO)
+        ),
+    )
+    # same order and rounding as apply_power_bonuses / apply_target_bonuses in roll_damage
+    for bonus in power_bonuses:
+        per_hit = np.maximum(1.0, np.round(per_hit * (1.0 + bonus)))
+    for bonus in target_bonuses:
+        bonus = np.asarray(bonus, dtype=float)[..., None]
+        per_hit = np.where(bonus != 0, np.maximum(1.0, np.round(per_hit * (1.0 + bonus))), per_hit)
+    player_hit_chance = np.clip(
+        player_accuracy + accuracy_bonus - _effective_evasion(evasion, floors), 0.15, 0.95
+    )
+    player_hit_chance = np.where(player_always_hit, 1.0, player_hit_chance)
+    mean_hit = per_hit.mean(axis=-1)
+    mean_attack = player_hit_chance * mean_hit
+    var_attack = player_hit_chance * (per_hit ** 2).mean(axis=-1) - mean_attack ** 2
+
+    attacks = (np.arange(1, horizon + 1, dtype=float) * ap).reshape((horizon,) + (1,) * np.ndim(hp))
+    spread = np.sqrt(np.maximum(var_attack * attacks, 1e-9))
+    ttk_cdf = 1.0 - _normal_cdf((hp - 0.5 - mean_attack * attacks) / spread)
+    ttk_cdf = np.maximum.accumulate(np.clip(ttk_cdf, 0.0, 1.0), axis=0)
+    expected_ttk = 1.0 + (1.0 - ttk_cdf[:-1]).sum(axis=0)
+    outcomes = Outcomes(
+        hp=hp,
+        damage=damage,
+        hit_chance=hit_chance,
+        expected_damage=damage * hit_chance,
+        player_hit_chance=player_hit_chance,
+        player_damage=mean_attack,
+        ttk_cdf=ttk_cdf,
+        expected_ttk=expected_ttk,
+    )
+    if splash_ratio > 0:
+        outcomes.player_splash = player_hit_chance * np.maximum(1.0, np.trunc(per_hit * splash_ratio)).mean(axis=-1)
+    if with_win_chance:
+        outcomes.win_chance = _win_chance(hit_chance, damage, player_hp, ttk_cdf, horizon)
+    return outcomes
+
+
+def _win_chance(hit_chance, damage, player_hp: int, ttk_cdf, horizon: int):
+    # base stats only: hero abilities are not modelled, so this is for the balance report, not for players
+    ttk_pmf = np.diff(ttk_cdf, axis=0, prepend=0.0)
+    lethal_hits = np.ceil(player_hp / damage)
+    columns = int(min(horizon, lethal_hits.max(initial=0.0))) + 1
+    hit_counts = np.arange(columns).reshape((columns,) + (1,) * hit_chance.ndim)
+    alive_mask = (hit_counts < lethal_hits).astype(float)
+    hits_pmf = np.zeros((columns,) + hit_chance.shape)
+    hits_pmf[0] = 1.0
+    landed = np.empty_like(hits_pmf[1:])
+    win_chance = np.zeros(hit_chance.shape)
+    miss = 1.0 - hit_chance
+    for turn in range(horizon):
+        hits_pmf *= alive_mask
+        win_chance += ttk_pmf[turn] * hits_pmf.sum(axis=0)
+        np.multiply(hits_pmf[:-1], hit_chance, out=landed)
+        hits_pmf[1:] *= miss
+        hits_pmf[1:] += landed
+        hits_pmf[0] *= miss
+    return win_chance
+
+
+def _template_params(templates: Sequence[Dict]) -> Dict[str, Any]:
+    params = {name: np.array([float(item.get(name, 0) or 0) for item in templates]) for name in TEMPLATE_FIELDS}
+    traits = [set(item.get("traits", [])) for item in templates]
+    params["true_strike"] = np.array([ELITE_TRAIT_TRUE_STRIKE in item for item in traits])
+    params["always_hit"] = np.array(
+        [
+            bool(template.get("always_hit")) or bool(item & {ELITE_TRAIT_TRUE_STRIKE, ELITE_TRAIT_SHADOW})
+            for template, item in zip(templates, traits)
+        ]
+    )
+    params["evasion_pierce"] = np.array([float(item.get("evasion_pierce", 0.0) or 0.0) for item in templates])
+    params["guaranteed_every"] = np.array([int(item.get("guaranteed_hit_every", 0) or 0) for item in templates])
+    return params
+
+
+def _select(deep, early, mask):
+    return np.where(mask, deep[:, None], early[:, None])
+
+
+def floor_table(
+    player: Dict,
+    floors: Sequence[int] | None = None,
+    templates: Sequence[Dict] | None = None,
+    horizon: int = TTK_HORIZON,
+) -> BalanceTable:
+    templates = list(templates if templates is not None else ENEMIES)
+    if not templates:
+        raise RuntimeError("Enemy templates are not loaded. Put enemies JSON into data/.")
+    floor_values = np.asarray(floors if floors is not None else range(1, MAX_REPORT_FLOOR + 1), dtype=float)
+    mutated = [_mutate_enemy_template(item, MUTATED_NAME_PREFIX, "") for item in templates]
+    early = _template_params(templates)
+    deep = _template_params(mutated)
+    grid = floor_values[None, :]
+    is_deep = np.broadcast_to(grid > BOSS_FLOOR, (len(templates), len(floor_values)))
+
+    def pick(name: str):
+        return _select(deep[name], early[name], is_deep)
+
+    hp = np.trunc(pick("base_hp") + pick("hp_per_floor") * grid)
+    armor = pick("base_armor") + pick("armor_per_floor") * grid
+    weapon = player.get("weapon", {})
+    top_hit = int(weapon.get("max_dmg", 0)) + int(player.get("power", 0))
+    weapon_armor = np.maximum(0.0, armor * (1.0 - float(weapon.get("armor_pierce", 0.0))))
+    min_hp = np.maximum(1.0, np.trunc(top_hit - weapon_armor)) * max(1, int(player.get("ap_max", 1))) + 1
+    hp = np.where((grid > SURVIVE_ONE_TURN_FLOOR) & (hp < min_hp), min_hp, hp)
+
+    available = (pick("min_floor") <= grid) & (grid <= pick("max_floor"))
+    necromancer = np.array([item.get("id") == "necromancer" for item in templates])[:, None]
+    available &= ~(necromancer & is_deep)
+    empty = ~available.any(axis=0)
+    available |= empty[None, :] & ~(necromancer & is_deep)
+
+    outcomes = _outcomes(
+        player,
+        grid,
+        hp=hp,
+        attack=pick("base_attack") + pick("attack_per_floor") * grid,
+        armor=armor,
+        accuracy=np.clip(pick("base_accuracy") + grid * 0.01, 0.4, 0.95),
+        evasion=np.clip(pick("base_evasion") + grid * 0.005, 0.02, 0.3),
+        armor_pierce=np.broadcast_to(_floor_armor_pierce(grid), hp.shape),
+        always_hit=early["always_hit"][:, None],
+        true_strike=early["true_strike"][:, None],
+        evasion_pierce=early["evasion_pierce"][:, None],
+        guaranteed_every=early["guaranteed_every"][:, None],
+        horizon=horizon,
+        with_win_chance=True,
+    )
+    return BalanceTable(
+        template_ids=[str(item.get("id", "")) for item in templates],
+        names=[str(item.get("name", "")) for item in templates],
+        floors=floor_values,
+        available=available,
+        outcomes=outcomes,
+    )
+
+
+def _ability_modifiers(enemies: Sequence[Dict], player: Dict, character_id: str | None) -> Dict[str, Any]:
+    # the hero's current ability hooks, evaluated like the enemy info lines and player_attack do
+    state = {"character_id": character_id, "enemies": list(enemies)}
+    profile = ability_profile(state)
+    duel_active = _is_duelist(state) and len(enemies) == 1
+    shadow = profile.character_id == ASSASSIN_ID and _is_last_breath(player)
+    base_bonus = _desperate_charge_accuracy_bonus(state, player)
+    return {
+        "accuracy_bonus": np.array(
+            [base_bonus + ability_accuracy(profile, enemy, duel_active) for enemy in enemies]
+        ),
+        "player_always_hit": shadow or (profile.last_breath and _is_last_breath(player)),
+        "pierce_bonus": 1.0 if shadow else 0.0,
+        "power_bonuses": [bonus for bonus in (hook(state, player) for hook in profile.power) if bonus],
+        "target_bonuses": [np.array([hook(state, enemy) for enemy in enemies]) for hook in profile.target],
+        "splash_ratio": float(player.get("weapon", {}).get("splash_ratio", 0.0)) if profile.splash else 0.0,
+    }
+
+
+def enemy_outcomes(
+    enemies: Sequence[Dict],
+    player: Dict,
+    floor: int,
+    horizon: int = TTK_HORIZON,
+    character_id: str | None = None,
+) -> Outcomes:
+    floors = np.full(len(enemies), float(floor))
+    traits = [set(enemy.get("traits", [])) for enemy in enemies]
+    floor_pierce = _floor_armor_pierce(floors)
+    modifiers = _ability_modifiers(enemies, player, character_id)
+
+    def outcomes(hp) -> Outcomes:
+        return _outcomes(
+            player,
+            floors,
+            hp=hp,
+            attack=np.array([float(enemy.get("attack", 0)) for enemy in enemies]),
+            armor=np.array([float(enemy.get("armor", 0.0)) for enemy in enemies]),
+            accuracy=np.array([float(enemy.get("accuracy", 0.0)) for enemy in enemies]),
+            evasion=np.array([float(enemy.get("evasion", 0.0)) for enemy in enemies]),
+            armor_pierce=np.maximum(
+                np.array([float(enemy.get("armor_pierce", 0.0)) for enemy in enemies]), floor_pierce
+            ),
+            always_hit=np.array(
+                [
+                    bool(enemy.get("always_hit")) or bool(item & {ELITE_TRAIT_TRUE_STRIKE, ELITE_TRAIT_SHADOW})
+                    for enemy, item in zip(enemies, traits)
+                ]
+            ),
+            true_strike=np.array([ELITE_TRAIT_TRUE_STRIKE in item for item in traits]),
+            evasion_pierce=np.array([float(enemy.get("evasion_pierce", 0.0) or 0.0) for enemy in enemies]),
+            guaranteed_every=np.array([int(enemy.get("guaranteed_hit_every", 0) or 0) for enemy in enemies]),
+            horizon=horizon,
+            **modifiers,
+        )
+
+    result = outcomes(np.array([float(max(0, enemy.get("hp", 0))) for enemy in enemies]))
+    if result.player_splash is None or len(enemies) < 2:
+        return result
+    # enemies are fought in order and each hit splashes the next SPLASH_TARGETS alive ones: take the expected
+    # splash from the attacks spent on each enemy off the ones behind it
+    hp = np.array(result.hp, dtype=float)
+    for idx in range(len(enemies)):
+        if hp[idx] <= 0:
+            continue
+        splash = result.player_splash[idx] * hp[idx] / max(float(result.player_damage[idx]), 1e-9)
+        behind = [other for other in range(idx + 1, len(enemies)) if hp[other] > 0][:SPLASH_TARGETS]
+        for other in behind:
+            hp[other] = max(0.0, hp[other] - splash)
+    return outcomes(hp)
+
+
+def _forecast_key(enemies: Sequence[Dict], player: Dict, floor: int | None, character_id: str | None) -> Tuple:
+    weapon = player.get("weapon", {})
+    return (
+        floor,
+        character_id,
+        player.get("hp"),
+        player.get("hp_max"),
+        player.get("ap_max"),
+        player.get("power"),
+        player.get("armor"),
+        player.get("evasion"),
+        player.get("accuracy"),
+        weapon.get("min_dmg"),
+        weapon.get("max_dmg"),
+        weapon.get("accuracy_bonus"),
+        weapon.get("armor_pierce"),
+        weapon.get("splash_ratio"),
+        tuple(
+            (
+                enemy.get("hp"),
+                enemy.get("max_hp"),
+                enemy.get("hunter_mark"),
+                enemy.get("bleed_turns", 0) > 0,
+                enemy.get("attack"),
+                enemy.get("armor"),
+                enemy.get("accuracy"),
+                enemy.get("evasion"),
+                enemy.get("armor_pierce"),
+                enemy.get("evasion_pierce"),
+                enemy.get("guaranteed_hit_every"),
+                enemy.get("always_hit"),
+                tuple(enemy.get("traits", ())),
+            )
+            for enemy in enemies
+        ),
+    )
+
+
+def enemy_forecast_line(
+    enemies: Sequence[Dict],
+    player: Dict,
+    floor: int | None,
+    character_id: str | None = None,
+) -> str | None:
+    if not enemies or not player:
+        return None
+    key = _forecast_key(enemies, player, floor, character_id)
+    if key in _FORECAST_CACHE:
+        return _FORECAST_CACHE[key]
+    if len(_FORECAST_CACHE) >= FORECAST_CACHE_SIZE:
+        _FORECAST_CACHE.pop(next(iter(_FORECAST_CACHE)))
+    line = _FORECAST_CACHE[key] = _forecast_line(enemies, player, floor, character_id)
+    return line
+
+
+def _forecast_line(enemies: Sequence[Dict], player: Dict, floor: int | None, character_id: str | None) -> str:
+    outcomes = enemy_outcomes(enemies, player, int(floor or 1), character_id=character_id)
+    # an enemy finished off by splash takes no turns of its own
+    clear_turns = np.cumsum(np.where(outcomes.hp > 0, outcomes.expected_ttk, 0.0))
+    taken = float((outcomes.expected_damage * np.maximum(0.0, clear_turns - 1.0)).sum())
+    turns = f"~{clear_turns[-1]:.1f}" if clear_turns[-1] < TTK_HORIZON else f">{TTK_HORIZON}"
+    return f"<b>Прогноз боя:</b> {turns} ход. до победы, ожидаемый урон по вам ~{int(round(taken))}"
@@ -4,6 +4,7 @@ from typing import Dict
 
 DESPERATE_CHARGE_ACCURACY_BONUS = 0.25
 DESPERATE_CHARGE_THRESHOLD_RATIO = 1 / 3
+FULL_HEALTH_DAMAGE_BONUS = 0.2
 
 DEFAULT_CHARACTER_ID = "wanderer"
 RUNE_GUARD_ID = "rune_guard"
@@ -418,6 +419,10 @@ def _has_last_breath(state: Dict, player: Dict) -> bool:
 def _berserk_rage_state(state: Dict, player: Dict) -> tuple[str, float] | None:
     if not _is_berserk(state):
         return None
+    return _berserk_rage_tier(player)
+
+
+def _berserk_rage_tier(player: Dict) -> tuple[str, float] | None:
     hp_max = max(1, int(player.get("hp_max", 1)))
     hp = max(0, int(player.get("hp", 0)))
     if hp <= 0:
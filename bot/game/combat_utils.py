@@ -7,13 +7,29 @@ def _alive_enemies(enemies: List[Dict]) -> List[Dict]:
     return [enemy for enemy in enemies if enemy["hp"] > 0]
 
 
+def total_kills(state: Dict) -> int:
+    total = state.get("kills_total")
+    if total is None:
+        return sum(int(count) for count in (state.get("kills") or {}).values())
+    return total
+
+
+def backfill_kills_total(state: Dict) -> None:
+    # states saved before kills_total existed only have the per-enemy counts
+    if state.get("kills_total") is None:
+        state["kills_total"] = total_kills(state)
+
+
 def _tally_kills(state: Dict) -> None:
     kills = state.setdefault("kills", {})
+    total = total_kills(state)
     for enemy in state.get("enemies", []):
         if enemy["hp"] <= 0 and not enemy.get("counted_dead", False):
             enemy["counted_dead"] = True
             enemy_id = enemy.get("id", "unknown")
             kills[enemy_id] = kills.get(enemy_id, 0) + 1
+            total += 1
+    state["kills_total"] = total
 
 
 def _first_alive(enemies: List[Dict]) -> Dict | None:
@@ -21,3 +37,26 @@ def _first_alive(enemies: List[Dict]) -> Dict | None:
         if enemy.get("hp", 0) > 0:
             return enemy
     return None
+
+
+def _duel_target(state: Dict) -> Dict | None:
+    idx = state.get("duel_target_idx")
+    if idx is None:
+        return None
+    enemies = state.get("enemies", [])
+    if not isinstance(idx, int) or idx < 0 or idx >= len(enemies):
+        return None
+    target = enemies[idx]
+    if target.get("hp", 0) <= 0:
+        return None
+    return target
+
+
+def _duel_zone_active(state: Dict) -> bool:
+    return int(state.get("duel_turns_left", 0) or 0) > 0 and _duel_target(state) is not None
+
+
+def _duel_engaged(state: Dict) -> bool:
+    if _duel_zone_active(state):
+        return True
+    return len(_alive_enemies(state.get("enemies", []))) == 1
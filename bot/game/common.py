@@ -1,15 +1,149 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List
 
 MAX_LOG_LINES = 4
 MESSAGE_LIMIT = 4096
 INFO_TRUNCATED_LINE = "<i>Справка обрезана.</i>"
+# The engine never uses (or reseeds) the global random module: journaled actions run under a generator derived
+# from the run seed, everything else under this process-private one.
+_ENGINE_RNG = random.Random()
+_RUN_RNG: ContextVar[random.Random] = ContextVar("run_rng", default=_ENGINE_RNG)
+
+
+EVENT_TEXT = 0
+EVENT_PLAYER_HIT = 1
+EVENT_PLAYER_MISS = 2
+EVENT_NO_AP = 3
+EVENT_DESPERATE_FREE = 4
+EVENT_ONSLAUGHT_AP = 5
+EVENT_HUNTER_MARK = 6
+EVENT_RETRIBUTION_USED = 7
+EVENT_SPLASH = 8
+EVENT_BLEED_APPLIED = 9
+EVENT_SHADOW_EVADE = 10
+EVENT_ASSASSIN_ECHO = 11
+EVENT_EXECUTIONER_HEAL = 12
+EVENT_BERSERK_KILL_AP = 13
+EVENT_HUNTER_KILL_AP = 14
+EVENT_KILLS_THIS_TURN = 15
+EVENT_BLEED_TICK = 16
+EVENT_BURN_TICK = 17
+EVENT_TRAP = 18
+EVENT_DUEL_ZONE_BLOCK = 19
+EVENT_FROZEN_SKIP = 20
+EVENT_PARRY = 21
+EVENT_ENEMY_HIT = 22
+EVENT_ENEMY_MISS = 23
+EVENT_BERSERK_SECOND_WIND = 24
+EVENT_GROUP_DAMAGE = 25
+EVENT_STONE_SKIN = 26
+EVENT_RETRIBUTION_READY = 27
+EVENT_LAST_BREATH_PENALTY = 28
+EVENT_AUTO_BATTLE = 29
+
+EVENT_TEMPLATES: Dict[int, str] = {
+    EVENT_PLAYER_HIT: "Вы наносите {0} урона по {1}.",
+    EVENT_PLAYER_MISS: "Вы промахиваетесь.",
+    EVENT_NO_AP: "Нет ОД для атаки.",
+    EVENT_DESPERATE_FREE: "Рывок Чести: атака без затрат ОД.",
+    EVENT_ONSLAUGHT_AP: "Натиск: +1 ОД.",
+    EVENT_HUNTER_MARK: "Охотничья метка: цель {0} отмечена.",
+    EVENT_RETRIBUTION_USED: "Каменный Ответ усиливает удар — броня полностью игнорирована.",
+    EVENT_SPLASH: "Сплэш урон: {0} по {1} врагам.",
+    EVENT_BLEED_APPLIED: "{0} истекает кровью.",
+    EVENT_SHADOW_EVADE: "{0} растворяется в тени и избегает удара.",
+    EVENT_ASSASSIN_ECHO: "Эхо убийства: {0} урона по {1} врагам.",
+    EVENT_EXECUTIONER_HEAL: "Приговор: +5 HP за убийство кровоточащего врага.",
+    EVENT_BERSERK_KILL_AP: "Кровавая добыча: +1 ОД за первое убийство в ход.",
+    EVENT_HUNTER_KILL_AP: "Гон по следу: +1 ОД за первое убийство в ход.",
+    EVENT_KILLS_THIS_TURN: "Побеждено врагов за ход: {0}.",
+    EVENT_BLEED_TICK: "{0} теряет {1} HP от кровотечения.",
+    EVENT_BURN_TICK: "{0} горит и теряет {1} HP.",
+    EVENT_TRAP: "Ловушка срабатывает: {0} получает {1} урона.",
+    EVENT_DUEL_ZONE_BLOCK: "Дуэльная зона: остальные враги не могут атаковать.",
+    EVENT_FROZEN_SKIP: "{0} скован льдом и пропускает ход.",
+    EVENT_PARRY: "Парирование: {0} получает {1} урона.",
+    EVENT_ENEMY_HIT: "{0} бьет вас на {1} урона.",
+    EVENT_ENEMY_MISS: "{0} промахивается.",
+    EVENT_BERSERK_SECOND_WIND: "Неистовая живучесть: смертельный удар пережит, HP полностью восстановлено.",
+    EVENT_GROUP_DAMAGE: "Суммарный урон от врагов: {0}.",
+    EVENT_STONE_SKIN: "{0} каменеет: броня усиливается.",
+    EVENT_RETRIBUTION_READY: "Каменный Ответ: следующий удар игнорирует 100% брони.",
+    EVENT_LAST_BREATH_PENALTY: "Цена смерти: -10 HP за затяжное издыхание.",
+    EVENT_AUTO_BATTLE: (
+        "Автобой: ходов <b>{0}</b>, атак <b>{1}</b>, "
+        "побеждено врагов <b>{2}</b>, получено урона <b>{3}</b>."
+    ),
+}
+
+
+def run_rng() -> random.Random:
+    return _RUN_RNG.get()
+
+
+@contextmanager
+def use_run_rng(rng: random.Random) -> Iterator[random.Random]:
+    token = _RUN_RNG.set(rng)
+    try:
+        yield rng
+    finally:
+        _RUN_RNG.reset(token)
+
+
+def _push_event(state: Dict, event: List) -> None:
+    events = state.get("events")
+    if events is None:
+        legacy = state.pop("log", None) or []
+        events = [[EVENT_TEXT, line] for line in legacy[-MAX_LOG_LINES:]]
+        state["events"] = events
+        state["event_pos"] = len(events)
+    pos = int(state.get("event_pos", 0))
+    if len(events) < MAX_LOG_LINES:
+        events.append(event)
+    else:
+        events[pos % MAX_LOG_LINES] = event
+    state["event_pos"] = pos + 1
+
+
+def _log_event(state: Dict, code: int, *args) -> None:
+    _push_event(state, [code, *args])
 
 
 def _append_log(state: Dict, message: str) -> None:
-    state.setdefault("log", []).append(message)
-    state["log"] = state["log"][-MAX_LOG_LINES:]
+    _push_event(state, [EVENT_TEXT, message])
+
+
+def render_event(event: List) -> str:
+    # events may come from an API server on another version: unknown codes or arguments render as ""
+    code = event[0]
+    if code == EVENT_TEXT:
+        return event[1]
+    template = EVENT_TEMPLATES.get(code)
+    if template is None:
+        return ""
+    try:
+        return template.format(*event[1:])
+    except (IndexError, KeyError):
+        return ""
+
+
+def iter_events(state: Dict) -> List[List]:
+    events = state.get("events")
+    if events is None:
+        return [[EVENT_TEXT, line] for line in state.get("log") or []]
+    if len(events) < MAX_LOG_LINES:
+        return list(events)
+    start = int(state.get("event_pos", 0)) % MAX_LOG_LINES
+    return events[start:] + events[:start]
+
+
+def _log_lines(state: Dict) -> List[str]:
+    lines = (render_event(event) for event in iter_events(state))
+    return [line for line in lines if line]
 
 
 def _clamp(value: float, low: float, high: float) -> float:
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import copy
-import random
 from typing import Dict, Tuple
 
+from .common import run_rng
 from .data import SCROLLS, get_scroll_by_id, get_upgrade_by_id
 
 POTION_LIMITS = {
@@ -13,18 +13,77 @@ POTION_LIMITS = {
 }
 
 
+LEGACY_POTION_ID = "potion_legacy"
+
+_POTION_TEMPLATES: Dict[str, Dict] = {}
+
+
+def _potion_template(potion_id: str) -> Dict | None:
+    template = _POTION_TEMPLATES.get(potion_id)
+    if template is None:
+        template = get_upgrade_by_id(potion_id)
+        if template is not None:
+            _POTION_TEMPLATES[potion_id] = template
+    return template
+
+
+def _potion_key(potion: Dict | str) -> str:
+    if isinstance(potion, dict):
+        return potion.get("id") or potion.get("name") or LEGACY_POTION_ID
+    return potion
+
+
+def _remember_potion_stats(player: Dict, potion_id: str, potion: Dict) -> None:
+    if "heal" not in potion and "ap_restore" not in potion:
+        return
+    stats = player.get("potion_stats")
+    if not isinstance(stats, dict):
+        stats = player["potion_stats"] = {}
+    stats.setdefault(potion_id, [int(potion.get("heal", 0)), int(potion.get("ap_restore", 0))])
+
+
+def _potion_counts(player: Dict) -> Dict[str, int]:
+    potions = player.get("potions")
+    if isinstance(potions, dict):
+        return potions
+    # legacy list of potion dicts: ordered by last acquisition, per-unit values kept in potion_stats
+    counts: Dict[str, int] = {}
+    for potion in potions or []:
+        if not isinstance(potion, (dict, str)) or not potion:
+            continue
+        potion_id = _potion_key(potion)
+        counts[potion_id] = counts.pop(potion_id, 0) + 1
+        if isinstance(potion, dict):
+            _remember_potion_stats(player, potion_id, potion)
+    player["potions"] = counts
+    return counts
+
+
+def normalize_inventory(player: Dict) -> Dict:
+    _potion_counts(player)
+    if not isinstance(player.get("scrolls"), list):
+        player["scrolls"] = []
+    return player
+
+
 def _potion_stats(player: Dict, potion_id: str) -> Tuple[int, int]:
-    for potion in player.get("potions", []):
-        if potion.get("id") == potion_id:
-            return int(potion.get("heal", 0)), int(potion.get("ap_restore", 0))
-    fallback = get_upgrade_by_id(potion_id)
-    if fallback:
-        return int(fallback.get("heal", 0)), int(fallback.get("ap_restore", 0))
+    _potion_counts(player)
+    stats = player.get("potion_stats")
+    if isinstance(stats, dict) and potion_id in stats:
+        heal, ap_restore = stats[potion_id]
+        return int(heal), int(ap_restore)
+    template = _potion_template(potion_id)
+    if template:
+        return int(template.get("heal", 0)), int(template.get("ap_restore", 0))
     return 0, 0
 
 
 def count_potions(player: Dict, potion_id: str) -> int:
-    return sum(1 for potion in player.get("potions", []) if potion.get("id") == potion_id)
+    return _potion_counts(player).get(potion_id, 0)
+
+
+def total_potions(player: Dict) -> int:
+    return sum(_potion_counts(player).values())
 
 
 def _potion_limit(potion_id: str) -> int:
@@ -34,20 +93,37 @@ def _potion_limit(potion_id: str) -> int:
 def _add_potion(player: Dict, potion: Dict | None, count: int = 1) -> Tuple[int, int]:
     if not potion or count <= 0:
         return 0, 0
-    potion_id = potion.get("id")
-    if not potion_id:
-        for _ in range(count):
-            player.setdefault("potions", []).append(copy.deepcopy(potion))
-        return count, 0
-    limit = _potion_limit(potion_id)
-    current = count_potions(player, potion_id)
-    space = max(0, limit - current)
-    to_add = min(space, count)
-    for _ in range(to_add):
-        player.setdefault("potions", []).append(copy.deepcopy(potion))
+    potion_id = _potion_key(potion)
+    counts = _potion_counts(player)
+    current = counts.get(potion_id, 0)
+    to_add = min(max(0, _potion_limit(potion_id) - current), count)
+    if to_add:
+        # re-inserted so that the most recently acquired potion is last
+        counts.pop(potion_id, None)
+        counts[potion_id] = current + to_add
+        _remember_potion_stats(player, potion_id, potion)
     return to_add, count - to_add
 
 
+def _take_potion(player: Dict, potion_id: str | None = None) -> Dict | None:
+    counts = _potion_counts(player)
+    if potion_id is None:
+        potion_id = next(reversed(counts), None)
+    current = counts.get(potion_id, 0) if potion_id else 0
+    if current <= 0:
+        return None
+    if current == 1:
+        del counts[potion_id]
+    else:
+        counts[potion_id] = current - 1
+    heal, ap_restore = _potion_stats(player, potion_id)
+    return {"id": potion_id, "heal": heal, "ap_restore": ap_restore}
+
+
+def _drop_potions(player: Dict, potion_id: str) -> int:
+    return _potion_counts(player).pop(potion_id, 0)
+
+
 def _fill_potions(player: Dict, ratio: float = 1.0) -> Dict[str, int]:
     added_counts: Dict[str, int] = {}
     for potion_id in ("potion_small", "potion_medium", "potion_strong"):
@@ -56,7 +132,7 @@ def _fill_potions(player: Dict, ratio: float = 1.0) -> Dict[str, int]:
         current = count_potions(player, potion_id)
         if current >= target:
             continue
-        potion = copy.deepcopy(get_upgrade_by_id(potion_id))
+        potion = _potion_template(potion_id)
         if not potion:
             continue
         to_add = target - current
@@ -77,24 +153,24 @@ def _add_scroll(player: Dict, scroll: Dict | None) -> Dict | None:
 
 
 def _grant_small_potion(player: Dict) -> Tuple[int, int]:
-    potion = copy.deepcopy(get_upgrade_by_id("potion_small"))
+    potion = _potion_template("potion_small")
     return _add_potion(player, potion, count=1)
 
 
 def _grant_medium_potion(player: Dict, count: int = 1) -> Tuple[int, int]:
-    potion = copy.deepcopy(get_upgrade_by_id("potion_medium"))
+    potion = _potion_template("potion_medium")
     return _add_potion(player, potion, count=count)
 
 
 def _grant_strong_potion(player: Dict, count: int = 1) -> Tuple[int, int]:
-    potion = copy.deepcopy(get_upgrade_by_id("potion_strong"))
+    potion = _potion_template("potion_strong")
     return _add_potion(player, potion, count=count)
 
 
 def _grant_random_scroll(player: Dict) -> Dict | None:
     if not SCROLLS:
         return None
-    scroll = random.choice(SCROLLS)
+    scroll = run_rng().choice(SCROLLS)
     return _add_scroll(player, scroll)
 
 
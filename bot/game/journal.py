@@ -0,0 +1,124 @@
+import random
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from .actions import apply_action, apply_actions
+from .common import use_run_rng
+from .logic import new_run_state
+from .run_tasks import build_run_tasks
+
+JOURNAL_START_PREFIX = "start:"
+RNG_STEP_STRIDE = 1_000_003
+EXTERNAL_INPUT_KEYS = ("boss_name", "boss_intro_lines")
+
+
+def new_run_seed() -> int:
+    return random.SystemRandom().randrange(1, 2**31)
+
+
+def _action_rng(seed: int, position: int) -> random.Random:
+    return random.Random(int(seed) * RNG_STEP_STRIDE + int(position))
+
+
+def _external_inputs(state: Dict) -> Dict:
+    if state.get("phase") != "boss_prep" or state.get("boss_kind") != "fallen":
+        return {}
+    return {key: state.get(key) for key in EXTERNAL_INPUT_KEYS}
+
+
+def _journal_entry(seq: int, action: str, elapsed_ns: int, inputs: Dict | None = None) -> Dict:
+    entry = {
+        "seq": seq,
+        "action": action,
+        "rng": seq,
+        "us": elapsed_ns // 1000,
+    }
+    if inputs:
+        entry["inputs"] = inputs
+    return entry
+
+
+def start_journaled_run(character_id: str | None = None, seed: int | None = None) -> Tuple[Dict, Dict]:
+    seed = int(seed) if seed is not None else new_run_seed()
+    started = time.perf_counter_ns()
+    with use_run_rng(_action_rng(seed, 0)):
+        state = new_run_state(character_id)
+    state["rng_seed"] = seed
+    state["journal_seq"] = 0
+    elapsed = time.perf_counter_ns() - started
+    inputs = {"seed": seed, "task_window": state["run_tasks"].get("window_id")}
+    entry = _journal_entry(0, f"{JOURNAL_START_PREFIX}{state['character_id']}", elapsed, inputs)
+    return state, entry
+
+
+def apply_journaled_action(state: Dict, action: str) -> Tuple[bool, Dict | None]:
+    seed = state.get("rng_seed")
+    if seed is None:
+        return apply_action(state, action), None
+    seq = int(state.get("journal_seq", 0)) + 1
+    inputs = _external_inputs(state)
+    started = time.perf_counter_ns()
+    with use_run_rng(_action_rng(seed, seq)):
+        applied = apply_action(state, action)
+    elapsed = time.perf_counter_ns() - started
+    if not applied:
+        return False, None
+    state["journal_seq"] = seq
+    return True, _journal_entry(seq, action, elapsed, inputs)
+
+
+def apply_journaled_actions(state: Dict, actions: List[str]) -> Tuple[int, str | None, List[Dict]]:
+    entries = []
+
+    def _apply(state: Dict, action: str) -> bool:
+        applied, entry = apply_journaled_action(state, action)
+        if entry:
+            entries.append(entry)
+        return applied
+
+    applied_count, reason = apply_actions(state, actions, _apply)
+    return applied_count, reason, entries
+
+
+def replay_start(entry: Dict) -> Dict:
+    action = entry.get("action", "")
+    if not action.startswith(JOURNAL_START_PREFIX):
+        raise ValueError(f"Journal does not start with a run start entry: {action!r}")
+    inputs = entry.get("inputs") or {}
+    seed = int(inputs["seed"])
+    with use_run_rng(_action_rng(seed, entry.get("rng", 0))):
+        state = new_run_state(action[len(JOURNAL_START_PREFIX):])
+    task_window = inputs.get("task_window")
+    if task_window is not None:
+        state["run_tasks"] = build_run_tasks(task_window)
+    state["rng_seed"] = seed
+    state["journal_seq"] = int(entry.get("seq", 0))
+    return state
+
+
+def replay_step(state: Dict, entry: Dict) -> None:
+    for key, value in (entry.get("inputs") or {}).items():
+        state[key] = value
+    with use_run_rng(_action_rng(state["rng_seed"], entry["rng"])):
+        applied = apply_action(state, entry["action"])
+    if not applied:
+        raise ValueError(f"Journal entry {entry.get('seq')} was rejected: {entry['action']!r}")
+    state["journal_seq"] = int(entry["seq"])
+
+
+def iter_replay(journal: List[Dict]) -> Iterator[Tuple[Dict, Dict]]:
+    if not journal:
+        return
+    state = replay_start(journal[0])
+    yield journal[0], state
+    for entry in journal[1:]:
+        replay_step(state, entry)
+        yield entry, state
+
+
+def replay(journal: List[Dict], upto: int | None = None) -> Dict:
+    state: Dict = {}
+    for entry, state in iter_replay(journal):
+        if upto is not None and entry.get("seq", 0) >= upto:
+            break
+    return state
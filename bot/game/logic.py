@@ -1,6 +1,6 @@
 import copy
-import random
-from typing import Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
 
 from .characters import (
     CHARACTERS,
@@ -12,26 +12,24 @@ from .characters import (
     DUELIST_VIRTUOSO_FLOOR,
     DUELIST_VIRTUOSO_ZONE_CHARGES,
     DUELIST_ZONE_TURNS,
+    ASSASSIN_ID,
     EXECUTIONER_ID,
+    HUNTER_FIRST_SHOT_BONUS,
+    HUNTER_ID,
     EXECUTIONER_BLEED_CHANCE_BONUS,
     RUNE_GUARD_ID,
     RUNE_GUARD_AP_BONUS,
     RUNE_GUARD_RETRIBUTION_PIERCE,
     RUNE_GUARD_RETRIBUTION_THRESHOLD,
     RUNE_GUARD_SHIELD_BONUS,
-    _assassin_backstab_bonus,
-    _assassin_echo_ratio,
     _assassin_full_hp_bonus,
     _assassin_potion_bonus,
     _assassin_shadow_active,
-    _berserk_damage_bonus,
     _berserk_rage_state,
     BERSERK_MEAT_ACCURACY_BONUS,
     _desperate_charge_accuracy_bonus,
     _duelist_blade_pierce_bonus,
     _duelist_duel_accuracy_bonus,
-    _duelist_duel_damage_bonus,
-    _executioner_damage_bonus,
     _has_last_breath,
     _has_resolve,
     _has_steady_breath,
@@ -41,11 +39,11 @@ from .characters import (
     _is_desperate_charge,
     _is_duelist,
     _is_executioner,
+    _is_full_hp,
     _is_hunter,
+    _is_last_breath,
     _is_rune_guard,
-    _hunter_first_shot_bonus,
     _hunter_mark_accuracy_bonus,
-    _hunter_mark_bonus,
     apply_character_starting_stats,
     get_character,
     is_desperate_charge_available,
@@ -61,10 +59,52 @@ from .characters import (
     potion_use_label,
     resolve_character_id,
 )
-from .combat_utils import _alive_enemies, _first_alive, _tally_kills
-from .common import MESSAGE_LIMIT, _append_log, _clamp, _percent, _trim_lines_to_limit
+from .abilities import (
+    ability_profile,
+    ability_accuracy,
+    apply_power_bonuses,
+    apply_target_bonuses,
+)
+from .combat_utils import _alive_enemies, _duel_engaged, _duel_target, _duel_zone_active, _first_alive, _tally_kills
+from .common import (
+    EVENT_ASSASSIN_ECHO,
+    EVENT_BERSERK_SECOND_WIND,
+    EVENT_BLEED_APPLIED,
+    EVENT_BLEED_TICK,
+    EVENT_BURN_TICK,
+    EVENT_DESPERATE_FREE,
+    EVENT_DUEL_ZONE_BLOCK,
+    EVENT_ENEMY_HIT,
+    EVENT_ENEMY_MISS,
+    EVENT_EXECUTIONER_HEAL,
+    EVENT_FROZEN_SKIP,
+    EVENT_GROUP_DAMAGE,
+    EVENT_HUNTER_MARK,
+    EVENT_KILLS_THIS_TURN,
+    EVENT_LAST_BREATH_PENALTY,
+    EVENT_NO_AP,
+    EVENT_ONSLAUGHT_AP,
+    EVENT_PARRY,
+    EVENT_PLAYER_HIT,
+    EVENT_PLAYER_MISS,
+    EVENT_RETRIBUTION_READY,
+    EVENT_RETRIBUTION_USED,
+    EVENT_SHADOW_EVADE,
+    EVENT_SPLASH,
+    EVENT_STONE_SKIN,
+    EVENT_TRAP,
+    MESSAGE_LIMIT,
+    _append_log,
+    _clamp,
+    _log_event,
+    _log_lines,
+    _percent,
+    _trim_lines_to_limit,
+    run_rng,
+)
 from .data import CHEST_LOOT, ENEMIES, SCROLLS, UPGRADES, WEAPONS, get_scroll_by_id, get_upgrade_by_id, get_weapon_by_id
 from .effects import _apply_burn, _apply_freeze
+from .models import TURN_FLAG_DEFAULTS
 from .items import (
     POTION_LIMITS,
     _add_potion,
@@ -75,8 +115,12 @@ from .items import (
     _grant_random_scroll,
     _grant_small_potion,
     _grant_strong_potion,
+    _drop_potions,
     _potion_stats,
+    _potion_template,
+    _take_potion,
     count_potions,
+    total_potions,
 )
 from .run_tasks import build_run_tasks, run_tasks_lines, run_tasks_summary
 from .tutorial import (
@@ -98,7 +142,6 @@ ENEMY_DAMAGE_BUDGET_RATIO = 0.4
 ENEMY_DAMAGE_BUDGET_RATIO_POST_BOSS = 0.6
 
 LUCK_MAX = 0.7
-FULL_HEALTH_DAMAGE_BONUS = 0.2
 
 SECOND_CHANCE_AMULET_ID = "second_chance_amulet"
 SECOND_CHANCE_CHEST_CHANCE = 0.02
@@ -207,21 +250,7 @@ def _refresh_turn_ap(state: Dict) -> None:
     player = state.get("player", {})
     if not player:
         return
-    state["desperate_charge_used"] = False
-    state["berserk_kill_used"] = False
-    state["assassin_echo_used"] = False
-    state["hunter_first_shot_used"] = False
-    state["hunter_kill_used"] = False
-    state["hunter_trap_used"] = False
-    state["hunter_trap_active"] = False
-    state["executioner_bleed_used"] = False
-    state["executioner_onslaught_used"] = False
-    state["executioner_heal_count"] = 0
-    state["duelist_blade_used"] = False
-    state["duelist_parry_used"] = False
-    state["rune_guard_shield_used"] = False
-    state["rune_guard_throw_hits"] = 0
-    state["rune_guard_throw_active"] = False
+    state.update(TURN_FLAG_DEFAULTS)
     state.pop("rune_guard_throw_armor", None)
     _purge_executioner_strong_potions(state)
     if _has_steady_breath(state, player):
@@ -289,7 +318,7 @@ def _maybe_trigger_rune_guard_retribution(state: Dict, damage: int) -> None:
         return
     if damage > hp_max * RUNE_GUARD_RETRIBUTION_THRESHOLD:
         state["rune_guard_retribution_ready"] = True
-        _append_log(state, "Каменный Ответ: следующий удар игнорирует 100% брони.")
+        _log_event(state, EVENT_RETRIBUTION_READY)
 
 
 def _apply_executioner_last_breath_penalty(state: Dict) -> None:
@@ -304,7 +333,7 @@ def _apply_executioner_last_breath_penalty(state: Dict) -> None:
         state["executioner_last_breath_turns"] = turns
         if turns > 3:
             player["hp"] -= 10
-            _append_log(state, "Цена смерти: -10 HP за затяжное издыхание.")
+            _log_event(state, EVENT_LAST_BREATH_PENALTY)
             if player["hp"] <= 0:
                 player["hp"] = 0
                 state["phase"] = "dead"
@@ -329,7 +358,7 @@ def _fill_potions_executioner(player: Dict, ratio: float = 1.0) -> Dict[str, int
         current = count_potions(player, potion_id)
         if current >= target:
             continue
-        potion = copy.deepcopy(get_upgrade_by_id(potion_id))
+        potion = _potion_template(potion_id)
         if not potion:
             continue
         to_add = target - current
@@ -342,10 +371,7 @@ def _fill_potions_executioner(player: Dict, ratio: float = 1.0) -> Dict[str, int
 def _purge_executioner_strong_potions(state: Dict) -> None:
     if not _is_executioner(state):
         return
-    player = state.get("player", {})
-    potions = [potion for potion in player.get("potions", []) if potion.get("id") != "potion_strong"]
-    if len(potions) != len(player.get("potions", [])):
-        player["potions"] = potions
+    _drop_potions(state.get("player", {}), "potion_strong")
 
 
 def _trigger_berserk_meat_buff(state: Dict) -> None:
@@ -355,30 +381,8 @@ def _trigger_berserk_meat_buff(state: Dict) -> None:
     _append_log(state, "Сытая ярость: точность +30% на 1 ход.")
 
 
-def _duel_target(state: Dict) -> Dict | None:
-    idx = state.get("duel_target_idx")
-    if idx is None:
-        return None
-    enemies = state.get("enemies", [])
-    if not isinstance(idx, int) or idx < 0 or idx >= len(enemies):
-        return None
-    target = enemies[idx]
-    if target.get("hp", 0) <= 0:
-        return None
-    return target
-
-
-def _duel_zone_active(state: Dict) -> bool:
-    return int(state.get("duel_turns_left", 0) or 0) > 0 and _duel_target(state) is not None
-
-
 def _duelist_duel_active(state: Dict) -> bool:
-    if not _is_duelist(state):
-        return False
-    if _duel_zone_active(state):
-        return True
-    alive = _alive_enemies(state.get("enemies", []))
-    return len(alive) == 1
+    return _is_duelist(state) and _duel_engaged(state)
 
 
 def _duelist_virtuoso_active(state: Dict) -> bool:
@@ -430,7 +434,7 @@ def _hunter_transfer_mark(state: Dict) -> None:
         return
     limit = (len(alive) + 1) // 2
     candidates = alive[:limit]
-    new_target = random.choice(candidates)
+    new_target = run_rng().choice(candidates)
     new_target["hunter_mark"] = True
     _append_log(state, f"Перенос метки: цель {new_target['name']} отмечена.")
 
@@ -439,7 +443,7 @@ def _roll_cursed_floor(floor: int) -> bool:
         return False
     if is_any_boss_floor(floor):
         return False
-    return random.random() < CURSED_FLOOR_CHANCE
+    return run_rng().random() < CURSED_FLOOR_CHANCE
 
 def _has_trait(enemy: Dict, trait: str) -> bool:
     return trait in enemy.get("traits", [])
@@ -483,7 +487,7 @@ def _apply_stone_skin(state: Dict, enemy: Dict) -> None:
     new_armor = min(max_armor, enemy.get("armor", 0.0) + STONE_SKIN_ARMOR_BONUS)
     if new_armor > enemy.get("armor", 0.0):
         enemy["armor"] = new_armor
-        _append_log(state, f"{enemy['name']} каменеет: броня усиливается.")
+        _log_event(state, EVENT_STONE_SKIN, enemy["name"])
 
 def _magic_scroll_damage(state: Dict, player: Dict, ap_max: int | None = None) -> int:
     weapon = player.get("weapon", {})
@@ -491,18 +495,7 @@ def _magic_scroll_damage(state: Dict, player: Dict, ap_max: int | None = None) -
     ap_value = int(ap_max if ap_max is not None else player.get("ap_max", 1))
     dmg = max_weapon * ap_value
     dmg = max(20, int(dmg))
-    if _has_resolve(state, player):
-        dmg = int(round(dmg * (1.0 + FULL_HEALTH_DAMAGE_BONUS)))
-    berserk_bonus = _berserk_damage_bonus(state, player)
-    if berserk_bonus:
-        dmg = int(round(dmg * (1.0 + berserk_bonus)))
-    assassin_bonus = _assassin_full_hp_bonus(state, player)
-    if assassin_bonus:
-        dmg = int(round(dmg * (1.0 + assassin_bonus)))
-    duel_bonus = _duelist_duel_damage_bonus(state, _duelist_duel_active(state))
-    if duel_bonus:
-        dmg = int(round(dmg * (1.0 + duel_bonus)))
-    return dmg
+    return apply_power_bonuses(ability_profile(state), state, player, dmg)
 
 def _is_luck_maxed(player: Dict) -> bool:
     return player.get("luck", 0.0) >= LUCK_MAX
@@ -520,16 +513,10 @@ def _can_drop_second_chance(pool: List[Dict], player: Dict | None) -> bool:
 
 
 def _ap_max_cap_for_floor(floor: int) -> int:
-    safe_floor = max(1, int(floor or 1))
-    return AP_MAX_BASE_CAP + AP_MAX_STEP_PER_TIER * (safe_floor // 10)
+    return floor_rules(floor).ap_max_cap
 
 def _armor_cap_for_floor(floor: int) -> int | None:
-    safe_floor = max(1, int(floor or 1))
-    if safe_floor < 50:
-        return ARMOR_CAP_BEFORE_50
-    if safe_floor < 100:
-        return ARMOR_CAP_BEFORE_100
-    return None
+    return floor_rules(floor).armor_cap
 
 def _is_armor_capped(player: Dict, floor: int) -> bool:
     cap = _armor_cap_for_floor(floor)
@@ -538,12 +525,7 @@ def _is_armor_capped(player: Dict, floor: int) -> bool:
     return player.get("armor", 0) >= cap
 
 def _evasion_cap_for_floor(floor: int) -> float | None:
-    safe_floor = max(1, int(floor or 1))
-    if safe_floor < 50:
-        return EVASION_CAP_BEFORE_50
-    if safe_floor < 100:
-        return EVASION_CAP_BEFORE_100
-    return None
+    return floor_rules(floor).evasion_cap
 
 def _is_evasion_capped(player: Dict, floor: int) -> bool:
     cap = _evasion_cap_for_floor(floor)
@@ -577,25 +559,17 @@ def enforce_ap_cap(state: Dict) -> bool:
 
 
 def _enemy_damage_budget_ratio(floor: int) -> float:
-    base = ENEMY_DAMAGE_BUDGET_RATIO_POST_BOSS if floor > BOSS_FLOOR else ENEMY_DAMAGE_BUDGET_RATIO
-    if floor > 20:
-        steps = (floor - 20) // 10
-        base += 0.1 * steps
-    return min(base, 1.0)
+    return floor_rules(floor).damage_budget_ratio
 
 def _enemy_armor_pierce_for_floor(floor: int) -> float:
-    if floor <= ENEMY_ARMOR_PIERCE_START_FLOOR:
-        return 0.0
-    steps = floor - ENEMY_ARMOR_PIERCE_START_FLOOR
-    pierce = ENEMY_ARMOR_PIERCE_BASE + ENEMY_ARMOR_PIERCE_PER_FLOOR * steps
-    return min(ENEMY_ARMOR_PIERCE_MAX, pierce)
+    return floor_rules(floor).armor_pierce
 
 def _enemy_damage_to_player(enemy: Dict, player: Dict, floor: int | None = None) -> int:
     attack = float(enemy.get("attack", 0))
     armor = float(player.get("armor", 0))
     pierce = float(enemy.get("armor_pierce", 0.0))
     if floor is not None:
-        pierce = max(pierce, _enemy_armor_pierce_for_floor(floor))
+        pierce = max(pierce, floor_rules(floor).armor_pierce)
     reduced_portion = attack * ENEMY_ARMOR_REDUCED_RATIO
     bypass_portion = attack * (1.0 - ENEMY_ARMOR_REDUCED_RATIO)
     effective_armor = armor * (1.0 - pierce)
@@ -604,10 +578,12 @@ def _enemy_damage_to_player(enemy: Dict, player: Dict, floor: int | None = None)
     return max(1, int(round(total)))
 
 def _effective_evasion(evasion: float, floor: int | None) -> float:
-    if floor is None or floor < EVASION_REDUCTION_START_FLOOR:
+    if floor is None:
+        return evasion
+    factor = floor_rules(floor).evasion_factor
+    if factor is None:
         return evasion
-    reduction = min(EVASION_REDUCTION_MAX, EVASION_REDUCTION_PER_FLOOR * (floor - EVASION_REDUCTION_START_FLOOR))
-    return max(0.0, evasion * (1.0 - reduction))
+    return max(0.0, evasion * factor)
 
 def _mutate_enemy_template(template: Dict, prefix: str, info_suffix: str) -> Dict:
     mutated = copy.deepcopy(template)
@@ -657,12 +633,85 @@ WEAPON_RARITY_TIERS = [
     (100, "Апокрифический"),
 ]
 
-def _weapon_rarity_prefix(floor: int) -> str | None:
-    prefix = None
+FLOOR_RULES_PREFILL = 500
+FLOOR_RULES_MAX_CACHED = 5000
+
+
+@dataclass(frozen=True, slots=True)
+class FloorRules:
+    floor: int
+    ap_max_cap: int
+    armor_cap: int | None
+    evasion_cap: float | None
+    armor_pierce: float
+    evasion_factor: float | None
+    damage_budget_ratio: float
+    rarity_prefix: str | None
+    max_group_size: int
+
+
+def _build_floor_rules(floor: int) -> FloorRules:
+    if floor < 50:
+        armor_cap, evasion_cap = ARMOR_CAP_BEFORE_50, EVASION_CAP_BEFORE_50
+    elif floor < 100:
+        armor_cap, evasion_cap = ARMOR_CAP_BEFORE_100, EVASION_CAP_BEFORE_100
+    else:
+        armor_cap, evasion_cap = None, None
+
+    armor_pierce = 0.0
+    if floor > ENEMY_ARMOR_PIERCE_START_FLOOR:
+        steps = floor - ENEMY_ARMOR_PIERCE_START_FLOOR
+        armor_pierce = min(ENEMY_ARMOR_PIERCE_MAX, ENEMY_ARMOR_PIERCE_BASE + ENEMY_ARMOR_PIERCE_PER_FLOOR * steps)
+
+    evasion_factor = None
+    if floor >= EVASION_REDUCTION_START_FLOOR:
+        reduction = min(EVASION_REDUCTION_MAX, EVASION_REDUCTION_PER_FLOOR * (floor - EVASION_REDUCTION_START_FLOOR))
+        evasion_factor = 1.0 - reduction
+
+    budget = ENEMY_DAMAGE_BUDGET_RATIO_POST_BOSS if floor > BOSS_FLOOR else ENEMY_DAMAGE_BUDGET_RATIO
+    if floor > 20:
+        budget += 0.1 * ((floor - 20) // 10)
+
+    rarity_prefix = None
     for min_floor, name in WEAPON_RARITY_TIERS:
         if floor >= min_floor:
-            prefix = name
-    return prefix
+            rarity_prefix = name
+
+    if floor <= 3:
+        max_group = 1
+    elif floor <= 6:
+        max_group = 2
+    else:
+        max_group = 3
+
+    return FloorRules(
+        floor=floor,
+        ap_max_cap=AP_MAX_BASE_CAP + AP_MAX_STEP_PER_TIER * (floor // 10),
+        armor_cap=armor_cap,
+        evasion_cap=evasion_cap,
+        armor_pierce=armor_pierce,
+        evasion_factor=evasion_factor,
+        damage_budget_ratio=min(budget, 1.0),
+        rarity_prefix=rarity_prefix,
+        max_group_size=max_group,
+    )
+
+
+_FLOOR_RULES: List[FloorRules] = [_build_floor_rules(floor) for floor in range(FLOOR_RULES_PREFILL + 1)]
+
+
+def floor_rules(floor: int | None) -> FloorRules:
+    safe_floor = max(1, int(floor or 1))
+    if safe_floor < len(_FLOOR_RULES):
+        return _FLOOR_RULES[safe_floor]
+    if safe_floor > FLOOR_RULES_MAX_CACHED:
+        return _build_floor_rules(safe_floor)
+    _FLOOR_RULES.extend(_build_floor_rules(item) for item in range(len(_FLOOR_RULES), safe_floor + 1))
+    return _FLOOR_RULES[safe_floor]
+
+
+def _weapon_rarity_prefix(floor: int) -> str | None:
+    return floor_rules(floor).rarity_prefix
 
 def _strip_rarity_prefix(name: str) -> str:
     for _, prefix in WEAPON_RARITY_TIERS:
@@ -871,7 +920,7 @@ def generate_boss_artifacts(character_id: str | None = None) -> List[Dict]:
 
 def build_boss(player: Dict) -> Dict:
     ap_max = int(player.get("ap_max", 2))
-    potions = len(player.get("potions", []))
+    potions = total_potions(player)
     ap_bonus = max(0, ap_max - 2)
     potion_bonus = min(potions, 5)
     scale = 1.0 + ap_bonus * 0.08 + potion_bonus * 0.04
@@ -1000,8 +1049,8 @@ def build_daughter_boss(player: Dict, floor: int, character_id: str | None = Non
     }
 
 def new_run_state(character_id: str | None = None) -> Dict:
-    weapon = copy.deepcopy(random.choice(_weapons_for_floor(1)))
-    potion = copy.deepcopy(get_upgrade_by_id("potion_small"))
+    weapon = copy.deepcopy(run_rng().choice(_weapons_for_floor(1)))
+    potion = _potion_template("potion_small")
     ice_scroll = copy.deepcopy(get_scroll_by_id("scroll_ice"))
     chosen_id = resolve_character_id(character_id)
     player = {
@@ -1016,7 +1065,7 @@ def new_run_state(character_id: str | None = None) -> Dict:
         "luck": 0.2,
         "second_chance": False,
         "weapon": weapon,
-        "potions": [],
+        "potions": {},
         "scrolls": [],
     }
     apply_character_starting_stats(player, chosen_id)
@@ -1065,6 +1114,7 @@ def new_run_state(character_id: str | None = None) -> Dict:
         "boss_artifacts": [],
         "show_info": False,
         "kills": {},
+        "kills_total": 0,
         "treasures_found": 0,
         "chests_opened": 0,
         "boss_defeated": False,
@@ -1072,7 +1122,8 @@ def new_run_state(character_id: str | None = None) -> Dict:
         "boss_name": None,
         "boss_intro_lines": None,
         "cursed_ap_ratio": None,
-        "log": [],
+        "events": [],
+        "event_pos": 0,
     }
     _refresh_turn_ap(state)
     _append_log(state, f"Вы нашли <b>{weapon['name']}</b> и спускаетесь на этаж <b>1</b>.")
@@ -1080,11 +1131,7 @@ def new_run_state(character_id: str | None = None) -> Dict:
 
 
 def _max_group_size_for_floor(floor: int) -> int:
-    if floor <= 3:
-        return 1
-    if floor <= 6:
-        return 2
-    return 3
+    return floor_rules(floor).max_group_size
 
 def generate_enemy_group(floor: int, player: Dict, ap_max_override: int | None = None) -> List[Dict]:
     enemies = _enemies_for_floor(floor)
@@ -1115,12 +1162,12 @@ def generate_enemy_group(floor: int, player: Dict, ap_max_override: int | None =
         if max_group <= min_group:
             group_size = min_group
         else:
-            group_size = random.randint(min_group, max_group)
-        group = [build_enemy(random.choice(enemies), floor, player_view) for _ in range(group_size)]
+            group_size = run_rng().randint(min_group, max_group)
+        group = [build_enemy(run_rng().choice(enemies), floor, player_view) for _ in range(group_size)]
         if _enemy_group_within_budget(group, budget):
             return _sort_elites_last(group)
 
-    group = [build_enemy(random.choice(enemies), floor, player_view) for _ in range(min_group)]
+    group = [build_enemy(run_rng().choice(enemies), floor, player_view) for _ in range(min_group)]
     _scale_group_attack_to_budget(group, budget)
     return _sort_elites_last(group)
 
@@ -1206,7 +1253,7 @@ def _enemy_group_within_budget(enemies: List[Dict], budget: float) -> bool:
 def roll_hit(attacker_accuracy: float, defender_evasion: float, floor: int | None = None) -> bool:
     effective_evasion = _effective_evasion(defender_evasion, floor)
     chance = _clamp(attacker_accuracy - effective_evasion, 0.15, 0.95)
-    return random.random() < chance
+    return run_rng().random() < chance
 
 def roll_damage(
     weapon: Dict,
@@ -1215,33 +1262,15 @@ def roll_damage(
     state: Dict,
     armor_pierce_bonus: float = 0.0,
 ) -> int:
-    base = random.randint(weapon["min_dmg"], weapon["max_dmg"]) + player["power"]
+    base = run_rng().randint(weapon["min_dmg"], weapon["max_dmg"]) + player["power"]
     pierce = min(1.0, weapon.get("armor_pierce", 0.0) + max(0.0, armor_pierce_bonus))
     armor = max(0.0, target["armor"] * (1.0 - pierce))
     reduced_portion = base * ENEMY_ARMOR_REDUCED_RATIO
     bypass_portion = base * (1.0 - ENEMY_ARMOR_REDUCED_RATIO)
     dmg = int(max(1, round(max(0.0, reduced_portion - armor) + bypass_portion)))
-    if _has_resolve(state, player):
-        dmg = max(1, int(round(dmg * (1.0 + FULL_HEALTH_DAMAGE_BONUS))))
-    berserk_bonus = _berserk_damage_bonus(state, player)
-    if berserk_bonus:
-        dmg = max(1, int(round(dmg * (1.0 + berserk_bonus))))
-    assassin_bonus = _assassin_full_hp_bonus(state, player)
-    if assassin_bonus:
-        dmg = max(1, int(round(dmg * (1.0 + assassin_bonus))))
-    backstab_bonus = _assassin_backstab_bonus(state, target)
-    if backstab_bonus:
-        dmg = max(1, int(round(dmg * (1.0 + backstab_bonus))))
-    hunter_bonus = _hunter_mark_bonus(state, target)
-    if hunter_bonus:
-        dmg = max(1, int(round(dmg * (1.0 + hunter_bonus))))
-    executioner_bonus = _executioner_damage_bonus(state, target)
-    if executioner_bonus:
-        dmg = max(1, int(round(dmg * (1.0 + executioner_bonus))))
-    duel_bonus = _duelist_duel_damage_bonus(state, _duelist_duel_active(state))
-    if duel_bonus:
-        dmg = max(1, int(round(dmg * (1.0 + duel_bonus))))
-    return dmg
+    profile = ability_profile(state)
+    dmg = apply_power_bonuses(profile, state, player, dmg, minimum=1)
+    return apply_target_bonuses(profile.target, state, target, dmg)
 
 def _floor_range_label(min_floor: int, max_floor: int) -> str:
     if max_floor >= 999:
@@ -1250,6 +1279,135 @@ def _floor_range_label(min_floor: int, max_floor: int) -> str:
         return f"{min_floor}"
     return f"{min_floor}-{max_floor}"
 
+ENEMY_INFO_CACHE_FLOORS = 16
+ENEMY_INFO_CACHE_SIZE = 256
+_ENEMY_INFO_CACHE: Dict[int | None, Dict[Tuple, Tuple[str, int, float]]] = {}
+_CHARACTER_STATES: Dict[str | None, Dict] = {}
+
+
+def clear_enemy_info_cache() -> None:
+    _ENEMY_INFO_CACHE.clear()
+
+
+def _character_state(character_id: str | None) -> Dict:
+    character_state = _CHARACTER_STATES.get(character_id)
+    if character_state is None:
+        character_state = _CHARACTER_STATES.setdefault(character_id, {"character_id": character_id})
+    return character_state
+
+
+def _enemy_info_bucket(floor: int | None) -> Dict[Tuple, Tuple[str, int, float]]:
+    bucket = _ENEMY_INFO_CACHE.get(floor)
+    if bucket is None:
+        if len(_ENEMY_INFO_CACHE) >= ENEMY_INFO_CACHE_FLOORS:
+            _ENEMY_INFO_CACHE.pop(next(iter(_ENEMY_INFO_CACHE)))
+        bucket = _ENEMY_INFO_CACHE[floor] = {}
+    elif len(bucket) >= ENEMY_INFO_CACHE_SIZE:
+        bucket.clear()
+    return bucket
+
+
+def _enemy_info_key(enemy: Dict) -> Tuple:
+    return (
+        enemy.get("id"),
+        enemy.get("name"),
+        enemy.get("attack", 0),
+        enemy.get("armor", 0),
+        enemy.get("accuracy", 0.0),
+        enemy.get("evasion", 0.0),
+        enemy.get("evasion_pierce", 0.0),
+        enemy.get("armor_pierce", 0.0),
+        enemy.get("guaranteed_hit_every"),
+        enemy.get("always_hit"),
+        tuple(enemy.get("traits", ())),
+        enemy.get("hunter_mark"),
+        enemy.get("danger"),
+        enemy.get("info"),
+        enemy.get("min_floor"),
+        enemy.get("max_floor"),
+    )
+
+
+def _build_enemy_info_entry(
+    enemy: Dict,
+    player: Dict | None,
+    floor: int | None,
+    character_state: Dict,
+    single: bool,
+) -> Tuple[str, int, float]:
+    danger = enemy.get("danger", "неизвестна")
+    info = enemy.get("info", "").strip()
+    min_floor = int(enemy.get("min_floor", 1))
+    max_floor = int(enemy.get("max_floor", 999))
+    floors = _floor_range_label(min_floor, max_floor)
+    attack = int(round(enemy.get("attack", 0)))
+    enemy_armor = enemy.get("armor", 0)
+    enemy_armor_display = int(round(enemy_armor))
+    hit_damage = 0
+    expected_hit_chance = 0.0
+    if player:
+        weapon = player.get("weapon", {})
+        hit_damage = _enemy_damage_to_player(enemy, player, floor)
+        expected_hit_chance = _enemy_expected_hit_chance(enemy, player.get("evasion", 0.0), floor)
+        duel_active = _is_duelist(character_state) and single
+        assassin_shadow = _assassin_shadow_active(character_state, player)
+        accuracy_bonus = _desperate_charge_accuracy_bonus(character_state, player)
+        accuracy_bonus += _duelist_duel_accuracy_bonus(character_state, duel_active)
+        accuracy_bonus += _hunter_mark_accuracy_bonus(character_state, enemy)
+        player_accuracy = player.get("accuracy", 0.0) + weapon.get("accuracy_bonus", 0.0) + accuracy_bonus
+        enemy_evasion = _effective_evasion(enemy.get("evasion", 0.0), floor)
+        if _has_last_breath(character_state, player) or assassin_shadow:
+            hit_chance = 1.0
+        else:
+            hit_chance = _clamp(player_accuracy - enemy_evasion, 0.15, 0.95)
+        hit_chance_pct = int(round(hit_chance * 100))
+        if _enemy_always_hits(enemy):
+            damage_text = (
+                f"<b>Урон противника:</b> {hit_damage} | "
+                "<b>Промах невозможен</b>"
+            )
+        else:
+            damage_text = (
+                f"<b>Урон противника:</b> {hit_damage} | "
+                f"<b>Шанс попадания по врагу:</b> {hit_chance_pct}%"
+            )
+        evasion_pierce = float(enemy.get("evasion_pierce", 0.0))
+        if evasion_pierce > 0:
+            pierce_pct = int(round(evasion_pierce * 100))
+            damage_text = f"{damage_text} | <b>Игнор уклонения:</b> {pierce_pct}%"
+        armor_pierce = weapon.get("armor_pierce", 0.0)
+        if assassin_shadow:
+            armor_pierce = max(armor_pierce, 1.0)
+        pierce_pct = int(round(armor_pierce * 100))
+        if pierce_pct > 0:
+            effective_armor = enemy_armor * (1.0 - armor_pierce)
+            effective_armor_display = int(round(effective_armor))
+            armor_text = (
+                f"Броня: <b>{enemy_armor_display}</b> "
+                f"(эффективная {effective_armor_display}, бронепробой {pierce_pct}%)"
+            )
+        else:
+            armor_text = f"Броня: <b>{enemy_armor_display}</b>"
+    else:
+        damage_text = f"<b>Урон:</b> {attack}"
+        armor_text = f"Броня: <b>{enemy_armor_display}</b>"
+    info_text = f"<i>{info}</i> " if info else ""
+    line = (
+        f"- <b>{enemy['name']}</b>: {info_text}"
+        f"{damage_text}. {armor_text}. Опасность: <b>{danger}</b>. Этажи: <i>{floors}</i>."
+    )
+    return line, hit_damage, expected_hit_chance
+
+
+EnemyForecast = Callable[[List[Dict], Dict, int | None, str | None], str | None]
+_ENEMY_FORECAST: EnemyForecast | None = None
+
+
+def register_enemy_forecast(forecast: EnemyForecast | None) -> None:
+    global _ENEMY_FORECAST
+    _ENEMY_FORECAST = forecast
+
+
 def build_enemy_info_text(
     enemies: List[Dict],
     player: Dict | None = None,
@@ -1259,93 +1417,54 @@ def build_enemy_info_text(
     alive = [enemy for enemy in enemies if enemy.get("hp", 0) > 0]
     if not alive:
         return "Справка недоступна: врагов нет."
-    seen = set()
+    single = len(alive) == 1
+    if player:
+        weapon = player.get("weapon", {})
+        player_key = (
+            character_id,
+            player.get("armor", 0),
+            player.get("evasion", 0.0),
+            player.get("accuracy", 0.0),
+            weapon.get("accuracy_bonus", 0.0),
+            weapon.get("armor_pierce", 0.0),
+            _is_last_breath(player),
+            single,
+        )
+    else:
+        player_key = None
+    bucket = _enemy_info_bucket(floor)
+    character_state = _character_state(character_id)
+    entries = []
+    for enemy in alive:
+        key = (player_key, _enemy_info_key(enemy))
+        entry = bucket.get(key)
+        if entry is None:
+            entry = bucket[key] = _build_enemy_info_entry(enemy, player, floor, character_state, single)
+        entries.append((enemy.get("id"), entry))
+
     lines = ["<b>Справка по противникам:</b>"]
     if player:
         lines.append("<i>Урон рассчитан с учетом ваших характеристик.</i>")
         if len(alive) > 1:
             total_expected = 0.0
             total_max = 0
-            player_armor = player.get("armor", 0)
-            player_evasion = player.get("evasion", 0.0)
-            for enemy in alive:
-                hit_damage = _enemy_damage_to_player(enemy, player, floor)
-                hit_chance = _enemy_expected_hit_chance(enemy, player_evasion, floor)
+            for _enemy_id, (_line, hit_damage, hit_chance) in entries:
                 total_expected += hit_damage * hit_chance
                 total_max += hit_damage
             total_display = max(1, int(round(total_expected)))
             lines.append(f"<b>Средний ожидаемый урон за ход:</b> {total_display}")
             lines.append(f"<b>Макс. урон при попадании всех:</b> {total_max}")
-        elif len(alive) == 1:
-            enemy = alive[0]
-            hit_damage = _enemy_damage_to_player(enemy, player, floor)
-            lines.append(f"<b>Макс. урон при попадании:</b> {hit_damage}")
-    for enemy in alive:
-        enemy_id = enemy.get("id")
+        else:
+            lines.append(f"<b>Макс. урон при попадании:</b> {entries[0][1][1]}")
+        forecast = _ENEMY_FORECAST(alive, player, floor, character_id) if _ENEMY_FORECAST else None
+        if forecast:
+            lines.append(forecast)
+    seen = set()
+    for enemy_id, (line, _hit_damage, _hit_chance) in entries:
         if enemy_id in seen:
             continue
         seen.add(enemy_id)
-        danger = enemy.get("danger", "неизвестна")
-        info = enemy.get("info", "").strip()
-        min_floor = int(enemy.get("min_floor", 1))
-        max_floor = int(enemy.get("max_floor", 999))
-        floors = _floor_range_label(min_floor, max_floor)
-        attack = int(round(enemy.get("attack", 0)))
-        enemy_armor = enemy.get("armor", 0)
-        enemy_armor_display = int(round(enemy_armor))
-        if player:
-            weapon = player.get("weapon", {})
-            hit_damage = _enemy_damage_to_player(enemy, player, floor)
-            state_stub = {"character_id": character_id}
-            is_rune_guard = _is_rune_guard(state_stub)
-            is_duelist = _is_duelist(state_stub)
-            duel_active = is_duelist and len(alive) == 1
-            assassin_shadow = _assassin_shadow_active(state_stub, player)
-            accuracy_bonus = _desperate_charge_accuracy_bonus(state_stub, player)
-            accuracy_bonus += _duelist_duel_accuracy_bonus(state_stub, duel_active)
-            accuracy_bonus += _hunter_mark_accuracy_bonus(state_stub, enemy)
-            player_accuracy = player.get("accuracy", 0.0) + weapon.get("accuracy_bonus", 0.0) + accuracy_bonus
-            enemy_evasion = _effective_evasion(enemy.get("evasion", 0.0), floor)
-            if _has_last_breath(state_stub, player) or assassin_shadow:
-                hit_chance = 1.0
-            else:
-                hit_chance = _clamp(player_accuracy - enemy_evasion, 0.15, 0.95)
-            hit_chance_pct = int(round(hit_chance * 100))
-            if _enemy_always_hits(enemy):
-                damage_text = (
-                    f"<b>Урон противника:</b> {hit_damage} | "
-                    "<b>Промах невозможен</b>"
-                )
-            else:
-                damage_text = (
-                    f"<b>Урон противника:</b> {hit_damage} | "
-                    f"<b>Шанс попадания по врагу:</b> {hit_chance_pct}%"
-                )
-            evasion_pierce = float(enemy.get("evasion_pierce", 0.0))
-            if evasion_pierce > 0:
-                pierce_pct = int(round(evasion_pierce * 100))
-                damage_text = f"{damage_text} | <b>Игнор уклонения:</b> {pierce_pct}%"
-            armor_pierce = weapon.get("armor_pierce", 0.0)
-            if assassin_shadow:
-                armor_pierce = max(armor_pierce, 1.0)
-            pierce_pct = int(round(armor_pierce * 100))
-            if pierce_pct > 0:
-                effective_armor = enemy_armor * (1.0 - armor_pierce)
-                effective_armor_display = int(round(effective_armor))
-                armor_text = (
-                    f"Броня: <b>{enemy_armor_display}</b> "
-                    f"(эффективная {effective_armor_display}, бронепробой {pierce_pct}%)"
-                )
-            else:
-                armor_text = f"Броня: <b>{enemy_armor_display}</b>"
-        else:
-            damage_text = f"<b>Урон:</b> {attack}"
-            armor_text = f"Броня: <b>{enemy_armor_display}</b>"
-        info_text = f"<i>{info}</i> " if info else ""
-        lines.append(
-            f"- <b>{enemy['name']}</b>: {info_text}"
-            f"{damage_text}. {armor_text}. Опасность: <b>{danger}</b>. Этажи: <i>{floors}</i>."
-        )
+        lines.append(line)
     return "\n".join(lines)
 
 def end_turn(state: Dict) -> None:
@@ -1365,11 +1484,13 @@ def end_turn(state: Dict) -> None:
 
 def player_attack(state: Dict, log_kills: bool = True) -> None:
     player = state["player"]
+    profile = ability_profile(state)
+    character_id = profile.character_id
     desperate_active = _is_desperate_charge(state, player)
     free_attack = desperate_active and not state.get("desperate_charge_used", False)
     duel_active = _duelist_duel_active(state)
     if (
-        _is_executioner(state)
+        character_id == EXECUTIONER_ID
         and not state.get("executioner_onslaught_used")
         and any(
             enemy.get("hp", 0) > 0 and enemy.get("bleed_turns", 0) > 0
@@ -1380,14 +1501,14 @@ def player_attack(state: Dict, log_kills: bool = True) -> None:
         ap_before = player.get("ap", 0)
         player["ap"] = min(_effective_ap_max(state), ap_before + 1)
         if player["ap"] > ap_before:
-            _append_log(state, "Натиск: +1 ОД.")
+            _log_event(state, EVENT_ONSLAUGHT_AP)
     if player["ap"] <= 0 and not free_attack:
-        _append_log(state, "Нет ОД для атаки.")
+        _log_event(state, EVENT_NO_AP)
         return
 
     if free_attack:
         state["desperate_charge_used"] = True
-        _append_log(state, "Рывок Чести: атака без затрат ОД.")
+        _log_event(state, EVENT_DESPERATE_FREE)
     else:
         player["ap"] -= 1
     weapon = player["weapon"]
@@ -1404,14 +1525,10 @@ def player_attack(state: Dict, log_kills: bool = True) -> None:
 
     shadow_evaded = False
     target_killed = False
-    last_breath = _has_last_breath(state, player)
-    is_rune_guard = _is_rune_guard(state)
-    is_assassin = _is_assassin(state)
-    is_executioner = _is_executioner(state)
-    is_hunter = _is_hunter(state)
-    is_duelist = _is_duelist(state)
-    assassin_shadow = _assassin_shadow_active(state, player)
-    is_berserk = _is_berserk(state)
+    last_breath = profile.last_breath and _is_last_breath(player)
+    is_rune_guard = character_id == RUNE_GUARD_ID
+    is_hunter = character_id == HUNTER_ID
+    assassin_shadow = character_id == ASSASSIN_ID and _is_last_breath(player)
     throw_active = bool(state.get("rune_guard_throw_active"))
     throw_guaranteed = False
     if throw_active:
@@ -1421,9 +1538,8 @@ def player_attack(state: Dict, log_kills: bool = True) -> None:
     hunter_first_shot = is_hunter and not state.get("hunter_first_shot_used")
     if hunter_first_shot:
         state["hunter_first_shot_used"] = True
-    hunter_accuracy_bonus = _hunter_first_shot_bonus(state) if hunter_first_shot else 0.0
-    mark_accuracy_bonus = _hunter_mark_accuracy_bonus(state, target)
-    duelist_accuracy_bonus = _duelist_duel_accuracy_bonus(state, duel_active)
+    hunter_accuracy_bonus = HUNTER_FIRST_SHOT_BONUS if hunter_first_shot else 0.0
+    ability_accuracy_bonus = ability_accuracy(profile, target, duel_active)
     blade_bonus = _duelist_blade_pierce_bonus(state, state.get("duelist_blade_used", False))
     berserk_meat_bonus = BERSERK_MEAT_ACCURACY_BONUS if state.get("berserk_meat_turns", 0) > 0 else 0.0
     if blade_bonus:
@@ -1433,8 +1549,7 @@ def player_attack(state: Dict, log_kills: bool = True) -> None:
         player["accuracy"]
         + weapon["accuracy_bonus"]
         + hunter_accuracy_bonus
-        + mark_accuracy_bonus
-        + duelist_accuracy_bonus
+        + ability_accuracy_bonus
         + berserk_meat_bonus
     )
     if _has_trait(target, ELITE_TRAIT_SHADOW) and not target.get("shadow_dodge_used"):
@@ -1471,22 +1586,22 @@ def player_attack(state: Dict, log_kills: bool = True) -> None:
             armor_pierce_bonus += blade_bonus
         damage = roll_damage(weapon, player, target, state, armor_pierce_bonus=armor_pierce_bonus)
         target["hp"] -= damage
-        _append_log(state, f"Вы наносите {damage} урона по {target['name']}.")
+        _log_event(state, EVENT_PLAYER_HIT, damage, target["name"])
         if is_hunter and not has_hunter_mark:
             for enemy in state.get("enemies", []):
                 enemy.pop("hunter_mark", None)
             target["hunter_mark"] = True
-            _append_log(state, f"Охотничья метка: цель {target['name']} отмечена.")
+            _log_event(state, EVENT_HUNTER_MARK, target["name"])
         if retribution_ready and armor_pierce_bonus > 0:
             state["rune_guard_retribution_ready"] = False
-            _append_log(state, "Каменный Ответ усиливает удар — броня полностью игнорирована.")
+            _log_event(state, EVENT_RETRIBUTION_USED)
         _apply_stone_skin(state, target)
         target_killed = target["hp"] <= 0
         if target_killed and state.get("duel_turns_left") and _duel_target(state) is None:
             state["duel_turns_left"] = 0
             state["duel_target_idx"] = None
 
-        if weapon["splash_ratio"] > 0 and not _is_duelist(state):
+        if weapon["splash_ratio"] > 0 and profile.splash:
             splash_targets = [enemy for enemy in state["enemies"] if enemy is not target and enemy["hp"] > 0]
             if splash_targets:
                 splash_damage = max(1, int(damage * weapon["splash_ratio"]))
@@ -1494,70 +1609,60 @@ def player_attack(state: Dict, log_kills: bool = True) -> None:
                 for enemy in hit_targets:
                     enemy["hp"] -= splash_damage
                     _apply_stone_skin(state, enemy)
-                _append_log(state, f"Сплэш урон: {splash_damage} по {len(hit_targets)} врагам.")
+                _log_event(state, EVENT_SPLASH, splash_damage, len(hit_targets))
 
         bleed_chance = _executioner_bleed_chance(state, weapon)
-        if bleed_chance > 0 and random.random() < bleed_chance:
+        if bleed_chance > 0 and run_rng().random() < bleed_chance:
             target["bleed_turns"] = max(target["bleed_turns"], 2)
             target["bleed_damage"] = max(target["bleed_damage"], weapon["bleed_damage"])
-            _append_log(state, f"{target['name']} истекает кровью.")
+            _log_event(state, EVENT_BLEED_APPLIED, target["name"])
         _hunter_transfer_mark(state)
     else:
         if shadow_evaded:
-            _append_log(state, f"{target['name']} растворяется в тени и избегает удара.")
+            _log_event(state, EVENT_SHADOW_EVADE, target["name"])
         else:
-            _append_log(state, "Вы промахиваетесь.")
+            _log_event(state, EVENT_PLAYER_MISS)
 
     alive_after = len(_alive_enemies(state["enemies"]))
     killed = max(0, alive_before - alive_after)
-    if (
-        is_assassin
-        and target_killed
-        and not state.get("assassin_echo_used")
-        and _assassin_echo_ratio(state) > 0
-    ):
+    if profile.echo_ratio > 0 and target_killed and not state.get("assassin_echo_used"):
         state["assassin_echo_used"] = True
-        echo_damage = max(1, int(round(damage * _assassin_echo_ratio(state))))
+        echo_damage = max(1, int(round(damage * profile.echo_ratio)))
         echo_targets = [enemy for enemy in state["enemies"] if enemy is not target and enemy["hp"] > 0]
         if echo_targets:
             for enemy in echo_targets:
                 enemy["hp"] -= echo_damage
                 _apply_stone_skin(state, enemy)
-            _append_log(state, f"Эхо убийства: {echo_damage} урона по {len(echo_targets)} врагам.")
+            _log_event(state, EVENT_ASSASSIN_ECHO, echo_damage, len(echo_targets))
         alive_after = len(_alive_enemies(state["enemies"]))
         killed = max(0, alive_before - alive_after)
-    if is_executioner and bleeding_before:
+    if profile.bleed_heal and bleeding_before:
         for enemy in bleeding_before:
             if enemy.get("hp", 0) <= 0 and state.get("executioner_heal_count", 0) < 2:
                 state["executioner_heal_count"] = int(state.get("executioner_heal_count", 0)) + 1
                 player["hp"] = min(player.get("hp_max", 0), player.get("hp", 0) + 5)
-                _append_log(state, "Приговор: +5 HP за убийство кровоточащего врага.")
-    if killed > 0 and is_berserk and not state.get("berserk_kill_used"):
-        state["berserk_kill_used"] = True
+                _log_event(state, EVENT_EXECUTIONER_HEAL)
+    if killed > 0 and profile.kill_ap and not state.get(profile.kill_ap[0]):
+        flag, event = profile.kill_ap
+        state[flag] = True
         ap_before = player.get("ap", 0)
         player["ap"] = min(_effective_ap_max(state), ap_before + 1)
         if player["ap"] > ap_before:
-            _append_log(state, "Кровавая добыча: +1 ОД за первое убийство в ход.")
-    if killed > 0 and is_hunter and not state.get("hunter_kill_used"):
-        state["hunter_kill_used"] = True
-        ap_before = player.get("ap", 0)
-        player["ap"] = min(_effective_ap_max(state), ap_before + 1)
-        if player["ap"] > ap_before:
-            _append_log(state, "Гон по следу: +1 ОД за первое убийство в ход.")
+            _log_event(state, event)
 
     check_battle_end(state)
 
     if log_kills and alive_before > 3:
-        _append_log(state, f"Побеждено врагов за ход: {killed}.")
+        _log_event(state, EVENT_KILLS_THIS_TURN, killed)
 
 def player_use_potion(state: Dict) -> None:
     player = state["player"]
-    if not player["potions"]:
+    potion = _take_potion(player)
+    if potion is None:
         _append_log(state, potion_empty_message(state.get("character_id")))
         return
 
-    potion = player["potions"].pop()
-    bonus_heal = _assassin_potion_bonus(state)
+    bonus_heal = ability_profile(state).potion_bonus
     heal = int(potion.get("heal", 0)) + bonus_heal
     player["hp"] = min(player["hp_max"], player["hp"] + heal)
     player["ap"] = min(_effective_ap_max(state), player["ap"] + potion["ap_restore"])
@@ -1569,20 +1674,18 @@ def player_use_potion(state: Dict) -> None:
 
 def player_use_potion_by_id(state: Dict, potion_id: str) -> None:
     player = state["player"]
-    potions = player.get("potions", [])
-    for idx, potion in enumerate(potions):
-        if potion.get("id") == potion_id:
-            potion = potions.pop(idx)
-            bonus_heal = _assassin_potion_bonus(state)
-            heal = int(potion.get("heal", 0)) + bonus_heal
-            player["hp"] = min(player["hp_max"], player["hp"] + heal)
-            player["ap"] = min(_effective_ap_max(state), player["ap"] + potion["ap_restore"])
-            used_label = potion_use_label(state.get("character_id"))
-            _append_log(state, f"Вы используете {used_label}: +{heal} HP, +{potion['ap_restore']} ОД.")
-            _trigger_berserk_meat_buff(state)
-            check_battle_end(state)
-            return
-    _append_log(state, potion_no_match_message(state.get("character_id")))
+    potion = _take_potion(player, potion_id)
+    if potion is None:
+        _append_log(state, potion_no_match_message(state.get("character_id")))
+        return
+    bonus_heal = ability_profile(state).potion_bonus
+    heal = int(potion.get("heal", 0)) + bonus_heal
+    player["hp"] = min(player["hp_max"], player["hp"] + heal)
+    player["ap"] = min(_effective_ap_max(state), player["ap"] + potion["ap_restore"])
+    used_label = potion_use_label(state.get("character_id"))
+    _append_log(state, f"Вы используете {used_label}: +{heal} HP, +{potion['ap_restore']} ОД.")
+    _trigger_berserk_meat_buff(state)
+    check_battle_end(state)
 
 
 def player_use_scroll(state: Dict, scroll_index: int) -> None:
@@ -1602,6 +1705,7 @@ def player_use_scroll(state: Dict, scroll_index: int) -> None:
         return
 
     alive_before = len(_alive_enemies(state["enemies"]))
+    profile = ability_profile(state)
     scroll = scrolls.pop(scroll_index)
     player["ap"] -= 1
     damage = _magic_scroll_damage(state, player, ap_max=_effective_ap_max(state))
@@ -1610,36 +1714,18 @@ def player_use_scroll(state: Dict, scroll_index: int) -> None:
     if element == "lightning":
         targets = _alive_enemies(state["enemies"])
         for enemy in targets:
-            enemy_damage = damage
-            mark_bonus = _hunter_mark_bonus(state, enemy)
-            if mark_bonus:
-                enemy_damage = max(1, int(round(enemy_damage * (1.0 + mark_bonus))))
-            exec_bonus = _executioner_damage_bonus(state, enemy)
-            if exec_bonus:
-                enemy_damage = max(1, int(round(enemy_damage * (1.0 + exec_bonus))))
+            enemy_damage = apply_target_bonuses(profile.spell, state, enemy, damage)
             enemy["hp"] -= enemy_damage
             _apply_stone_skin(state, enemy)
         _append_log(state, f"Вы читаете {scroll['name']}: молнии бьют по всем врагам на {damage} урона.")
     elif element == "ice":
-        target_damage = damage
-        mark_bonus = _hunter_mark_bonus(state, target)
-        if mark_bonus:
-            target_damage = max(1, int(round(target_damage * (1.0 + mark_bonus))))
-        exec_bonus = _executioner_damage_bonus(state, target)
-        if exec_bonus:
-            target_damage = max(1, int(round(target_damage * (1.0 + exec_bonus))))
+        target_damage = apply_target_bonuses(profile.spell, state, target, damage)
         target["hp"] -= target_damage
         _apply_stone_skin(state, target)
         _apply_freeze(target)
         _append_log(state, f"Вы читаете {scroll['name']}: {target['name']} получает {target_damage} урона и скован льдом.")
     else:
-        target_damage = damage
-        mark_bonus = _hunter_mark_bonus(state, target)
-        if mark_bonus:
-            target_damage = max(1, int(round(target_damage * (1.0 + mark_bonus))))
-        exec_bonus = _executioner_damage_bonus(state, target)
-        if exec_bonus:
-            target_damage = max(1, int(round(target_damage * (1.0 + exec_bonus))))
+        target_damage = apply_target_bonuses(profile.spell, state, target, damage)
         target["hp"] -= target_damage
         _apply_stone_skin(state, target)
         _apply_burn(target, target_damage)
@@ -1650,33 +1736,29 @@ def player_use_scroll(state: Dict, scroll_index: int) -> None:
         state["duel_turns_left"] = 0
         state["duel_target_idx"] = None
 
-    if (
-        _is_assassin(state)
-        and not state.get("assassin_echo_used")
-        and _assassin_echo_ratio(state) > 0
-    ):
+    if profile.echo_ratio > 0 and not state.get("assassin_echo_used"):
         alive_after = len(_alive_enemies(state["enemies"]))
         if alive_after < alive_before:
             state["assassin_echo_used"] = True
-            echo_damage = max(1, int(round(damage * _assassin_echo_ratio(state))))
+            echo_damage = max(1, int(round(damage * profile.echo_ratio)))
             echo_targets = [enemy for enemy in state["enemies"] if enemy.get("hp", 0) > 0]
             for enemy in echo_targets:
                 enemy["hp"] -= echo_damage
                 _apply_stone_skin(state, enemy)
             if echo_targets:
-                _append_log(state, f"Эхо убийства: {echo_damage} урона по {len(echo_targets)} врагам.")
+                _log_event(state, EVENT_ASSASSIN_ECHO, echo_damage, len(echo_targets))
     bleeding_before = [
         enemy
         for enemy in state.get("enemies", [])
         if enemy.get("hp", 0) > 0 and enemy.get("bleed_turns", 0) > 0
     ]
-    if _is_executioner(state) and bleeding_before:
+    if profile.bleed_heal and bleeding_before:
         player = state.get("player", {})
         for enemy in bleeding_before:
             if enemy.get("hp", 0) <= 0 and state.get("executioner_heal_count", 0) < 2:
                 state["executioner_heal_count"] = int(state.get("executioner_heal_count", 0)) + 1
                 player["hp"] = min(player.get("hp_max", 0), player.get("hp", 0) + 5)
-                _append_log(state, "Приговор: +5 HP за убийство кровоточащего врага.")
+                _log_event(state, EVENT_EXECUTIONER_HEAL)
 
     check_battle_end(state)
 
@@ -1790,11 +1872,11 @@ def enemy_phase(state: Dict) -> None:
         if enemy["bleed_turns"] > 0:
             enemy["hp"] -= enemy["bleed_damage"]
             enemy["bleed_turns"] -= 1
-            _append_log(state, f"{enemy['name']} теряет {enemy['bleed_damage']} HP от кровотечения.")
+            _log_event(state, EVENT_BLEED_TICK, enemy["name"], enemy["bleed_damage"])
         if enemy.get("burn_turns", 0) > 0:
             enemy["hp"] -= enemy.get("burn_damage", 0)
             enemy["burn_turns"] -= 1
-            _append_log(state, f"{enemy['name']} горит и теряет {enemy.get('burn_damage', 0)} HP.")
+            _log_event(state, EVENT_BURN_TICK, enemy["name"], enemy.get("burn_damage", 0))
 
     if state.get("hunter_trap_active"):
         target = _first_alive(state["enemies"])
@@ -1802,10 +1884,7 @@ def enemy_phase(state: Dict) -> None:
             trap_damage = max(1, int(round(target.get("max_hp", 0) * 0.5)))
             target["hp"] -= trap_damage
             _apply_stone_skin(state, target)
-            _append_log(
-                state,
-                f"Ловушка срабатывает: {target['name']} получает {trap_damage} урона.",
-            )
+            _log_event(state, EVENT_TRAP, target["name"], trap_damage)
         state["hunter_trap_active"] = False
 
     _tally_kills(state)
@@ -1820,16 +1899,19 @@ def enemy_phase(state: Dict) -> None:
     duel_target = _duel_target(state)
     duel_active = _duel_zone_active(state)
     if duel_active and duel_target and len(enemies) > 1:
-        _append_log(state, "Дуэльная зона: остальные враги не могут атаковать.")
+        _log_event(state, EVENT_DUEL_ZONE_BLOCK)
 
+    floor = state.get("floor")
+    damage_floor = state.get("floor", 1)
+    player_evasion = player["evasion"]
+    profile = ability_profile(state)
     for enemy in enemies:
         if duel_active and duel_target is not enemy:
             continue
         if enemy.get("skip_turns", 0) > 0:
             enemy["skip_turns"] -= 1
-            _append_log(state, f"{enemy['name']} скован льдом и пропускает ход.")
+            _log_event(state, EVENT_FROZEN_SKIP, enemy["name"])
             continue
-        floor = state.get("floor")
         guaranteed_every = _enemy_guaranteed_hit_every(enemy)
         if guaranteed_every > 0:
             counter = int(enemy.get("guaranteed_hit_count", 0)) + 1
@@ -1837,12 +1919,12 @@ def enemy_phase(state: Dict) -> None:
             if counter % guaranteed_every == 0:
                 hit = True
             else:
-                hit = random.random() < _enemy_base_hit_chance(enemy, player["evasion"], floor)
+                hit = run_rng().random() < _enemy_base_hit_chance(enemy, player_evasion, floor)
         else:
-            hit = random.random() < _enemy_base_hit_chance(enemy, player["evasion"], floor)
+            hit = run_rng().random() < _enemy_base_hit_chance(enemy, player_evasion, floor)
         if hit:
-            damage = _enemy_damage_to_player(enemy, player, state.get("floor", 1))
-            if _is_duelist(state) and not state.get("duelist_parry_used"):
+            damage = _enemy_damage_to_player(enemy, player, damage_floor)
+            if profile.parry and not state.get("duelist_parry_used"):
                 state["duelist_parry_used"] = True
                 reduction = _duelist_parry_reduction(state, enemy)
                 reduced_damage = max(0, int(round(damage * (1.0 - reduction))))
@@ -1852,28 +1934,25 @@ def enemy_phase(state: Dict) -> None:
                     counter = max(1, int(round(prevented * DUELIST_PARRY_COUNTER_RATIO)))
                     enemy["hp"] -= counter
                     _apply_stone_skin(state, enemy)
-                    _append_log(state, f"Парирование: {enemy['name']} получает {counter} урона.")
+                    _log_event(state, EVENT_PARRY, enemy["name"], counter)
             player["hp"] -= damage
             total_damage += damage
-            _append_log(state, f"{enemy['name']} бьет вас на {damage} урона.")
+            _log_event(state, EVENT_ENEMY_HIT, enemy["name"], damage)
             _maybe_trigger_rune_guard_retribution(state, damage)
         else:
-            _append_log(state, f"{enemy['name']} промахивается.")
+            _log_event(state, EVENT_ENEMY_MISS, enemy["name"])
         if player["hp"] <= 0:
-            if _is_berserk(state) and not state.get("berserk_second_wind_used"):
+            if profile.second_wind and not state.get("berserk_second_wind_used"):
                 state["berserk_second_wind_used"] = True
                 player["hp"] = max(1, int(player.get("hp_max", 1)))
-                _append_log(
-                    state,
-                    "Неистовая живучесть: смертельный удар пережит, HP полностью восстановлено.",
-                )
+                _log_event(state, EVENT_BERSERK_SECOND_WIND)
                 continue
             player["hp"] = 0
             state["phase"] = "dead"
             return
 
     if state["phase"] == "battle" and group_size > 1 and total_damage > 0:
-        _append_log(state, f"Суммарный урон от врагов: {total_damage}.")
+        _log_event(state, EVENT_GROUP_DAMAGE, total_damage)
 
 def check_battle_end(state: Dict) -> None:
     if state["phase"] == "dead":
@@ -1963,13 +2042,13 @@ def _build_chest_reward(
             for item in pool
             if not (item.get("type") == "upgrade" and item.get("id") == SECOND_CHANCE_AMULET_ID)
         ]
-        if random.random() < SECOND_CHANCE_CHEST_CHANCE:
+        if run_rng().random() < SECOND_CHANCE_CHEST_CHANCE:
             upgrade = copy.deepcopy(get_upgrade_by_id(SECOND_CHANCE_AMULET_ID))
             if upgrade:
                 return {"type": "upgrade", "item": upgrade}
         if not pool:
             return None
-    entry = copy.deepcopy(random.choice(pool))
+    entry = copy.deepcopy(run_rng().choice(pool))
     item_type = entry.get("type")
     item_id = entry.get("id")
     if item_type == "weapon":
@@ -2011,7 +2090,7 @@ def generate_rewards(
         ]
         if not available_pool:
             break
-        reward_type, item = random.choice(available_pool)
+        reward_type, item = run_rng().choice(available_pool)
         item_id = item["id"]
         if item_id in used_ids:
             continue
@@ -2032,7 +2111,7 @@ def generate_single_reward(
     pool = [("weapon", item) for item in _weapons_for_floor(floor)] + [
         ("upgrade", item) for item in upgrades
     ]
-    reward_type, item = random.choice(pool)
+    reward_type, item = run_rng().choice(pool)
     reward_item = copy.deepcopy(item)
     if reward_type == "weapon":
         scale_weapon_stats(reward_item, floor)
@@ -2109,7 +2188,7 @@ def apply_reward_item(state: Dict, reward: Dict) -> bool:
         if upgrade["type"] == "potion":
             potion = upgrade
             if _is_executioner(state) and potion.get("id") == "potion_strong":
-                potion = copy.deepcopy(get_upgrade_by_id("potion_medium")) or potion
+                potion = _potion_template("potion_medium") or potion
             added, dropped = _add_potion(player, potion, count=1)
             if added:
                 character_id = state.get("character_id")
@@ -2189,7 +2268,7 @@ def apply_event_choice(state: Dict, event_id: str) -> None:
     elif event_id == "treasure_chest":
         state["chests_opened"] = state.get("chests_opened", 0) + 1
         chance = _clamp(player["luck"], 0.05, 0.7)
-        if random.random() < chance:
+        if run_rng().random() < chance:
             reward = _build_chest_reward(
                 state["floor"] + 2,
                 player,
@@ -2225,7 +2304,7 @@ def apply_event_choice(state: Dict, event_id: str) -> None:
             noun = potion_noun_genitive_plural(state.get("character_id"))
             _append_log(state, f"Нет места для {noun} — находка сгорает.")
     elif event_id == "campfire":
-        bonus = 4 if _is_rune_guard(state) else random.randint(2, 3)
+        bonus = 4 if _is_rune_guard(state) else run_rng().randint(2, 3)
         player["hp_max"] += bonus
         player["hp"] += bonus
         _append_log(state, f"Костер укрепляет вас: <b>+{bonus}</b> к макс. HP.")
@@ -2368,20 +2447,47 @@ def advance_floor(state: Dict) -> None:
     if state.get("cursed_ap_ratio"):
         _append_log(state, "Проклятый этаж: ОД снижены до <b>3/4</b>.")
 
-def render_state(state: Dict) -> str:
-    player = state["player"]
-    weapon = player["weapon"]
-    enemies = _alive_enemies(state["enemies"])
-    effective_ap_max = _effective_ap_max(state)
-    tutorial_active = bool(state.get("tutorial"))
-    character = get_character(state.get("character_id")) if state.get("character_id") else None
+RENDER_SECTION_CACHE_SIZE = 512
+_RENDER_SECTIONS: Dict[str, Dict[Tuple, Tuple]] = {}
+STATUS_FLAG_KEYS = (
+    "assassin_echo_used",
+    "duel_turns_left",
+    "duelist_parry_used",
+    "duelist_blade_used",
+    "hunter_first_shot_used",
+    "hunter_kill_used",
+    "executioner_onslaught_used",
+    "executioner_heal_count",
+    "executioner_last_breath_turns",
+    "rune_guard_shield_active",
+    "rune_guard_throw_active",
+    "rune_guard_retribution_ready",
+    "ap_bonus",
+    "berserk_meat_turns",
+    "berserk_second_wind_used",
+    "cursed_ap_ratio",
+)
+
+
+def _cached_section(name: str, key: Tuple, build) -> Tuple:
+    cache = _RENDER_SECTIONS.setdefault(name, {})
+    section = cache.get(key)
+    if section is None:
+        section = build()
+        if len(cache) >= RENDER_SECTION_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[key] = section
+    return section
+
+
+def clear_render_cache() -> None:
+    _RENDER_SECTIONS.clear()
 
-    is_rune_guard = _is_rune_guard(state)
+
+def _build_stats_section(state: Dict, player: Dict, duel_active: bool) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    character = get_character(state.get("character_id")) if state.get("character_id") else None
     last_breath_active = _has_last_breath(state, player)
-    is_duelist = _is_duelist(state)
-    duel_active = _duelist_duel_active(state)
     assassin_shadow_active = _assassin_shadow_active(state, player)
-    desperate_charge_active = _is_desperate_charge(state, player)
     base_accuracy = player["accuracy"]
     accuracy_bonus = _desperate_charge_accuracy_bonus(state, player)
     accuracy_bonus += _duelist_duel_accuracy_bonus(state, duel_active)
@@ -2403,36 +2509,62 @@ def render_state(state: Dict) -> str:
     else:
         evasion_text = _percent(base_evasion)
 
-    lines = [
-        f"<b>Этаж:</b> {state['floor']}",
-    ]
+    head = [f"<b>Этаж:</b> {state['floor']}"]
     if character:
-        lines.append(f"<b>Герой:</b> {character['name']}")
-    lines.extend(
-        [
-            f"<b>HP:</b> {player['hp']}/{player['hp_max']} | <b>ОД:</b> {min(player['ap'], effective_ap_max)}/{effective_ap_max}",
-            f"<b>Лимит ОД:</b> {_ap_max_cap_for_floor(state['floor'])}",
-            (
-                f"<b>Точность:</b> {accuracy_display} | "
-                f"<b>Уклонение:</b> {evasion_text} | "
-                f"<b>Броня:</b> {int(round(player['armor']))} | "
-                f"<b>Удача:</b> {_percent(player.get('luck', 0.0))}"
-            ),
-            f"<b>Сила:</b> +{player.get('power', 0)} урона",
-        ]
+        head.append(f"<b>Герой:</b> {character['name']}")
+    tail = (
+        f"<b>Лимит ОД:</b> {_ap_max_cap_for_floor(state['floor'])}",
+        (
+            f"<b>Точность:</b> {accuracy_display} | "
+            f"<b>Уклонение:</b> {evasion_text} | "
+            f"<b>Броня:</b> {int(round(player['armor']))} | "
+            f"<b>Удача:</b> {_percent(player.get('luck', 0.0))}"
+        ),
+        f"<b>Сила:</b> +{player.get('power', 0)} урона",
     )
-    if tutorial_active:
-        step = int(state.get("tutorial_step", 1))
-        scene = state.get("tutorial_scene", TUTORIAL_SCENE_NAME)
-        prompt = tutorial_prompt(state)
-        header = [
-            "<b>Обучение</b>",
-            f"<b>Локация:</b> {scene}",
-        ]
-        if prompt:
-            header.append(f"<b>Шаг {step}/{TUTORIAL_TOTAL_STEPS}:</b> {prompt}")
-        header.append("")
-        lines = header + lines
+    return tuple(head), tail
+
+
+def _render_stats_lines(state: Dict, player: Dict, duel_active: bool) -> List[str]:
+    key = (
+        state["floor"],
+        state.get("character_id"),
+        _is_last_breath(player),
+        player["accuracy"],
+        player.get("evasion", 0.0),
+        player["armor"],
+        player.get("luck", 0.0),
+        player.get("power", 0),
+        duel_active,
+    )
+    head, tail = _cached_section("stats", key, lambda: _build_stats_section(state, player, duel_active))
+    effective_ap_max = _effective_ap_max(state)
+    return [
+        *head,
+        f"<b>HP:</b> {player['hp']}/{player['hp_max']} | <b>ОД:</b> {min(player['ap'], effective_ap_max)}/{effective_ap_max}",
+        *tail,
+    ]
+
+
+def _render_tutorial_header(state: Dict) -> List[str]:
+    step = int(state.get("tutorial_step", 1))
+    scene = state.get("tutorial_scene", TUTORIAL_SCENE_NAME)
+    prompt = tutorial_prompt(state)
+    header = [
+        "<b>Обучение</b>",
+        f"<b>Локация:</b> {scene}",
+    ]
+    if prompt:
+        header.append(f"<b>Шаг {step}/{TUTORIAL_TOTAL_STEPS}:</b> {prompt}")
+    header.append("")
+    return header
+
+
+def _build_status_notes(state: Dict, player: Dict, duel_active: bool) -> Tuple[str, ...]:
+    is_duelist = _is_duelist(state)
+    assassin_shadow_active = _assassin_shadow_active(state, player)
+    base_evasion = player.get("evasion", 0.0)
+    effective_evasion = _effective_evasion(base_evasion, state.get("floor"))
     status_notes = []
     if _has_resolve(state, player):
         status_notes.append("Решимость — урон +20%")
@@ -2460,17 +2592,14 @@ def render_state(state: Dict) -> str:
         status_notes.append("Выверенный выстрел — +10% точности")
     if _is_hunter(state) and not state.get("hunter_kill_used"):
         status_notes.append("Гон по следу — +1 ОД за первое убийство")
-    if _is_hunter(state) and any(enemy.get("hunter_mark") for enemy in state.get("enemies", [])):
+    if _is_hunter(state) and _any_hunter_mark(state):
         status_notes.append("Охотничья метка — активна")
     if _is_executioner(state):
         status_notes.append("Точность мясника — +20% к шансу кровотечения")
     if (
         _is_executioner(state)
         and not state.get("executioner_onslaught_used")
-        and any(
-            enemy.get("hp", 0) > 0 and enemy.get("bleed_turns", 0) > 0
-            for enemy in state.get("enemies", [])
-        )
+        and _any_bleeding_enemy(state)
     ):
         status_notes.append("Натиск — +1 ОД на следующую атаку")
     if _is_executioner(state):
@@ -2484,9 +2613,9 @@ def render_state(state: Dict) -> str:
     if rage_state:
         rage_name, rage_bonus = rage_state
         status_notes.append(f"{rage_name} — урон +{int(round(rage_bonus * 100))}%")
-    if is_rune_guard and desperate_charge_active:
+    if _is_rune_guard(state) and _is_desperate_charge(state, player):
         status_notes.append("Рывок Чести — 1-я атака 0 ОД, точность +25%")
-    if last_breath_active:
+    if _has_last_breath(state, player):
         status_notes.append("На последнем издыхании — точность 100%")
     if state.get("rune_guard_shield_active"):
         status_notes.append("Поднятые щиты — броня +2")
@@ -2506,45 +2635,87 @@ def render_state(state: Dict) -> str:
         status_notes.append("Проклятие — ОД 3/4")
     if effective_evasion != base_evasion:
         status_notes.append("Приглушение уклонения (50+ этаж)")
-    if status_notes:
-        lines.append(f"<b>Состояние:</b> <i>{' / '.join(status_notes)}</i>")
-    lines.extend([
+    return tuple(status_notes)
+
+
+def _any_hunter_mark(state: Dict) -> bool:
+    return any(enemy.get("hunter_mark") for enemy in state.get("enemies", []))
+
+
+def _any_bleeding_enemy(state: Dict) -> bool:
+    return any(
+        enemy.get("hp", 0) > 0 and enemy.get("bleed_turns", 0) > 0
+        for enemy in state.get("enemies", [])
+    )
+
+
+def _render_status_lines(state: Dict, player: Dict, duel_active: bool) -> List[str]:
+    character_id = state.get("character_id")
+    is_hunter = _is_hunter(state)
+    is_executioner = _is_executioner(state)
+    key = (
+        character_id,
+        state.get("floor"),
+        _is_full_hp(player),
+        _is_last_breath(player),
+        _berserk_rage_state(state, player),
+        player.get("evasion", 0.0),
+        bool(player.get("second_chance")),
+        duel_active,
+        is_hunter and _any_hunter_mark(state),
+        is_executioner and _any_bleeding_enemy(state),
+        *map(state.get, STATUS_FLAG_KEYS),
+    )
+    status_notes = _cached_section("status", key, lambda: _build_status_notes(state, player, duel_active))
+    if not status_notes:
+        return []
+    return [f"<b>Состояние:</b> <i>{' / '.join(status_notes)}</i>"]
+
+
+def _render_gear_lines(player: Dict) -> List[str]:
+    weapon = player["weapon"]
+    return [
         f"<b>Оружие:</b> <b>{weapon['name']}</b> (урон {weapon['min_dmg']}-{weapon['max_dmg']})",
-        f"<b>Зелий:</b> {len(player.get('potions', []))} | <b>Свитков:</b> {len(player.get('scrolls', []))}",
+        f"<b>Зелий:</b> {total_potions(player)} | <b>Свитков:</b> {len(player.get('scrolls', []))}",
         "",
-    ])
-
-    if state["phase"] in {"battle", "forfeit_confirm", "tutorial"}:
-        if enemies:
-            lines.append(f"<b>Враги ({len(enemies)}):</b>")
-            duel_target = _duel_target(state)
-            for enemy in enemies:
-                name = enemy["name"]
-                tags = []
-                if enemy.get("hunter_mark"):
-                    tags.append("метка")
-                if duel_target is enemy:
-                    tags.append("дуэль")
-                if tags:
-                    name = f"{name} ({', '.join(tags)})"
-                lines.append(f"- <b>{name}</b>: {enemy['hp']}/{enemy['max_hp']} HP")
-        else:
-            lines.append("<i>Враги отсутствуют.</i>")
-        info_lines = []
-        if state.get("show_info"):
-            info_lines = [
-                "",
-                *build_enemy_info_text(
-                    state.get("enemies", []),
-                    player,
-                    state.get("floor", 1),
-                    character_id=state.get("character_id"),
-                ).splitlines(),
-            ]
-        if state["phase"] == "forfeit_confirm":
-            lines.append("")
-            lines.append("<i>Подтвердите сдачу. Забег будет завершен.</i>")
-    elif state["phase"] == "reward":
+    ]
+
+
+def _render_enemy_lines(state: Dict, enemies: List[Dict]) -> List[str]:
+    if not enemies:
+        return ["<i>Враги отсутствуют.</i>"]
+    lines = [f"<b>Враги ({len(enemies)}):</b>"]
+    duel_target = _duel_target(state)
+    for enemy in enemies:
+        name = enemy["name"]
+        tags = []
+        if enemy.get("hunter_mark"):
+            tags.append("метка")
+        if duel_target is enemy:
+            tags.append("дуэль")
+        if tags:
+            name = f"{name} ({', '.join(tags)})"
+        lines.append(f"- <b>{name}</b>: {enemy['hp']}/{enemy['max_hp']} HP")
+    return lines
+
+
+def _render_enemy_info_lines(state: Dict, player: Dict) -> List[str]:
+    if not state.get("show_info"):
+        return []
+    return [
+        "",
+        *build_enemy_info_text(
+            state.get("enemies", []),
+            player,
+            state.get("floor", 1),
+            character_id=state.get("character_id"),
+        ).splitlines(),
+    ]
+
+
+def _render_phase_lines(state: Dict, player: Dict, tutorial_active: bool) -> List[str]:
+    lines: List[str] = []
+    if state["phase"] == "reward":
         if state.get("boss_defeated") and state.get("floor") == BOSS_FLOOR:
             lines.append("<b>Некромант повержен.</b> Его чары рассеялись над залом.")
             lines.append("Королевство вздыхает свободнее, но зелье вечной жизни все еще скрыто.")
@@ -2688,39 +2859,69 @@ def render_state(state: Dict) -> str:
             lines.append("<i>Испытания недоступны.</i>")
     elif state["phase"] == "dead":
         lines.append("<b>Вы погибли.</b>")
+    return lines
 
-    if state["phase"] in {"battle", "forfeit_confirm", "tutorial"} and enemies:
-        total_expected = 0.0
-        total_max = 0
-        player_evasion = player.get("evasion", 0.0)
-        floor = state.get("floor")
-        for enemy in enemies:
-            hit_damage = _enemy_damage_to_player(enemy, player, floor)
-            hit_chance = _enemy_expected_hit_chance(enemy, player_evasion, floor)
-            total_expected += hit_damage * hit_chance
-            total_max += hit_damage
-        lines.append("")
-        parry_multiplier = 1.0
-        if len(enemies) == 1 and _is_duelist(state) and not state.get("duelist_parry_used"):
-            reduction = _duelist_parry_reduction(state, enemies[0])
-            parry_multiplier = max(0.0, 1.0 - reduction)
-        single_max_display = max(1, int(round(total_max * parry_multiplier)))
-        if len(enemies) == 1:
-            lines.append(
-                f"<b>Сводка:</b> HP {player['hp']}/{player['hp_max']} | "
-                f"урон врага: {single_max_display}"
-            )
-        else:
-            expected_display = max(1, int(round(total_expected)))
-            lines.append(
-                f"<b>Сводка:</b> HP {player['hp']}/{player['hp_max']} | "
-                f"урон врагов (ожид./макс.): {expected_display}/{total_max}"
-            )
 
-    log_lines = []
-    if state.get("log"):
-        log_lines = ["", "<i>Последние события:</i>", *state["log"]]
-    if 'info_lines' in locals() and info_lines:
+def _render_summary_lines(state: Dict, player: Dict, enemies: List[Dict]) -> List[str]:
+    lines: List[str] = []
+    total_expected = 0.0
+    total_max = 0
+    player_evasion = player.get("evasion", 0.0)
+    floor = state.get("floor")
+    for enemy in enemies:
+        hit_damage = _enemy_damage_to_player(enemy, player, floor)
+        hit_chance = _enemy_expected_hit_chance(enemy, player_evasion, floor)
+        total_expected += hit_damage * hit_chance
+        total_max += hit_damage
+    lines.append("")
+    parry_multiplier = 1.0
+    if len(enemies) == 1 and _is_duelist(state) and not state.get("duelist_parry_used"):
+        reduction = _duelist_parry_reduction(state, enemies[0])
+        parry_multiplier = max(0.0, 1.0 - reduction)
+    single_max_display = max(1, int(round(total_max * parry_multiplier)))
+    if len(enemies) == 1:
+        lines.append(
+            f"<b>Сводка:</b> HP {player['hp']}/{player['hp_max']} | "
+            f"урон врага: {single_max_display}"
+        )
+    else:
+        expected_display = max(1, int(round(total_expected)))
+        lines.append(
+            f"<b>Сводка:</b> HP {player['hp']}/{player['hp_max']} | "
+            f"урон врагов (ожид./макс.): {expected_display}/{total_max}"
+        )
+    return lines
+
+
+def render_state(state: Dict) -> str:
+    player = state["player"]
+    enemies = _alive_enemies(state["enemies"])
+    duel_active = _duelist_duel_active(state)
+    battle_phase = state["phase"] in {"battle", "forfeit_confirm", "tutorial"}
+
+    lines = _render_stats_lines(state, player, duel_active)
+    if state.get("tutorial"):
+        lines = _render_tutorial_header(state) + lines
+    lines.extend(_render_status_lines(state, player, duel_active))
+    lines.extend(_render_gear_lines(player))
+
+    info_lines: List[str] = []
+    if battle_phase:
+        lines.extend(_render_enemy_lines(state, enemies))
+        info_lines = _render_enemy_info_lines(state, player)
+        if state["phase"] == "forfeit_confirm":
+            lines.append("")
+            lines.append("<i>Подтвердите сдачу. Забег будет завершен.</i>")
+    else:
+        lines.extend(_render_phase_lines(state, player, bool(state.get("tutorial"))))
+
+    if battle_phase and enemies:
+        lines.extend(_render_summary_lines(state, player, enemies))
+
+    log_lines = _log_lines(state)
+    if log_lines:
+        log_lines = ["", "<i>Последние события:</i>", *log_lines]
+    if info_lines:
         base_len = len("\n".join(lines))
         log_len = len("\n".join(log_lines)) if log_lines else 0
         allowed = MESSAGE_LIMIT - base_len - log_len
@@ -2731,6 +2932,7 @@ def render_state(state: Dict) -> str:
 
     return "\n".join(lines)
 
+
 def _format_reward_details(reward_type: str, item: Dict, show_splash: bool = True) -> str:
     if reward_type == "weapon":
         parts = [f"урон {item['min_dmg']}-{item['max_dmg']}"]
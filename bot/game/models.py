@@ -0,0 +1,204 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Tuple
+
+from .items import _potion_counts
+
+
+def _field_names(cls) -> Tuple[str, ...]:
+    return tuple(item.name for item in fields(cls) if item.name not in {"extra", "source_keys"})
+
+
+def _split(data: Dict, names: Tuple[str, ...]) -> Tuple[Dict, Dict]:
+    known = {}
+    extra = {}
+    for key, value in data.items():
+        if key in names:
+            known[key] = value
+        else:
+            extra[key] = value
+    return known, extra
+
+
+def _to_dict(model, names: Tuple[str, ...]) -> Dict:
+    # only the keys the source dict had, in its order; models built directly emit every field
+    keys = model.source_keys if model.source_keys is not None else names
+    data = {}
+    for key in keys:
+        if key in names:
+            data[key] = getattr(model, key)
+        elif key in model.extra:
+            data[key] = model.extra[key]
+    for key, value in model.extra.items():
+        data.setdefault(key, value)
+    return data
+
+
+@dataclass(slots=True)
+class Weapon:
+    id: str = ""
+    name: str = ""
+    min_dmg: int = 1
+    max_dmg: int = 1
+    accuracy_bonus: float = 0.0
+    splash_ratio: float = 0.0
+    bleed_chance: float = 0.0
+    bleed_damage: int = 0
+    armor_pierce: float = 0.0
+    level: int = 1
+    extra: Dict[str, Any] = field(default_factory=dict)
+    source_keys: Tuple[str, ...] | None = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Weapon":
+        known, extra = _split(data, WEAPON_FIELDS)
+        return cls(**known, extra=extra, source_keys=tuple(data))
+
+    def to_dict(self) -> Dict:
+        return _to_dict(self, WEAPON_FIELDS)
+
+
+@dataclass(slots=True)
+class Player:
+    hp: int = 30
+    hp_max: int = 30
+    ap: int = 3
+    ap_max: int = 3
+    armor: float = 0.0
+    accuracy: float = 0.7
+    evasion: float = 0.05
+    power: int = 1
+    luck: float = 0.2
+    second_chance: bool = False
+    weapon: Weapon = field(default_factory=Weapon)
+    potions: Dict[str, int] = field(default_factory=dict)
+    scrolls: List[Dict] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    source_keys: Tuple[str, ...] | None = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Player":
+        if "potions" in data and not isinstance(data["potions"], dict):
+            data = dict(data)
+            _potion_counts(data)
+        known, extra = _split(data, PLAYER_FIELDS)
+        weapon = known.get("weapon")
+        if isinstance(weapon, dict):
+            known["weapon"] = Weapon.from_dict(weapon)
+        return cls(**known, extra=extra, source_keys=tuple(data))
+
+    def to_dict(self) -> Dict:
+        data = _to_dict(self, PLAYER_FIELDS)
+        if isinstance(data.get("weapon"), Weapon):
+            data["weapon"] = self.weapon.to_dict()
+        return data
+
+
+@dataclass(slots=True)
+class Enemy:
+    id: str = ""
+    name: str = ""
+    hp: int = 0
+    max_hp: int = 0
+    attack: float = 0.0
+    armor: float = 0.0
+    armor_pierce: float = 0.0
+    armor_base: float = 0.0
+    accuracy: float = 0.0
+    evasion: float = 0.0
+    bleed_turns: int = 0
+    bleed_damage: int = 0
+    burn_turns: int = 0
+    burn_damage: int = 0
+    skip_turns: int = 0
+    counted_dead: bool = False
+    traits: List[str] = field(default_factory=list)
+    info: str = ""
+    danger: str = ""
+    min_floor: int = 1
+    max_floor: int = 999
+    extra: Dict[str, Any] = field(default_factory=dict)
+    source_keys: Tuple[str, ...] | None = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Enemy":
+        known, extra = _split(data, ENEMY_FIELDS)
+        return cls(**known, extra=extra, source_keys=tuple(data))
+
+    def to_dict(self) -> Dict:
+        return _to_dict(self, ENEMY_FIELDS)
+
+
+@dataclass(slots=True)
+class RunState:
+    floor: int = 1
+    phase: str = "battle"
+    character_id: str = ""
+    ap_bonus: int = 0
+    desperate_charge_used: bool = False
+    berserk_kill_used: bool = False
+    assassin_echo_used: bool = False
+    hunter_first_shot_used: bool = False
+    hunter_kill_used: bool = False
+    hunter_trap_used: bool = False
+    hunter_trap_active: bool = False
+    executioner_bleed_used: bool = False
+    executioner_onslaught_used: bool = False
+    executioner_heal_count: int = 0
+    duelist_blade_used: bool = False
+    duelist_parry_used: bool = False
+    rune_guard_shield_used: bool = False
+    rune_guard_throw_hits: int = 0
+    rune_guard_throw_active: bool = False
+    player: Player = field(default_factory=Player)
+    enemies: List[Enemy] = field(default_factory=list)
+    kills: Dict[str, int] = field(default_factory=dict)
+    kills_total: int | None = None
+    events: List[List] = field(default_factory=list)
+    event_pos: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+    source_keys: Tuple[str, ...] | None = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunState":
+        known, extra = _split(data, RUN_STATE_FIELDS)
+        player = known.get("player")
+        if isinstance(player, dict):
+            known["player"] = Player.from_dict(player)
+        if "enemies" in known:
+            known["enemies"] = [Enemy.from_dict(enemy) for enemy in known["enemies"]]
+        return cls(**known, extra=extra, source_keys=tuple(data))
+
+    def to_dict(self) -> Dict:
+        data = _to_dict(self, RUN_STATE_FIELDS)
+        if isinstance(data.get("player"), Player):
+            data["player"] = self.player.to_dict()
+        if "enemies" in data:
+            data["enemies"] = [enemy.to_dict() for enemy in self.enemies]
+        return data
+
+
+WEAPON_FIELDS = _field_names(Weapon)
+PLAYER_FIELDS = _field_names(Player)
+ENEMY_FIELDS = _field_names(Enemy)
+RUN_STATE_FIELDS = _field_names(RunState)
+
+TURN_FLAG_DEFAULTS: Dict[str, Any] = {
+    name: getattr(RunState(), name)
+    for name in (
+        "desperate_charge_used",
+        "berserk_kill_used",
+        "assassin_echo_used",
+        "hunter_first_shot_used",
+        "hunter_kill_used",
+        "hunter_trap_used",
+        "hunter_trap_active",
+        "executioner_bleed_used",
+        "executioner_onslaught_used",
+        "executioner_heal_count",
+        "duelist_blade_used",
+        "duelist_parry_used",
+        "rune_guard_shield_used",
+        "rune_guard_throw_hits",
+        "rune_guard_throw_active",
+    )
+}
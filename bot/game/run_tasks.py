@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-import copy
 import random
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
+from .combat_utils import total_kills
+
 TASK_XP = 10
 TASK_WINDOW_SECONDS = 30 * 60
+TASK_SET_CACHE_WINDOWS = 8
 
 TASK_POOL: List[Dict] = [
     {
@@ -127,13 +129,25 @@ TASK_POOL: List[Dict] = [
 ]
 
 
+_TASK_DEFINITIONS: Dict[str, Dict] = {}
+_TASK_SETS: Dict[int, Tuple[Dict, ...]] = {}
+
+
+def _task_definition(task: Dict) -> Dict:
+    definition = _TASK_DEFINITIONS.get(task["id"])
+    if definition is None:
+        definition = dict(task)
+        definition["xp"] = int(definition.get("xp", TASK_XP))
+        _TASK_DEFINITIONS[task["id"]] = definition
+    return definition
+
+
 def current_task_window(now: datetime | None = None) -> int:
     moment = now or datetime.now(timezone.utc)
     return int(moment.timestamp() // TASK_WINDOW_SECONDS)
 
 
-def build_run_tasks(window_id: int | None = None) -> Dict:
-    window = int(window_id) if window_id is not None else current_task_window()
+def _sample_task_set(window: int) -> Tuple[Dict, ...]:
     rng = random.Random(window)
     combat_pool = [task for task in TASK_POOL if task.get("category") == "combat"]
     milestone_pool = [task for task in TASK_POOL if task.get("category") == "milestone"]
@@ -146,17 +160,24 @@ def build_run_tasks(window_id: int | None = None) -> Dict:
             return None
         chosen = rng.choice(candidates)
         used.add(chosen.get("id"))
-        entry = copy.deepcopy(chosen)
-        entry["xp"] = int(entry.get("xp", TASK_XP))
-        return entry
+        return _task_definition(chosen)
 
     tasks.append(pick(combat_pool))
     tasks.append(pick(combat_pool) or pick(milestone_pool))
     tasks.append(pick(milestone_pool) or pick(combat_pool))
-    tasks = [task for task in tasks if task]
+    return tuple(task for task in tasks if task)
+
+
+def build_run_tasks(window_id: int | None = None) -> Dict:
+    window = int(window_id) if window_id is not None else current_task_window()
+    tasks = _TASK_SETS.get(window)
+    if tasks is None:
+        if len(_TASK_SETS) >= TASK_SET_CACHE_WINDOWS:
+            _TASK_SETS.pop(next(iter(_TASK_SETS)))
+        tasks = _TASK_SETS[window] = _sample_task_set(window)
     return {
         "window_id": window,
-        "tasks": tasks,
+        "tasks": list(tasks),
     }
 
 
@@ -165,7 +186,7 @@ def run_task_progress(state: Dict, task: Dict) -> Tuple[int, int, bool]:
     task_type = task.get("type")
     target = max(1, int(task.get("target", 1)))
     if task_type == "kill_any":
-        current = sum(int(value) for value in kills.values())
+        current = total_kills(state)
     elif task_type == "kill_enemy":
         current = int(kills.get(task.get("enemy_id"), 0))
     elif task_type == "reach_floor":
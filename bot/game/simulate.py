@@ -0,0 +1,94 @@
+import random
+from typing import Callable, Dict, List
+
+from .auto_battle import auto_battle_available
+from .items import count_potions, total_potions
+from .journal import apply_journaled_action, start_journaled_run
+from .logic import LATE_BOSS_NAME_FALLBACK, build_fallen_boss_intro
+
+SIM_LOW_HP_RATIO = 0.4
+SIM_MAX_STEPS_PER_FLOOR = 400
+
+
+def _potion_choice(state: Dict) -> str:
+    player = state["player"]
+    for kind in ("strong", "medium", "small"):
+        if kind == "strong" and state.get("character_id") == "executioner":
+            continue
+        if count_potions(player, f"potion_{kind}") > 0:
+            return f"potion:{kind}"
+    return "potion:back"
+
+
+def default_choice(state: Dict, rng: random.Random, allow_auto: bool = True) -> str | None:
+    phase = state.get("phase")
+    player = state["player"]
+    if phase == "battle":
+        low_hp = player["hp"] < player["hp_max"] * SIM_LOW_HP_RATIO
+        if low_hp and total_potions(player):
+            return "action:potion"
+        if allow_auto and auto_battle_available(state):
+            return "action:auto"
+        if player["ap"] > 0:
+            return "action:attack"
+        return "action:endturn"
+    if phase == "potion_select":
+        return _potion_choice(state)
+    if phase in {"inventory", "run_tasks", "forfeit_confirm"}:
+        return {"inventory": "inventory:back", "run_tasks": "run_tasks:back"}.get(phase, "forfeit:cancel")
+    if phase == "reward":
+        return f"reward:{rng.randrange(len(state.get('rewards') or [None]))}"
+    if phase == "event":
+        options = [option["id"] for option in state.get("event_options", [])]
+        if "holy_spring" in options and player["hp"] < player["hp_max"] * 0.6:
+            return "event:holy_spring"
+        return f"event:{rng.choice(options)}"
+    if phase == "boss_prep":
+        if state.get("boss_kind") == "fallen" and not state.get("boss_name"):
+            state["boss_name"] = LATE_BOSS_NAME_FALLBACK
+            state["boss_intro_lines"] = build_fallen_boss_intro(LATE_BOSS_NAME_FALLBACK)
+        return f"boss:{state['boss_artifacts'][0]['id']}"
+    if phase == "treasure":
+        return "treasure:equip"
+    if phase in {"dead", "second_chance_offer"}:
+        return None
+    return None
+
+
+def simulate_run(
+    character_id: str,
+    seed: int,
+    max_floor: int,
+    revive: bool = True,
+    on_step: Callable[[Dict, str], None] | None = None,
+    allow_auto: bool = True,
+) -> Dict:
+    rng = random.Random(seed)
+    state, _entry = start_journaled_run(character_id, seed=seed)
+    steps_on_floor = 0
+    floor = state["floor"]
+    while state["floor"] <= max_floor:
+        action = default_choice(state, rng, allow_auto=allow_auto)
+        if action is None:
+            if not revive or state.get("forfeit"):
+                break
+            action = "second_chance:buy"
+        apply_journaled_action(state, action)
+        if on_step:
+            on_step(state, action)
+        if state["floor"] != floor:
+            floor = state["floor"]
+            steps_on_floor = 0
+            continue
+        steps_on_floor += 1
+        if steps_on_floor > SIM_MAX_STEPS_PER_FLOOR:
+            break
+    return state
+
+
+def simulate_runs(character_ids: List[str], seeds: List[int], max_floor: int) -> List[Dict]:
+    return [
+        simulate_run(character_id, seed, max_floor)
+        for character_id in character_ids
+        for seed in seeds
+    ]
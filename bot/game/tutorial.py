@@ -6,9 +6,9 @@ from typing import Dict
 from .combat_utils import _first_alive
 from .characters import potion_use_label
 from .common import _append_log
-from .data import get_scroll_by_id, get_upgrade_by_id
+from .data import get_scroll_by_id
 from .effects import _apply_freeze
-from .items import _add_potion, _add_scroll
+from .items import _add_potion, _add_scroll, _potion_template, _take_potion
 
 TUTORIAL_TOTAL_STEPS = 12
 TUTORIAL_SCENE_NAME = "Плац у казармы"
@@ -76,7 +76,7 @@ def new_tutorial_state() -> Dict:
         "max_floor": 1,
         "level": 1,
     }
-    potion = copy.deepcopy(get_upgrade_by_id("potion_small"))
+    potion = _potion_template("potion_small")
     ice_scroll = copy.deepcopy(get_scroll_by_id("scroll_ice"))
     player = {
         "hp": 30,
@@ -89,7 +89,7 @@ def new_tutorial_state() -> Dict:
         "power": 0,
         "luck": 0.2,
         "weapon": weapon,
-        "potions": [],
+        "potions": {},
         "scrolls": [],
     }
     if potion:
@@ -136,6 +136,7 @@ def new_tutorial_state() -> Dict:
         "boss_artifacts": [],
         "show_info": False,
         "kills": {},
+        "kills_total": 0,
         "treasures_found": 0,
         "chests_opened": 0,
         "boss_defeated": False,
@@ -149,7 +150,8 @@ def new_tutorial_state() -> Dict:
         "rune_guard_throw_active": False,
         "rune_guard_throw_hits": 0,
         "cursed_ap_ratio": None,
-        "log": [],
+        "events": [],
+        "event_pos": 0,
     }
     _append_log(state, "<b>Плац у казармы.</b> Вы готовитесь к первым ударам.")
     _tutorial_log_step_prompt(state)
@@ -351,10 +353,10 @@ def _tutorial_end_turn(state: Dict) -> str:
 
 def _tutorial_use_potion(state: Dict) -> str:
     player = state["player"]
-    if not player.get("potions"):
+    potion = _take_potion(player)
+    if potion is None:
         _append_log(state, "<i>Зелья закончились.</i>")
         return "continue"
-    potion = player["potions"].pop()
     heal = int(potion.get("heal", 0))
     ap_restore = int(potion.get("ap_restore", 0))
     player["hp"] = min(int(player.get("hp_max", 0)), int(player.get("hp", 0)) + heal)
@@ -1,14 +1,19 @@
+import asyncio
 import logging
+import weakref
 
 import httpx
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, BufferedInputFile, Message, LabeledPrice
 
-from bot.config import is_image_sending_enabled
+from bot.config import is_auto_battle_enabled, is_batch_actions_enabled, is_image_sending_enabled
+from bot.game.actions import MAX_BATCH_ACTIONS
+from bot.game.auto_battle import auto_battle_available
 from bot.game.characters import potion_action_label
 from bot.game.logic import (
     count_potions,
+    total_potions,
     is_desperate_charge_available,
     render_state,
     tutorial_force_endturn,
@@ -35,6 +40,7 @@ from bot.handlers.helpers import is_admin_user
 from bot.utils.telegram import edit_or_send, safe_edit_text
 from bot.api_client import get_active_run as api_get_active_run
 from bot.api_client import run_action as api_run_action
+from bot.api_client import run_actions as api_run_actions
 from bot.api_client import get_story_chapter as api_get_story_chapter
 from bot.api_client import get_story_photo as api_get_story_photo
 
@@ -42,6 +48,22 @@ router = Router()
 logger = logging.getLogger(__name__)
 API_CONNECTION_ERROR_TEXT = "Проблема соединения с сервером. Попробуйте ещё раз."
 SEND_IMAGES = is_image_sending_enabled()
+AUTO_BATTLE_ENABLED = is_auto_battle_enabled()
+BATCH_ACTIONS_ENABLED = is_batch_actions_enabled()
+BATCHABLE_ACTIONS = {"action:attack", "action:endturn"}
+# taps that arrive while the user's previous request is in flight; sent once it returns (as one batch with
+# BOT_BATCH_ACTIONS)
+_QUEUED_ACTIONS: dict[int, list[tuple[CallbackQuery, str]]] = {}
+_USER_LOCKS: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _user_lock(user_id: int) -> asyncio.Lock:
+    lock = _USER_LOCKS.get(user_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _USER_LOCKS[user_id] = lock
+    return lock
+
 
 def _pop_tutorial_alert(state: dict) -> str | None:
     return state.pop("tutorial_alert", None)
@@ -114,12 +136,13 @@ async def _send_tutorial_intro(bot, chat_id: int) -> None:
 
 def _battle_markup(state: dict):
     player = state["player"]
-    has_potion = bool(player.get("potions"))
+    has_potion = total_potions(player) > 0
     can_attack = player["ap"] > 0 or is_desperate_charge_available(state)
     can_attack_all = player["ap"] > 1
     can_endturn = player["ap"] <= 0 or tutorial_force_endturn(state)
     show_info = bool(state.get("show_info"))
     potion_label = potion_action_label(state.get("character_id"))
+    can_auto = AUTO_BATTLE_ENABLED and auto_battle_available(state)
     return battle_kb(
         has_potion=has_potion,
         can_attack=can_attack,
@@ -127,6 +150,7 @@ def _battle_markup(state: dict):
         show_info=show_info,
         can_endturn=can_endturn,
         potion_label=potion_label,
+        can_auto=can_auto,
     )
 
 
@@ -153,16 +177,78 @@ async def _apply_api_action(callback: CallbackQuery, action: str) -> None:
     user = callback.from_user
     if user is None:
         return
+    async with _user_lock(user.id):
+        await _send_api_action(callback, action)
+
+
+async def _send_api_action(callback: CallbackQuery, action: str) -> None:
+    user = callback.from_user
     try:
-        response = await api_run_action(
-            user.id,
-            user.username,
-            action,
-        )
+        response = await api_run_action(user.id, user.username, action)
     except httpx.HTTPError:
         logger.warning("API action failed: %s", action, exc_info=True)
         await _answer_api_error(callback)
         return
+    await _handle_api_response(callback, response)
+
+
+def _batch_unsupported(exc: httpx.HTTPError) -> bool:
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in {404, 405}
+
+
+async def _send_api_batch(batch: list[tuple[CallbackQuery, str]]) -> None:
+    callback = batch[-1][0]
+    user = callback.from_user
+    actions = [action for _callback, action in batch]
+    try:
+        response = await api_run_actions(user.id, user.username, actions)
+    except httpx.HTTPError as exc:
+        if _batch_unsupported(exc):
+            # the API server has no POST /v1/runs/actions yet: send the taps one at a time
+            logger.warning("API batch endpoint unavailable, sending %s actions one by one", len(actions))
+            for queued_callback, action in batch:
+                await _send_api_action(queued_callback, action)
+            return
+        logger.warning("API actions failed: %s", actions, exc_info=True)
+        for earlier, _action in batch[:-1]:
+            await _answer_api_error(earlier)
+        await _answer_api_error(callback)
+        return
+    for earlier, _action in batch[:-1]:
+        await earlier.answer()
+    await _handle_api_response(callback, response)
+
+
+async def _queue_battle_action(callback: CallbackQuery, action: str) -> None:
+    user = callback.from_user
+    if user is None:
+        return
+    queued = _QUEUED_ACTIONS.get(user.id)
+    if queued is not None:
+        queued.append((callback, action))
+        return
+    queued = _QUEUED_ACTIONS[user.id] = []
+    try:
+        async with _user_lock(user.id):
+            await _send_api_action(callback, action)
+            while queued:
+                if not BATCH_ACTIONS_ENABLED:
+                    pending, pending_action = queued.pop(0)
+                    await _send_api_action(pending, pending_action)
+                    continue
+                batch = queued[:MAX_BATCH_ACTIONS]
+                del queued[:len(batch)]
+                if len(batch) == 1:
+                    await _send_api_action(*batch[0])
+                else:
+                    await _send_api_batch(batch)
+    finally:
+        # an unexpected error (e.g. from Telegram) leaves taps queued: answer them instead of dropping them
+        for pending, _action in _QUEUED_ACTIONS.pop(user.id, None) or []:
+            await _answer_api_error(pending)
+
+
+async def _handle_api_response(callback: CallbackQuery, response: dict) -> None:
     alert = response.get("alert")
     show_alert = bool(response.get("show_alert"))
     if alert:
@@ -404,6 +490,9 @@ async def reset_handler(message: Message) -> None:
 
 @router.callback_query(F.data.startswith("action:"))
 async def battle_action(callback: CallbackQuery) -> None:
+    if callback.data in BATCHABLE_ACTIONS:
+        await _queue_battle_action(callback, callback.data)
+        return
     await _apply_api_action(callback, callback.data)
 
 
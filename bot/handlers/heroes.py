@@ -10,6 +10,7 @@ from bot.api_client import get_hero_photo as api_get_hero_photo
 from bot.config import is_image_sending_enabled
 from bot.game.characters import CHARACTERS, get_character
 from bot.keyboards import hero_detail_kb, heroes_menu_kb
+from bot.pages import hero_card
 from bot.utils.telegram import edit_or_send, safe_edit_text
 
 router = Router()
@@ -76,7 +77,7 @@ async def show_heroes_menu(callback: CallbackQuery, user_id: int, source: str =
 async def _show_hero_detail(callback: CallbackQuery, user_id: int, hero_id: str, source: str) -> None:
     response = await api_get_hero_detail(user_id, hero_id)
     character = get_character(hero_id)
-    text = response.get("text", f"<b>{character.get('name', 'Герой')}</b>")
+    text = response.get("text") or hero_card(hero_id) or f"<b>{character.get('name', 'Герой')}</b>"
     markup = hero_detail_kb(
         hero_id=hero_id,
         is_unlocked=_as_bool(response.get("is_unlocked")),
@@ -3,11 +3,25 @@ from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
 from bot.api_client import get_rules as api_get_rules
-from bot.keyboards import rules_back_kb, rules_menu_kb
+from bot.keyboards import rules_back_kb, rules_menu_kb, rules_page_kb
+from bot.pages import HERO_PAGE_PREFIX, get_page, page_count
 from bot.utils.telegram import edit_or_send
 
 router = Router()
 
+
+async def _show_rules_page(callback: CallbackQuery, section: str, page: int = 0) -> None:
+    text = get_page(section, page)
+    await callback.answer()
+    if text is None:
+        response = await api_get_rules(section)
+        await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+        return
+    pages = page_count(section)
+    page = max(0, min(page, pages - 1))
+    await edit_or_send(callback, text, reply_markup=rules_page_kb(section, page, pages))
+
+
 @router.callback_query(F.data == "menu:rules")
 async def rules_callback(callback: CallbackQuery) -> None:
     response = await api_get_rules("menu")
@@ -44,44 +58,32 @@ async def rules_seasons_callback(callback: CallbackQuery) -> None:
 
 @router.callback_query(F.data == "rules:weapons")
 async def rules_weapons_callback(callback: CallbackQuery) -> None:
-    response = await api_get_rules("weapons")
-    await callback.answer()
-    await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+    await _show_rules_page(callback, "weapons")
 
 
 @router.callback_query(F.data == "rules:enemies")
 async def rules_enemies_callback(callback: CallbackQuery) -> None:
-    response = await api_get_rules("enemies")
-    await callback.answer()
-    await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+    await _show_rules_page(callback, "enemies")
 
 
 @router.callback_query(F.data == "rules:magic")
 async def rules_magic_callback(callback: CallbackQuery) -> None:
-    response = await api_get_rules("magic")
-    await callback.answer()
-    await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+    await _show_rules_page(callback, "magic")
 
 
 @router.callback_query(F.data == "rules:characters")
 async def rules_characters_callback(callback: CallbackQuery) -> None:
-    response = await api_get_rules("characters")
-    await callback.answer()
-    await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+    await _show_rules_page(callback, "characters")
 
 
 @router.callback_query(F.data == "rules:upgrades")
 async def rules_upgrades_callback(callback: CallbackQuery) -> None:
-    response = await api_get_rules("upgrades")
-    await callback.answer()
-    await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+    await _show_rules_page(callback, "upgrades")
 
 
 @router.callback_query(F.data == "rules:run_tasks")
 async def rules_run_tasks_callback(callback: CallbackQuery) -> None:
-    response = await api_get_rules("run_tasks")
-    await callback.answer()
-    await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+    await _show_rules_page(callback, "run_tasks")
 
 
 @router.callback_query(F.data == "rules:balance")
@@ -89,3 +91,17 @@ async def rules_balance_callback(callback: CallbackQuery) -> None:
     response = await api_get_rules("balance")
     await callback.answer()
     await edit_or_send(callback, response.get("text", ""), reply_markup=rules_back_kb())
+
+
+@router.callback_query(F.data.startswith("rules:page:"))
+async def rules_page_callback(callback: CallbackQuery) -> None:
+    parts = callback.data.split(":")
+    section = parts[2] if len(parts) > 2 else ""
+    try:
+        page = int(parts[3]) if len(parts) > 3 else 0
+    except ValueError:
+        page = 0
+    if not section or section.startswith(HERO_PAGE_PREFIX):
+        await callback.answer()
+        return
+    await _show_rules_page(callback, section, page)
@@ -5,7 +5,7 @@ from aiogram.types import Message
 from bot.api_client import start_state as api_start_state
 from bot.api_client import get_story_chapter as api_get_story_chapter
 from bot.game.characters import potion_action_label
-from bot.game.logic import render_state, tutorial_force_endturn, is_desperate_charge_available
+from bot.game.logic import render_state, total_potions, tutorial_force_endturn, is_desperate_charge_available
 from bot.handlers.helpers import is_admin_id
 from bot.keyboards import battle_kb, inventory_kb, main_menu_kb, tutorial_fail_kb
 from bot.texts import WELCOME_TEXT
@@ -30,7 +30,7 @@ def _tutorial_markup(state: dict):
         return inventory_kb(state.get("player", {}).get("scrolls", []))
     player = state.get("player", {})
     return battle_kb(
-        has_potion=bool(player.get("potions")),
+        has_potion=total_potions(player) > 0,
         can_attack=player.get("ap", 0) > 0 or is_desperate_charge_available(state),
         can_attack_all=player.get("ap", 0) > 1,
         show_info=bool(state.get("show_info")),
@@ -1,10 +1,61 @@
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Tuple
+
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from bot.game.characters import potion_button_label
 from bot.pricing import get_second_chance_price
 
+KEYBOARD_CACHE_SIZE = 256
+KEYBOARD_DATA_CACHE_SIZE = 128
+MARKUP_JSON_CACHE_SIZE = 512
+_KEYBOARD_CACHES: Dict[str, Callable] = {}
+_MARKUP_JSON: Dict[int, Tuple[InlineKeyboardMarkup, str]] = {}
+
+
+def _keyboard(maxsize: int = KEYBOARD_CACHE_SIZE):
+    def decorator(func):
+        cached = lru_cache(maxsize=maxsize)(func)
+        _KEYBOARD_CACHES[func.__name__] = cached
+        return cached
+
+    return decorator
+
+
+def keyboard_cache_stats() -> Dict[str, Tuple[int, int, int]]:
+    stats = {}
+    for name, cached in _KEYBOARD_CACHES.items():
+        info = cached.cache_info()
+        stats[name] = (info.hits, info.misses, info.currsize)
+    return stats
+
+
+def clear_keyboard_caches() -> None:
+    for cached in _KEYBOARD_CACHES.values():
+        cached.cache_clear()
+    _MARKUP_JSON.clear()
 
+
+def markup_json(markup: InlineKeyboardMarkup | None) -> str:
+    if markup is None:
+        return ""
+    cached = _MARKUP_JSON.get(id(markup))
+    if cached is not None and cached[0] is markup:
+        return cached[1]
+    data = markup.model_dump_json(exclude_none=True)
+    if len(_MARKUP_JSON) >= MARKUP_JSON_CACHE_SIZE:
+        _MARKUP_JSON.pop(next(iter(_MARKUP_JSON)))
+    _MARKUP_JSON[id(markup)] = (markup, data)
+    return data
+
+
+def _option_pairs(options: Iterable[Dict]) -> Tuple[Tuple[str, str], ...]:
+    return tuple((str(option["id"]), str(option["name"])) for option in options)
+
+
+
+@_keyboard()
 def main_menu_kb(has_active_run: bool = False, is_admin: bool = False) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     if has_active_run:
@@ -26,6 +77,7 @@ def main_menu_kb(has_active_run: bool = False, is_admin: bool = False) -> Inline
     return builder.as_markup()
 
 
+@_keyboard()
 def feedback_categories_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Баг", callback_data="feedback:category:bug")
@@ -37,6 +89,7 @@ def feedback_categories_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@_keyboard()
 def feedback_input_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Сменить категорию", callback_data="feedback:change_category")
@@ -44,12 +97,14 @@ def feedback_input_kb() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def broadcast_menu_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Начать приключение", callback_data="menu:broadcast")
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def battle_kb(
     has_potion: bool,
     can_attack: bool,
@@ -57,6 +112,7 @@ def battle_kb(
     show_info: bool,
     can_endturn: bool,
     potion_label: str = "Зелье",
+    can_auto: bool = False,
 ) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     if can_attack:
@@ -65,6 +121,8 @@ def battle_kb(
         builder.button(text="Атаковать на все ОД", callback_data="action:attack_all")
     if can_endturn:
         builder.button(text="Завершить ход", callback_data="action:endturn")
+    if can_auto:
+        builder.button(text="Автобой", callback_data="action:auto")
     if has_potion:
         builder.button(text=potion_label, callback_data="action:potion")
     builder.button(text="Инвентарь", callback_data="action:inventory")
@@ -77,6 +135,7 @@ def battle_kb(
 
 
 
+@_keyboard()
 def forfeit_confirm_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Да, сдаться", callback_data="forfeit:confirm")
@@ -84,6 +143,7 @@ def forfeit_confirm_kb() -> InlineKeyboardMarkup:
     builder.adjust(2)
     return builder.as_markup()
 
+@_keyboard()
 def tutorial_fail_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Повторить обучение", callback_data="tutorial:restart")
@@ -92,15 +152,20 @@ def tutorial_fail_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 def second_chance_kb() -> InlineKeyboardMarkup:
+    return _second_chance_kb(get_second_chance_price())
+
+@_keyboard()
+def _second_chance_kb(price: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(
-        text=f"Второй шанс за {get_second_chance_price()}⭐",
+        text=f"Второй шанс за {price}⭐",
         callback_data="second_chance:buy",
     )
     builder.button(text="Отказаться", callback_data="second_chance:decline")
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def second_chance_owned_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Использовать амулет", callback_data="second_chance:use")
@@ -109,6 +174,7 @@ def second_chance_owned_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@_keyboard()
 def potion_kb(
     small_count: int,
     medium_count: int,
@@ -136,7 +202,6 @@ def inventory_kb(
     rune_guard_throw_ready: bool = False,
     hunter_trap_ready: bool = False,
 ) -> InlineKeyboardMarkup:
-    builder = InlineKeyboardBuilder()
     grouped = {}
     order = []
     for scroll in scrolls:
@@ -150,11 +215,31 @@ def inventory_kb(
             }
             order.append(scroll_id)
         grouped[scroll_id]["count"] += 1
-    for scroll_id in order:
-        entry = grouped[scroll_id]
-        label = entry["name"]
-        if entry["count"] > 1:
-            label = f"{label} x{entry['count']}"
+    groups = tuple(
+        (scroll_id, grouped[scroll_id]["name"], grouped[scroll_id]["count"])
+        for scroll_id in order
+    )
+    return _inventory_kb(
+        groups,
+        duel_zone_charges,
+        rune_guard_shield_ready,
+        rune_guard_throw_ready,
+        hunter_trap_ready,
+    )
+
+@_keyboard(KEYBOARD_DATA_CACHE_SIZE)
+def _inventory_kb(
+    groups: Tuple[Tuple[str, str, int], ...],
+    duel_zone_charges: int | None,
+    rune_guard_shield_ready: bool,
+    rune_guard_throw_ready: bool,
+    hunter_trap_ready: bool,
+) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    for scroll_id, name, count in groups:
+        label = name
+        if count > 1:
+            label = f"{label} x{count}"
         builder.button(text=label, callback_data=f"inventory:use_id:{scroll_id}")
     if duel_zone_charges is not None:
         label = "Дуэльная зона"
@@ -171,12 +256,14 @@ def inventory_kb(
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def run_tasks_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Назад", callback_data="run_tasks:back")
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def reward_kb(reward_count: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     for idx in range(reward_count):
@@ -184,6 +271,7 @@ def reward_kb(reward_count: int) -> InlineKeyboardMarkup:
     builder.adjust(reward_count)
     return builder.as_markup()
 
+@_keyboard()
 def treasure_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Экипировать", callback_data="treasure:equip")
@@ -192,12 +280,17 @@ def treasure_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 def boss_artifact_kb(options: list) -> InlineKeyboardMarkup:
+    return _boss_artifact_kb(_option_pairs(options))
+
+@_keyboard(KEYBOARD_DATA_CACHE_SIZE)
+def _boss_artifact_kb(options: Tuple[Tuple[str, str], ...]) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    for option in options:
-        builder.button(text=option["name"], callback_data=f"boss:{option['id']}")
+    for option_id, name in options:
+        builder.button(text=name, callback_data=f"boss:{option_id}")
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def admin_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Обновить", callback_data="menu:admin:refresh")
@@ -208,6 +301,7 @@ def admin_kb() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def admin_crash_confirm_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Отправить", callback_data="menu:admin:crash:confirm")
@@ -216,6 +310,7 @@ def admin_crash_confirm_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@_keyboard()
 def admin_end_season_confirm_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Завершить сезон", callback_data="menu:admin:season_end:confirm")
@@ -224,6 +319,7 @@ def admin_end_season_confirm_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@_keyboard()
 def admin_end_season_remind_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Отправить напоминание", callback_data="menu:admin:season_end:remind")
@@ -231,6 +327,7 @@ def admin_end_season_remind_kb() -> InlineKeyboardMarkup:
     builder.adjust(2)
     return builder.as_markup()
 
+@_keyboard()
 def leaderboard_kb(page: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="<-", callback_data=f"menu:leaderboard:page:{page - 1}")
@@ -239,6 +336,7 @@ def leaderboard_kb(page: int) -> InlineKeyboardMarkup:
     builder.adjust(3)
     return builder.as_markup()
 
+@_keyboard()
 def story_nav_kb(chapter: int, max_chapter: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     if chapter > 1:
@@ -250,16 +348,19 @@ def story_nav_kb(chapter: int, max_chapter: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 def character_select_kb(characters: list) -> InlineKeyboardMarkup:
+    heroes = tuple((character.get("id", ""), character.get("name", "Герой")) for character in characters)
+    return _character_select_kb(heroes)
+
+@_keyboard(KEYBOARD_DATA_CACHE_SIZE)
+def _character_select_kb(heroes: Tuple[Tuple[str, str], ...]) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    for character in characters:
-        builder.button(
-            text=character.get("name", "Герой"),
-            callback_data=f"hero:select:{character.get('id', '')}",
-        )
+    for hero_id, name in heroes:
+        builder.button(text=name, callback_data=f"hero:select:{hero_id}")
     builder.button(text="Меню", callback_data="menu:main")
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def rules_menu_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="О наградах", callback_data="rules:badges")
@@ -275,12 +376,31 @@ def rules_menu_kb() -> InlineKeyboardMarkup:
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def rules_back_kb() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Назад", callback_data="rules:menu")
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
+def rules_page_kb(section: str, page: int, pages: int) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    nav = 0
+    if page > 0:
+        builder.button(text="<-", callback_data=f"rules:page:{section}:{page - 1}")
+        nav += 1
+    if page < pages - 1:
+        builder.button(text="->", callback_data=f"rules:page:{section}:{page + 1}")
+        nav += 1
+    builder.button(text="Назад", callback_data="rules:menu")
+    if nav:
+        builder.adjust(nav, 1)
+    else:
+        builder.adjust(1)
+    return builder.as_markup()
+
+@_keyboard()
 def profile_kb(can_unlock: bool = False) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="Уровни за ⭐", callback_data="profile:stars")
@@ -291,11 +411,17 @@ def profile_kb(can_unlock: bool = False) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 def heroes_menu_kb(characters: list, unlocked_ids: set, source: str = "menu") -> InlineKeyboardMarkup:
+    heroes = tuple(
+        (character.get("id", ""), character.get("name", "Герой"), character.get("id", "") in unlocked_ids)
+        for character in characters
+    )
+    return _heroes_menu_kb(heroes, source)
+
+@_keyboard(KEYBOARD_DATA_CACHE_SIZE)
+def _heroes_menu_kb(heroes: Tuple[Tuple[str, str, bool], ...], source: str) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    for character in characters:
-        hero_id = character.get("id", "")
-        name = character.get("name", "Герой")
-        label = name if hero_id in unlocked_ids else f"{name} (закрыт)"
+    for hero_id, name, unlocked in heroes:
+        label = name if unlocked else f"{name} (закрыт)"
         builder.button(text=label, callback_data=f"hero:info:{hero_id}:{source}")
     if source == "profile":
         builder.button(text="Назад", callback_data="menu:profile")
@@ -303,6 +429,7 @@ def heroes_menu_kb(characters: list, unlocked_ids: set, source: str = "menu") ->
     builder.adjust(1)
     return builder.as_markup()
 
+@_keyboard()
 def hero_detail_kb(
     hero_id: str,
     is_unlocked: bool,
@@ -328,8 +455,12 @@ def hero_detail_kb(
     return builder.as_markup()
 
 def event_kb(options: list) -> InlineKeyboardMarkup:
+    return _event_kb(_option_pairs(options))
+
+@_keyboard(KEYBOARD_DATA_CACHE_SIZE)
+def _event_kb(options: Tuple[Tuple[str, str], ...]) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    for option in options:
-        builder.button(text=option["name"], callback_data=f"event:{option['id']}")
+    for option_id, name in options:
+        builder.button(text=name, callback_data=f"event:{option_id}")
     builder.adjust(1)
     return builder.as_markup()
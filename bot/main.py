@@ -26,6 +26,9 @@ from bot.handlers import (
     stars_router,
     story_router,
 )
+from bot.game.balance import enemy_forecast_line
+from bot.game.logic import register_enemy_forecast
+from bot.pages import load_page_store
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +51,8 @@ async def main() -> None:
         dispatcher.include_router(profile_router)
         dispatcher.include_router(stars_router)
         dispatcher.include_router(story_router)
+        register_enemy_forecast(enemy_forecast_line)
+        await load_page_store()
         logger.info("Starting bot polling")
         await dispatcher.start_polling(bot)
     except Exception:
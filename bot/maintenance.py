@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_CHUNK_ROWS = max(1, int(os.getenv("MAINTENANCE_CHUNK_ROWS", "5000")))
+CHECKPOINT_PREFIX = "maintenance:"
+
+Key = Tuple[Any, ...]
+Connect = Callable[[], Awaitable[asyncpg.Connection]]
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    # select_sql is streamed through a server-side cursor and must be ordered by the key: $1..$k take the
+    # checkpoint (k = len(start)), later placeholders take params. transform turns a chunk of source rows into
+    # stage rows, which are copied into a temp table and applied with one set-based apply_sql ({stage}).
+    # With on_applied, apply_sql must return one row per applied source row, and each chunk's rows are passed to it.
+    name: str
+    select_sql: str
+    start: Key
+    key: Callable[[asyncpg.Record], Key]
+    transform: Callable[[List[asyncpg.Record]], List[Tuple[Any, ...]]]
+    stage_columns: Sequence[Tuple[str, str]]
+    apply_sql: str
+    params: Tuple[Any, ...] = ()
+    on_applied: Optional[Callable[[List[asyncpg.Record]], None]] = None
+
+
+@dataclass
+class JobResult:
+    name: str
+    read: int = 0
+    staged: int = 0
+    applied: int = 0
+    chunks: int = 0
+    resumed: bool = False
+    elapsed: float = 0.0
+
+
+async def load_checkpoint(conn: asyncpg.Connection, name: str) -> Optional[Key]:
+    value = await conn.fetchval("SELECT value FROM settings WHERE key = $1", CHECKPOINT_PREFIX + name)
+    return tuple(json.loads(value)) if value else None
+
+
+async def _save_checkpoint(conn: asyncpg.Connection, name: str, key: Key) -> None:
+    await conn.execute(
+        "INSERT INTO settings (key, value) VALUES ($1, $2) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+        CHECKPOINT_PREFIX + name,
+        json.dumps(list(key)),
+    )
+
+
+async def _clear_checkpoint(conn: asyncpg.Connection, name: str) -> None:
+    await conn.execute("DELETE FROM settings WHERE key = $1", CHECKPOINT_PREFIX + name)
+
+
+def _status_rows(status: str) -> int:
+    try:
+        return int(status.rsplit(" ", 1)[-1])
+    except (AttributeError, ValueError):
+        return 0
+
+
+async def _chunks(cursor, job: BatchJob, chunk_rows: int) -> AsyncIterator[List[asyncpg.Record]]:
+    pending: List[asyncpg.Record] = []
+    while True:
+        rows = await cursor.fetch(chunk_rows)
+        if not rows:
+            if pending:
+                yield pending
+            return
+        pending.extend(rows)
+        if len(pending) < chunk_rows:
+            continue
+        # rows sharing a key stay in one chunk, so a checkpoint never lands in the middle of a key
+        last = job.key(pending[-1])
+        cut = len(pending) - 1
+        while cut > 0 and job.key(pending[cut - 1]) == last:
+            cut -= 1
+        if cut == 0:
+            continue
+        yield pending[:cut]
+        pending = pending[cut:]
+
+
+@asynccontextmanager
+async def _connection(pool: Optional[asyncpg.Pool], connect: Optional[Connect]) -> AsyncIterator[asyncpg.Connection]:
+    if connect is None:
+        async with pool.acquire() as conn:
+            yield conn
+        return
+    conn = await connect()
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+async def run_job(
+    pool: Optional[asyncpg.Pool],
+    job: BatchJob,
+    chunk_rows: int = MAINTENANCE_CHUNK_ROWS,
+    dry_run: bool = False,
+    connect: Optional[Connect] = None,
+) -> JobResult:
+    # connect opens the reader and writer as dedicated connections instead of taking two from pool, for callers
+    # that already hold a pool connection (init_db) and would otherwise wait on a small pool forever
+    if not job.name.isidentifier():
+        raise ValueError(f"Maintenance job name must be an identifier: {job.name!r}")
+    result = JobResult(job.name)
+    started = time.perf_counter()
+    stage = f"maintenance_{job.name}"
+    columns = [name for name, _type in job.stage_columns]
+    apply_sql = job.apply_sql.format(stage=stage)
+    async with _connection(pool, connect) as reader, _connection(pool, connect) as writer:
+        start = job.start
+        if not dry_run:
+            checkpoint = await load_checkpoint(writer, job.name)
+            if checkpoint is not None:
+                start, result.resumed = checkpoint, True
+            definition = ", ".join(f"{name} {sql_type}" for name, sql_type in job.stage_columns)
+            await writer.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} ({definition}) ON COMMIT DELETE ROWS")
+        async with reader.transaction(isolation="repeatable_read", readonly=True):
+            cursor = await reader.cursor(job.select_sql, *start, *job.params)
+            async for chunk in _chunks(cursor, job, chunk_rows):
+                records = job.transform(chunk)
+                result.read += len(chunk)
+                result.staged += len(records)
+                result.chunks += 1
+                if dry_run:
+                    continue
+                async with writer.transaction():
+                    if records:
+                        await writer.copy_records_to_table(stage, records=records, columns=columns)
+                        if job.on_applied is None:
+                            result.applied += _status_rows(await writer.execute(apply_sql))
+                        else:
+                            applied = await writer.fetch(apply_sql)
+                            job.on_applied(applied)
+                            result.applied += len(applied)
+                    await _save_checkpoint(writer, job.name, job.key(chunk[-1]))
+                logger.info("%s: chunk %s, %s rows read, %s applied", job.name, result.chunks, result.read,
+                            result.applied)
+        if not dry_run:
+            await _clear_checkpoint(writer, job.name)
+            await writer.execute(f"DROP TABLE IF EXISTS {stage}")
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def run_jobs(
+    pool: asyncpg.Pool,
+    jobs: Sequence[BatchJob],
+    parallel: int = 1,
+    chunk_rows: int = MAINTENANCE_CHUNK_ROWS,
+    dry_run: bool = False,
+) -> List[JobResult]:
+    # each running job holds two pool connections (cursor reader and chunk writer)
+    semaphore = asyncio.Semaphore(max(1, parallel))
+
+    async def run(job: BatchJob) -> JobResult:
+        async with semaphore:
+            return await run_job(pool, job, chunk_rows, dry_run)
+
+    return list(await asyncio.gather(*(run(job) for job in jobs)))
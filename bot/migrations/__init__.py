@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import importlib
+import pkgutil
+from typing import Any, Awaitable, Callable, List, Tuple
+
+# Each module mNNNN_<name>.py defines `async def migrate(conn)`; NNNN is its schema version. It runs in one
+# transaction unless the module sets ATOMIC = False (long data jobs that commit in chunks themselves).
+# Applied migrations are never edited: schema changes go into a new module with the next number.
+Migration = Tuple[int, str, Callable[[Any], Awaitable[None]], bool]
+
+
+def load_migrations() -> List[Migration]:
+    migrations: List[Migration] = []
+    for module in pkgutil.iter_modules(__path__):
+        prefix, _, name = module.name.partition("_")
+        if not (prefix[:1] == "m" and prefix[1:].isdigit() and name):
+            continue
+        loaded = importlib.import_module(f"{__name__}.{module.name}")
+        migrations.append((int(prefix[1:]), name, loaded.migrate, getattr(loaded, "ATOMIC", True)))
+    migrations.sort(key=lambda item: item[0])
+    versions = [item[0] for item in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate schema migration versions: {versions}")
+    return migrations
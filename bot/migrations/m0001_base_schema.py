@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from bot import db
+
+# Tables as of the first versioned schema; the column upgrades bring databases created by older builds up to it.
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id BIGSERIAL PRIMARY KEY,
+        telegram_id BIGINT UNIQUE NOT NULL,
+        username TEXT,
+        max_floor INTEGER DEFAULT 0,
+        xp INTEGER DEFAULT 0,
+        tutorial_done INTEGER DEFAULT 0,
+        unlocked_heroes_json JSONB DEFAULT '["wanderer"]',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        id BIGSERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ended_at TIMESTAMP,
+        max_floor INTEGER DEFAULT 0,
+        is_active INTEGER DEFAULT 1,
+        is_tutorial INTEGER DEFAULT 0,
+        state_json JSONB,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id BIGINT PRIMARY KEY,
+        total_runs INTEGER DEFAULT 0,
+        deaths INTEGER DEFAULT 0,
+        deaths_by_floor JSONB DEFAULT '{}',
+        kills_json JSONB DEFAULT '{}',
+        hero_runs_json JSONB DEFAULT '{}',
+        treasures_found INTEGER DEFAULT 0,
+        chests_opened INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_broadcasts (
+        user_id BIGINT NOT NULL,
+        broadcast_key TEXT NOT NULL,
+        sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, broadcast_key),
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS seasons (
+        id BIGSERIAL PRIMARY KEY,
+        season_key TEXT UNIQUE NOT NULL,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ended_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_season_stats (
+        user_id BIGINT NOT NULL,
+        season_id BIGINT NOT NULL,
+        max_floor INTEGER DEFAULT 0,
+        max_floor_character TEXT DEFAULT 'wanderer',
+        total_runs INTEGER DEFAULT 0,
+        deaths INTEGER DEFAULT 0,
+        deaths_by_floor JSONB DEFAULT '{}',
+        kills_json JSONB DEFAULT '{}',
+        treasures_found INTEGER DEFAULT 0,
+        chests_opened INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, season_id),
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        FOREIGN KEY(season_id) REFERENCES seasons(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_badges (
+        user_id BIGINT NOT NULL,
+        badge_id TEXT NOT NULL,
+        count INTEGER DEFAULT 1,
+        last_awarded_season TEXT,
+        last_awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, badge_id),
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS star_purchases (
+        id BIGSERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        telegram_payment_charge_id TEXT UNIQUE NOT NULL,
+        provider_payment_charge_id TEXT,
+        levels INTEGER NOT NULL,
+        stars INTEGER NOT NULL,
+        xp_added INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS star_actions (
+        id BIGSERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        telegram_payment_charge_id TEXT UNIQUE NOT NULL,
+        provider_payment_charge_id TEXT,
+        action TEXT NOT NULL,
+        stars INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS season_history (
+        season_id BIGINT PRIMARY KEY,
+        season_number INTEGER NOT NULL,
+        season_key TEXT NOT NULL,
+        processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        winners_json JSONB DEFAULT '{}',
+        summary_json JSONB DEFAULT '{}',
+        FOREIGN KEY(season_id) REFERENCES seasons(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS run_actions (
+        run_id BIGINT NOT NULL,
+        seq INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        rng INTEGER NOT NULL,
+        elapsed_us INTEGER DEFAULT 0,
+        inputs_json JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, seq),
+        FOREIGN KEY(run_id) REFERENCES runs(id)
+    )
+    """,
+]
+COLUMNS = [
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS xp INTEGER DEFAULT 0",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS tutorial_done INTEGER DEFAULT 0",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS unlocked_heroes_json JSONB DEFAULT '[\"wanderer\"]'",
+    "ALTER TABLE runs ADD COLUMN IF NOT EXISTS is_tutorial INTEGER DEFAULT 0",
+    "ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS hero_runs_json JSONB DEFAULT '{}'",
+    "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS xp_gained INTEGER DEFAULT 0",
+    "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS deaths INTEGER DEFAULT 0",
+    "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS deaths_by_floor JSONB DEFAULT '{}'",
+    "ALTER TABLE user_season_stats ADD COLUMN IF NOT EXISTS max_floor_character TEXT DEFAULT 'wanderer'",
+]
+
+
+async def migrate(conn: db._PgConn) -> None:
+    for statement in TABLES + COLUMNS:
+        await db._execute(conn, statement)
+    await db._execute(
+        conn,
+        "UPDATE users SET unlocked_heroes_json = '[\"wanderer\"]' "
+        "WHERE unlocked_heroes_json IS NULL OR unlocked_heroes_json::text IN ('', '[]')",
+    )
+    await db._execute(
+        conn,
+        "UPDATE user_season_stats SET max_floor_character = 'wanderer' "
+        "WHERE max_floor_character IS NULL OR max_floor_character = ''",
+    )
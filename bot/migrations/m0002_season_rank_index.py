@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from bot import db
+
+
+async def migrate(conn: db._PgConn) -> None:
+    await db._execute(
+        conn,
+        "CREATE INDEX IF NOT EXISTS user_season_stats_rank_idx "
+        "ON user_season_stats (season_id, max_floor DESC, user_id) INCLUDE (max_floor_character)",
+    )
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from bot import db
+
+# each table is rewritten in its own transaction, so only one table at a time is locked (ACCESS EXCLUSIVE);
+# an interrupted run resumes with the tables whose columns are still TEXT
+ATOMIC = False
+
+# table, column, default (also used for empty or unreadable values)
+JSON_COLUMNS: List[Tuple[str, str, Optional[str]]] = [
+    ("users", "unlocked_heroes_json", '["wanderer"]'),
+    ("runs", "state_json", None),
+    ("user_stats", "deaths_by_floor", "{}"),
+    ("user_stats", "kills_json", "{}"),
+    ("user_stats", "hero_runs_json", "{}"),
+    ("user_season_stats", "deaths_by_floor", "{}"),
+    ("user_season_stats", "kills_json", "{}"),
+    ("season_history", "winners_json", "{}"),
+    ("season_history", "summary_json", "{}"),
+    ("run_actions", "inputs_json", None),
+]
+TO_JSONB_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION pg_temp.bot_to_jsonb(raw TEXT, fallback JSONB) RETURNS JSONB AS $$
+DECLARE
+    value JSONB;
+BEGIN
+    IF raw IS NULL OR btrim(raw) = '' THEN
+        RETURN fallback;
+    END IF;
+    value := raw::jsonb;
+    FOR attempt IN 1..10 LOOP
+        EXIT WHEN jsonb_typeof(value) <> 'string';
+        value := (value #>> '{}')::jsonb;
+    END LOOP;
+    IF jsonb_typeof(value) <> jsonb_typeof(fallback) THEN
+        RETURN fallback;
+    END IF;
+    RETURN value;
+EXCEPTION WHEN others THEN
+    RETURN fallback;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _fallback(default: Optional[str]) -> str:
+    return f"'{default}'::jsonb" if default is not None else "NULL"
+
+
+async def migrate(conn: db._PgConn) -> None:
+    cursor = await db._execute(
+        conn,
+        "SELECT table_name, column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND data_type = 'text'",
+    )
+    text_columns = {(table, column) for table, column in await cursor.fetchall()}
+    pending = [item for item in JSON_COLUMNS if (item[0], item[1]) in text_columns]
+    if not pending:
+        return
+    await db._execute(conn, TO_JSONB_FUNCTION_SQL)
+    by_table: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+    for table, column, default in pending:
+        by_table.setdefault(table, []).append((column, default))
+    for table, columns in by_table.items():
+        # one ALTER TABLE per table: all its columns are converted in a single rewrite
+        drop_defaults = ", ".join(f"ALTER COLUMN {column} DROP DEFAULT" for column, _default in columns)
+        convert = ", ".join(
+            f"ALTER COLUMN {column} TYPE JSONB USING pg_temp.bot_to_jsonb({column}, {_fallback(default)})"
+            for column, default in columns
+        )
+        set_defaults = ", ".join(
+            f"ALTER COLUMN {column} SET DEFAULT '{default}'" for column, default in columns if default is not None
+        )
+        async with conn.transaction():
+            await db._execute(conn, f"ALTER TABLE {table} {drop_defaults}")
+            await db._execute(conn, f"ALTER TABLE {table} {convert}")
+            if set_defaults:
+                await db._execute(conn, f"ALTER TABLE {table} {set_defaults}")
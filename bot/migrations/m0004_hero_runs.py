@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from bot import db
+
+
+async def migrate(conn: db._PgConn) -> None:
+    await db._execute(
+        conn,
+        "UPDATE user_stats SET hero_runs_json = jsonb_build_object('wanderer', COALESCE(total_runs, 0)) "
+        "WHERE hero_runs_json IS NULL OR hero_runs_json = '{}'::jsonb",
+    )
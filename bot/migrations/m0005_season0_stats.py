@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Tuple
+
+from bot import db, maintenance
+
+SEASON0_KEY = "2025-12"
+SEASON0_START = "2025-12-20"
+SEASON0_START_DATE = date.fromisoformat(SEASON0_START)
+SEASON0_START_TS = datetime.combine(SEASON0_START_DATE, time.min)
+SEASON0_BACKFILL_SETTING = "season0_backfill_done"
+# the backfill commits chunk by chunk through bot.maintenance, so the runner does not wrap it in a transaction
+ATOMIC = False
+FINISHED_RUNS_SQL = (
+    "SELECT user_id, state_json, max_floor FROM runs "
+    "WHERE user_id > $1 AND is_active = 0 AND is_tutorial = 0 AND started_at >= $2 ORDER BY user_id"
+)
+STAGE_COLUMNS = [
+    ("user_id", "BIGINT"),
+    ("season_id", "BIGINT"),
+    ("max_floor", "INTEGER"),
+    ("max_floor_character", "TEXT"),
+    ("total_runs", "INTEGER"),
+    ("kills_json", "TEXT"),
+    ("treasures_found", "INTEGER"),
+    ("chests_opened", "INTEGER"),
+    ("xp_gained", "INTEGER"),
+]
+APPLY_SQL = (
+    "INSERT INTO user_season_stats (user_id, season_id, max_floor, max_floor_character, total_runs, kills_json, "
+    "treasures_found, chests_opened, xp_gained) "
+    "SELECT user_id, season_id, max_floor, max_floor_character, total_runs, kills_json::jsonb, "
+    "treasures_found, chests_opened, xp_gained FROM {stage} "
+    "ON CONFLICT (user_id, season_id) DO UPDATE SET max_floor = EXCLUDED.max_floor, "
+    "max_floor_character = EXCLUDED.max_floor_character, total_runs = EXCLUDED.total_runs, "
+    "kills_json = EXCLUDED.kills_json, treasures_found = EXCLUDED.treasures_found, "
+    "chests_opened = EXCLUDED.chests_opened, xp_gained = EXCLUDED.xp_gained, updated_at = CURRENT_TIMESTAMP"
+)
+
+
+async def migrate(conn: db._PgConn) -> None:
+    cursor = await db._execute(conn, "SELECT value FROM settings WHERE key = ?", (SEASON0_BACKFILL_SETTING,))
+    row = await cursor.fetchone()
+    if row and row[0] == "1":
+        return
+
+    cursor = await db._execute(conn, "SELECT id FROM seasons WHERE season_key = ?", (SEASON0_KEY,))
+    row = await cursor.fetchone()
+    if row:
+        season_id = int(row[0])
+    else:
+        cursor = await db._execute(
+            conn,
+            "INSERT INTO seasons (season_key, started_at) VALUES (?, ?) RETURNING id",
+            (SEASON0_KEY, SEASON0_START_TS),
+        )
+        row = await cursor.fetchone()
+        season_id = int(row[0]) if row else 0
+
+    job = maintenance.BatchJob(
+        name="season0_stats",
+        select_sql=FINISHED_RUNS_SQL,
+        start=(0,),
+        key=lambda row: (row["user_id"],),
+        transform=lambda rows: _season_rows(rows, season_id),
+        stage_columns=STAGE_COLUMNS,
+        apply_sql=APPLY_SQL,
+        params=(SEASON0_START_TS,),
+    )
+    # init_db keeps a pool connection for the migration lock, so the job opens its own two connections
+    await maintenance.run_job(None, job, connect=db._open_connection)
+    await db._execute(
+        conn,
+        "INSERT INTO settings (key, value) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+        (SEASON0_BACKFILL_SETTING, "1"),
+    )
+
+
+def _season_rows(rows: List[Any], season_id: int) -> List[Tuple[Any, ...]]:
+    # a chunk holds every finished run of its users, so each user gets complete totals
+    aggregates: Dict[int, Dict[str, Any]] = {}
+    for user_id, state_json, max_floor in rows:
+        agg = aggregates.setdefault(
+            user_id,
+            {
+                "max_floor": 0,
+                "max_floor_character": "wanderer",
+                "total_runs": 0,
+                "kills": {},
+                "treasures_found": 0,
+                "chests_opened": 0,
+                "xp_gained": 0,
+            },
+        )
+        agg["total_runs"] += 1
+        state = db._json_dict(state_json)
+        floor_value = int(state.get("floor", 0) or max_floor or 0)
+        if floor_value > agg["max_floor"]:
+            agg["max_floor"] = floor_value
+            agg["max_floor_character"] = state.get("character_id") or "wanderer"
+        agg["treasures_found"] += int(state.get("treasures_found", 0))
+        agg["chests_opened"] += int(state.get("chests_opened", 0))
+        treasure_xp = int(state.get("treasure_xp", 0))
+        if treasure_xp <= 0:
+            treasure_xp = int(state.get("treasures_found", 0)) * db.TREASURE_REWARD_XP
+        agg["xp_gained"] += max(0, floor_value) + treasure_xp
+        for enemy_id, count in (state.get("kills", {}) or {}).items():
+            agg["kills"][enemy_id] = agg["kills"].get(enemy_id, 0) + int(count)
+    return [
+        (
+            user_id,
+            season_id,
+            data["max_floor"],
+            data["max_floor_character"],
+            data["total_runs"],
+            json.dumps(data["kills"], ensure_ascii=False),
+            data["treasures_found"],
+            data["chests_opened"],
+            data["xp_gained"],
+        )
+        for user_id, data in aggregates.items()
+    ]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from bot import db
+
+# copies of the bot.db values at the time of this migration, so later edits there cannot change it
+ALL_TIME_SEASON_ID = 0
+JSON_OBJECT_ENTRIES_SQL = (
+    "jsonb_each(CASE WHEN jsonb_typeof({column}) = 'object' THEN {column} ELSE '{{}}'::jsonb END) AS entry"
+)
+JSON_ENTRY_COUNT_SQL = "trunc((entry.value #>> '{}')::numeric)::bigint"
+NORMALIZED_STATS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS user_kills (
+        user_id BIGINT NOT NULL,
+        season_id BIGINT NOT NULL,
+        enemy_id TEXT NOT NULL,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, season_id, enemy_id),
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_deaths (
+        user_id BIGINT NOT NULL,
+        season_id BIGINT NOT NULL,
+        floor INTEGER NOT NULL,
+        deaths BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, season_id, floor),
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS user_kills_season_idx ON user_kills (season_id, user_id) INCLUDE (count)",
+    "CREATE INDEX IF NOT EXISTS user_deaths_season_idx ON user_deaths (season_id, floor) INCLUDE (deaths)",
+    """
+    CREATE OR REPLACE VIEW user_kill_totals AS
+    SELECT user_id, season_id, SUM(count)::bigint AS kills
+    FROM user_kills GROUP BY user_id, season_id
+    """,
+    """
+    CREATE OR REPLACE VIEW enemy_kill_totals AS
+    SELECT season_id, enemy_id, SUM(count)::bigint AS kills
+    FROM user_kills GROUP BY season_id, enemy_id
+    """,
+    """
+    CREATE OR REPLACE VIEW season_death_totals AS
+    SELECT season_id, SUM(deaths)::bigint AS deaths, SUM(floor::bigint * deaths)::bigint AS floor_sum
+    FROM user_deaths GROUP BY season_id
+    """,
+]
+
+
+async def migrate(conn: db._PgConn) -> None:
+    for statement in NORMALIZED_STATS_DDL:
+        await db._execute(conn, statement)
+    kills = JSON_OBJECT_ENTRIES_SQL.format(column="kills_json")
+    deaths = JSON_OBJECT_ENTRIES_SQL.format(column="deaths_by_floor")
+    for table, season_column in (("user_stats", str(ALL_TIME_SEASON_ID)), ("user_season_stats", "season_id")):
+        await db._execute(
+            conn,
+            "INSERT INTO user_kills (user_id, season_id, enemy_id, count) "
+            f"SELECT user_id, {season_column}, entry.key, SUM({JSON_ENTRY_COUNT_SQL}) "
+            f"FROM {table} CROSS JOIN LATERAL {kills} "
+            "WHERE jsonb_typeof(entry.value) = 'number' "
+            f"GROUP BY user_id, {season_column}, entry.key HAVING SUM({JSON_ENTRY_COUNT_SQL}) > 0 "
+            "ON CONFLICT DO NOTHING",
+        )
+        await db._execute(
+            conn,
+            "INSERT INTO user_deaths (user_id, season_id, floor, deaths) "
+            f"SELECT user_id, {season_column}, entry.key::integer, SUM({JSON_ENTRY_COUNT_SQL}) "
+            f"FROM {table} CROSS JOIN LATERAL {deaths} "
+            "WHERE jsonb_typeof(entry.value) = 'number' AND entry.key ~ '^[0-9]{1,9}$' "
+            f"GROUP BY user_id, {season_column}, entry.key::integer HAVING SUM({JSON_ENTRY_COUNT_SQL}) > 0 "
+            "ON CONFLICT DO NOTHING",
+        )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from bot import db
+
+# copies of the bot.db values at the time of this migration, so later edits there cannot change it
+ALL_TIME_SEASON_ID = 0
+ADMIN_TOP_KILLERS = 10
+ADMIN_RUN_HOURS_KEPT = 48
+ADMIN_COUNTERS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS admin_counters (
+        key TEXT NOT NULL,
+        shard SMALLINT NOT NULL,
+        value BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (key, shard)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS admin_run_hours (
+        hour TIMESTAMP NOT NULL,
+        shard SMALLINT NOT NULL,
+        runs BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (hour, shard)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS admin_run_users (
+        hour TIMESTAMP NOT NULL,
+        user_id BIGINT NOT NULL,
+        PRIMARY KEY (hour, user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS admin_top_killers (
+        user_id BIGINT PRIMARY KEY,
+        kills BIGINT NOT NULL
+    )
+    """,
+]
+
+
+ADMIN_RUN_HOURS_SINCE_SQL = (
+    f"date_trunc('hour', CURRENT_TIMESTAMP - INTERVAL '{ADMIN_RUN_HOURS_KEPT} hours')::timestamp"
+)
+ADMIN_COUNTERS_FILL = [
+    ("DELETE FROM admin_counters", ()),
+    (
+        "INSERT INTO admin_counters (key, shard, value) "
+        "SELECT 'total_users', 0, COUNT(*) FROM users "
+        "UNION ALL SELECT 'total_runs', 0, COUNT(*) FROM runs WHERE is_tutorial = 0 "
+        "UNION ALL SELECT 'active_runs', 0, COUNT(*) FROM runs WHERE is_active = 1 AND is_tutorial = 0 "
+        "UNION ALL SELECT 'total_deaths', 0, COALESCE(SUM(deaths), 0) FROM user_stats "
+        "UNION ALL SELECT 'total_treasures', 0, COALESCE(SUM(treasures_found), 0) FROM user_stats "
+        "UNION ALL SELECT 'total_chests', 0, COALESCE(SUM(chests_opened), 0) FROM user_stats "
+        "UNION ALL SELECT 'max_floor', 0, COALESCE(MAX(max_floor), 0) FROM users "
+        "UNION ALL SELECT 'death_floor_sum', 0, COALESCE(SUM(floor::bigint * deaths), 0) "
+        "FROM user_deaths WHERE season_id = ? AND floor >= 0 "
+        "UNION ALL SELECT 'death_floor_count', 0, COALESCE(SUM(deaths), 0) "
+        "FROM user_deaths WHERE season_id = ? AND floor >= 0",
+        (ALL_TIME_SEASON_ID, ALL_TIME_SEASON_ID),
+    ),
+    ("DELETE FROM admin_run_hours", ()),
+    (
+        "INSERT INTO admin_run_hours (hour, shard, runs) "
+        "SELECT date_trunc('hour', started_at), 0, COUNT(*) FROM runs "
+        f"WHERE is_tutorial = 0 AND started_at >= {ADMIN_RUN_HOURS_SINCE_SQL} GROUP BY 1",
+        (),
+    ),
+    ("DELETE FROM admin_run_users", ()),
+    (
+        "INSERT INTO admin_run_users (hour, user_id) "
+        "SELECT DISTINCT date_trunc('hour', started_at), user_id FROM runs "
+        f"WHERE is_tutorial = 0 AND started_at >= {ADMIN_RUN_HOURS_SINCE_SQL}",
+        (),
+    ),
+    ("DELETE FROM admin_top_killers", ()),
+    (
+        "INSERT INTO admin_top_killers (user_id, kills) "
+        "SELECT user_id, SUM(count)::bigint AS kills FROM user_kills WHERE season_id = ? "
+        "GROUP BY user_id HAVING SUM(count) > 0 ORDER BY kills DESC, user_id ASC LIMIT ?",
+        (ALL_TIME_SEASON_ID, ADMIN_TOP_KILLERS),
+    ),
+]
+
+
+async def migrate(conn: db._PgConn) -> None:
+    for statement in ADMIN_COUNTERS_DDL:
+        await db._execute(conn, statement)
+    for statement, params in ADMIN_COUNTERS_FILL:
+        await db._execute(conn, statement, params)
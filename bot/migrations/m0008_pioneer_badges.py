@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from bot import db
+
+
+async def migrate(conn: db._PgConn) -> None:
+    await db._execute(
+        conn,
+        "INSERT INTO user_badges (user_id, badge_id, count, last_awarded_season) "
+        "SELECT id, ?, 1, NULL FROM users WHERE created_at::date < ?::date "
+        "ON CONFLICT DO NOTHING",
+        (db.PIONEER_BADGE_ID, db.PIONEER_BADGE_CUTOFF_DATE),
+    )
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import logging
+import re
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
+
+import httpx
+
+from bot.api_client import get_rules
+from bot.game.characters import CHARACTERS
+from bot.game.common import INFO_TRUNCATED_LINE, MESSAGE_LIMIT, _trim_lines_to_limit
+from bot.game.data import ENEMIES, SCROLLS, UPGRADES, WEAPONS
+from bot.game.logic import _floor_range_label, _format_reward_details
+
+logger = logging.getLogger(__name__)
+
+PAGE_FOOTER_RESERVE = 32
+HERO_PAGE_PREFIX = "hero:"
+# sections whose text is served from the store; the ones without a local catalog come from the API once
+RULES_SECTIONS = ("weapons", "enemies", "magic", "characters", "upgrades", "run_tasks")
+_HTML_TOKEN_RE = re.compile(r"<[^>]*>|&#?\w+;|[^<&]+|[<&]")
+_HTML_TAG_NAME_RE = re.compile(r"</?\s*([a-zA-Z0-9-]+)")
+
+_STORE: Mapping[str, Tuple[str, ...]] = MappingProxyType({})
+
+
+def _floors(item: Dict) -> str:
+    return _floor_range_label(int(item.get("min_floor", 1)), int(item.get("max_floor", 999)))
+
+
+def _weapon_lines() -> List[str]:
+    return [
+        f"- <b>{item['name']}</b> {_format_reward_details('weapon', item)} Этажи: <i>{_floors(item)}</i>."
+        for item in WEAPONS
+    ]
+
+
+def _enemy_lines() -> List[str]:
+    lines = []
+    for enemy in ENEMIES:
+        info = str(enemy.get("info", "")).strip()
+        info_text = f"<i>{info}</i> " if info else ""
+        lines.append(
+            f"- <b>{enemy['name']}</b>: {info_text}"
+            f"Опасность: <b>{enemy.get('danger', 'неизвестна')}</b>. Этажи: <i>{_floors(enemy)}</i>."
+        )
+    return lines
+
+
+def _magic_lines() -> List[str]:
+    return [f"- <b>{scroll['name']}</b> {_format_reward_details('scroll', scroll)}".rstrip() for scroll in SCROLLS]
+
+
+def _upgrade_lines() -> List[str]:
+    return [
+        f"- <b>{item['name']}</b> {_format_reward_details('upgrade', item)} Этажи: <i>{_floors(item)}</i>."
+        for item in UPGRADES
+    ]
+
+
+def _hero_card(character: Dict) -> List[str]:
+    return [f"<b>{character['name']}</b>", *(f"- {line}" for line in character.get("description", []))]
+
+
+def _split_html_line(line: str, limit: int) -> List[str]:
+    # cuts only between tags/entities/characters; tags open at a cut are closed and reopened on the next piece
+    pieces: List[str] = []
+    open_tags: List[Tuple[str, str]] = []
+    current = ""
+    fresh = True
+
+    def closing() -> str:
+        return "".join(f"</{name}>" for name, _tag in reversed(open_tags))
+
+    def add(token: str, reserve: int = 0) -> None:
+        nonlocal current, fresh
+        if not fresh and len(current) + len(token) + reserve + len(closing()) > limit:
+            pieces.append(current + closing())
+            current = "".join(tag for _name, tag in open_tags)
+        current += token
+        fresh = False
+
+    for token in _HTML_TOKEN_RE.findall(line):
+        if token.startswith("<") and len(token) > 1:
+            match = _HTML_TAG_NAME_RE.match(token)
+            name = match.group(1).lower() if match else ""
+            if token.startswith("</"):
+                add(token)
+                for idx in range(len(open_tags) - 1, -1, -1):
+                    if open_tags[idx][0] == name:
+                        del open_tags[idx]
+                        break
+            elif name and not token.endswith("/>"):
+                add(token, len(name) + 3)
+                open_tags.append((name, token))
+            else:
+                add(token)
+        elif token.startswith("&") and len(token) > 1:
+            add(token)
+        else:
+            for char in token:
+                add(char)
+    if current:
+        pieces.append(current + closing())
+    return pieces
+
+
+def _paginate(title: str, lines: List[str], limit: int = MESSAGE_LIMIT) -> Tuple[str, ...]:
+    body_limit = limit - len(title) - PAGE_FOOTER_RESERVE
+    chunks: List[List[str]] = []
+    remaining = lines
+    while remaining:
+        chunk = _trim_lines_to_limit(remaining, body_limit)
+        taken = len(chunk)
+        if taken and chunk[-1] is INFO_TRUNCATED_LINE and remaining[taken - 1] is not INFO_TRUNCATED_LINE:
+            taken -= 1
+        if taken <= 0:
+            remaining = [*_split_html_line(remaining[0], body_limit), *remaining[1:]]
+            continue
+        chunks.append(remaining[:taken])
+        remaining = remaining[taken:]
+    if not chunks:
+        return ()
+    total = len(chunks)
+    pages = []
+    for idx, chunk in enumerate(chunks, start=1):
+        while chunk and not chunk[0]:
+            chunk = chunk[1:]
+        page = [title, *chunk] if title else list(chunk)
+        if total > 1:
+            page.append(f"<i>Страница {idx}/{total}</i>")
+        pages.append("\n".join(page))
+    return tuple(pages)
+
+
+def build_page_store() -> Dict[str, Tuple[str, ...]]:
+    sections = {
+        "weapons": ("<b>Оружие</b>", _weapon_lines),
+        "enemies": ("<b>Противники</b>", _enemy_lines),
+        "magic": ("<b>Магия</b>", _magic_lines),
+        "upgrades": ("<b>Улучшения</b>", _upgrade_lines),
+    }
+    store: Dict[str, Tuple[str, ...]] = {}
+    for section, (title, build_lines) in sections.items():
+        lines = build_lines()
+        if lines:
+            store[section] = _paginate(title, lines)
+    for hero_id, character in CHARACTERS.items():
+        store[f"{HERO_PAGE_PREFIX}{hero_id}"] = _paginate("", _hero_card(character))
+    return store
+
+
+async def load_page_store() -> int:
+    global _STORE
+    store = build_page_store()
+    for section in RULES_SECTIONS:
+        if section in store:
+            continue
+        try:
+            response = await get_rules(section)
+        except httpx.HTTPError:
+            logger.warning("Rules section %s not cached, it will be fetched on demand", section, exc_info=True)
+            continue
+        text = response.get("text") or ""
+        if text:
+            store[section] = _paginate("", text.split("\n"))
+    _STORE = MappingProxyType(store)
+    total = sum(len(pages) for pages in _STORE.values())
+    logger.info("Pre-rendered %s pages for %s sections", total, len(_STORE))
+    return total
+
+
+def page_count(section: str) -> int:
+    return len(_STORE.get(section, ()))
+
+
+def get_page(section: str, page: int = 0) -> str | None:
+    pages = _STORE.get(section)
+    if not pages:
+        return None
+    return pages[max(0, min(page, len(pages) - 1))]
+
+
+def hero_card(hero_id: str) -> str | None:
+    return get_page(f"{HERO_PAGE_PREFIX}{hero_id}")
@@ -66,6 +66,12 @@ MONTH_NAMES = {
 }
 
 
+def season_kills(item: dict) -> int:
+    if "kills_total" in item:
+        return int(item["kills_total"] or 0)
+    return sum((item.get("kills") or {}).values())
+
+
 def xp_to_level(xp: int) -> Tuple[int, int, int]:
     level = 1
     remaining = max(0, int(xp))
@@ -222,6 +228,17 @@ async def record_run_progress(user_id: int, state: Dict, died: bool | None = Non
         await db.add_user_xp(user_id, total_xp)
 
 
+async def finalize_run(user_id: int, run_id: int, state: Dict, died: bool = False) -> None:
+    floor = int(state.get("floor", 0))
+    async with db.session():
+        # finish_run locks the run row, so a retried or duplicate finalization sees it finished and stops here
+        if not await db.finish_run(run_id, floor):
+            return
+        await db.update_user_max_floor(user_id, floor)
+        await db.record_run_stats(user_id, state, died)
+        await record_run_progress(user_id, state, died=died)
+
+
 async def award_season_badges(season_id: int, season_key: str) -> None:
     rows = await db.get_season_stats_rows(season_id)
     if not rows:
@@ -240,7 +257,7 @@ async def award_season_badges(season_id: int, season_key: str) -> None:
         return int(item.get("treasures_found", 0))
 
     def by_kills(item: dict) -> int:
-        return sum((item.get("kills") or {}).values())
+        return season_kills(item)
 
     ranked = sorted(rows, key=lambda item: (-by_max_floor(item), item["user_id"]))
     top10 = ranked[:10]
@@ -278,7 +295,7 @@ def compute_season_winners(rows: List[Dict[str, Any]]) -> Dict[str, List[int]]:
         return int(item.get("treasures_found", 0))
 
     def by_kills(item: dict) -> int:
-        return sum((item.get("kills") or {}).values())
+        return season_kills(item)
 
     ranked = sorted(rows, key=lambda item: (-by_max_floor(item), item["user_id"]))
     if ranked:
@@ -10,8 +10,19 @@ from aiogram.client.bot import Bot
 from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
+from bot.keyboards import markup_json
+
 logger = logging.getLogger(__name__)
 _RATE_LIMIT_UNTIL: dict[int, float] = {}
+LAST_EDIT_CACHE_SIZE = 2048
+_LAST_EDITS: dict[tuple[int, int], tuple[str, str]] = {}
+
+
+def _remember_edit(key: tuple[int, int], payload: tuple[str, str]) -> None:
+    _LAST_EDITS.pop(key, None)
+    if len(_LAST_EDITS) >= LAST_EDIT_CACHE_SIZE:
+        _LAST_EDITS.pop(next(iter(_LAST_EDITS)))
+    _LAST_EDITS[key] = payload
 
 
 async def safe_edit_text(
@@ -19,11 +30,16 @@ async def safe_edit_text(
     text: str,
     reply_markup: Optional[InlineKeyboardMarkup] = None,
 ) -> None:
+    key = (message.chat.id, message.message_id)
+    payload = (text, markup_json(reply_markup))
+    if _LAST_EDITS.get(key) == payload:
+        return
     try:
         await message.edit_text(text, reply_markup=reply_markup)
     except TelegramBadRequest as exc:
         if "message is not modified" not in str(exc):
             raise
+    _remember_edit(key, payload)
 
 
 async def _notify_retry_delay(callback: CallbackQuery | None, retry_after: float) -> None:
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+from bot.game.balance import MAX_REPORT_FLOOR, TTK_HORIZON, floor_table
+from bot.game.characters import CHARACTERS, DEFAULT_CHARACTER_ID
+from bot.game.data import ENEMIES, WEAPONS
+from bot.game.logic import new_run_state
+
+PLAYER_OVERRIDES = {
+    "power": int,
+    "ap_max": int,
+    "armor": float,
+    "hp_max": int,
+    "evasion": float,
+    "accuracy": float,
+}
+
+
+def _parse_floors(value: str, step: int) -> list[int]:
+    if "-" in value:
+        low, high = (int(part) for part in value.split("-", 1))
+        floors = set(range(low, high + 1, step))
+        floors.update({low, high})
+        return sorted(floors)
+    return sorted({int(part) for part in value.split(",") if part.strip()})
+
+
+def _build_player(args: argparse.Namespace) -> dict:
+    player = new_run_state(args.hero)["player"]
+    for name, cast in PLAYER_OVERRIDES.items():
+        value = getattr(args, name)
+        if value is not None:
+            player[name] = cast(value)
+    player["hp"] = player["hp_max"]
+    return player
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Expected combat outcomes per enemy template and floor.")
+    parser.add_argument("--hero", default=DEFAULT_CHARACTER_ID, help="Character id for the base player build.")
+    parser.add_argument("--power", type=int)
+    parser.add_argument("--ap", dest="ap_max", type=int)
+    parser.add_argument("--armor", type=float)
+    parser.add_argument("--hp", dest="hp_max", type=int)
+    parser.add_argument("--evasion", type=float)
+    parser.add_argument("--accuracy", type=float)
+    parser.add_argument("--floors", default=f"1-{MAX_REPORT_FLOOR}", help="Floor range (1-500) or list (1,10,50).")
+    parser.add_argument("--step", type=int, default=50, help="Floor step for printed rows.")
+    parser.add_argument("--horizon", type=int, default=TTK_HORIZON, help="Turns simulated per fight.")
+    args = parser.parse_args()
+
+    if not WEAPONS or not ENEMIES:
+        raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+    if args.hero not in CHARACTERS:
+        raise RuntimeError(f"Unknown hero: {args.hero}")
+
+    player = _build_player(args)
+    floors = _parse_floors(args.floors, max(1, args.step))
+    started = time.perf_counter()
+    table = floor_table(player, floors=range(floors[0], floors[-1] + 1), horizon=max(1, args.horizon))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    outcomes = table.outcomes
+
+    print(
+        f"hero={args.hero} hp={player['hp_max']} ap={player['ap_max']} power={player['power']} "
+        f"armor={player['armor']} evasion={player['evasion']} accuracy={player['accuracy']}"
+    )
+    print(
+        f"{'floor':>5} {'enemy':<24} {'hp':>6} {'dmg':>5} {'hit':>5} {'exp/turn':>8} "
+        f"{'ttk':>6} {'win':>6}"
+    )
+    for floor in floors:
+        col = floor - floors[0]
+        for row, name in enumerate(table.names):
+            if not table.available[row, col]:
+                continue
+            print(
+                f"{floor:>5} {name[:24]:<24} {int(outcomes.hp[row, col]):>6} "
+                f"{int(outcomes.damage[row, col]):>5} {outcomes.hit_chance[row, col]:>5.0%} "
+                f"{outcomes.expected_damage[row, col]:>8.1f} {outcomes.expected_ttk[row, col]:>6.1f} "
+                f"{outcomes.win_chance[row, col]:>6.1%}"
+            )
+    cells = len(table.names) * len(table.floors)
+    print(f"templates={len(table.names)} floors={len(table.floors)} cells={cells} computed in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
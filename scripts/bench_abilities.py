@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import random
+import time
+from typing import Any
+
+from bot.game.characters import CHARACTERS
+from bot.game.common import use_run_rng
+from bot.game.data import WEAPONS
+from bot.game.logic import player_attack, roll_damage
+from bot.game.simulate import simulate_run
+
+
+def _battle_states(character_id: str, seeds: int, max_floor: int) -> list[dict[str, Any]]:
+    states: list[dict[str, Any]] = []
+
+    def on_step(state: dict[str, Any], _action: str) -> None:
+        if state["phase"] == "battle" and state["player"]["ap"] > 0:
+            states.append(copy.deepcopy(state))
+
+    for seed in range(1, seeds + 1):
+        simulate_run(character_id, seed, max_floor, on_step=on_step, allow_auto=False)
+    return states
+
+
+def _attacks_per_sec(states: list[dict[str, Any]], rounds: int, seed: int) -> float:
+    elapsed = 0
+    for round_idx in range(rounds):
+        batch = [copy.deepcopy(state) for state in states]
+        with use_run_rng(random.Random(seed + round_idx)):
+            started = time.perf_counter_ns()
+            for state in batch:
+                player_attack(state)
+            elapsed += time.perf_counter_ns() - started
+    return rounds * len(states) * 1e9 / max(1, elapsed)
+
+
+def _rolls_per_sec(states: list[dict[str, Any]], rounds: int, seed: int) -> float:
+    calls = []
+    for state in states:
+        target = next((enemy for enemy in state["enemies"] if enemy["hp"] > 0), None)
+        if target is not None:
+            calls.append((state["player"]["weapon"], state["player"], target, state))
+    with use_run_rng(random.Random(seed)):
+        started = time.perf_counter_ns()
+        for _ in range(rounds):
+            for weapon, player, target, state in calls:
+                roll_damage(weapon, player, target, state)
+        elapsed = time.perf_counter_ns() - started
+    return rounds * len(calls) * 1e9 / max(1, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark player_attack and roll_damage throughput per hero.")
+    parser.add_argument("--hero", action="append", help="Character id (repeatable). Defaults to all heroes.")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--floors", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if not WEAPONS:
+        raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+    print(f"{'hero':<12} {'states':>8} {'attacks/s':>12} {'rolls/s':>12}")
+    for character_id in args.hero or list(CHARACTERS):
+        states = _battle_states(character_id, args.seeds, args.floors)
+        if not states:
+            print(f"{character_id:<12} {0:>8} {'-':>12} {'-':>12}")
+            continue
+        attacks = _attacks_per_sec(states, args.rounds, args.seed)
+        rolls = _rolls_per_sec(states, args.rounds * 10, args.seed)
+        print(f"{character_id:<12} {len(states):>8} {attacks:>12.0f} {rolls:>12.0f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
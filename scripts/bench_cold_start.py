@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from bot import db
+from bot.migrations import load_migrations
+
+BENCH_TELEGRAM_BASE = -7_000_000_000
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def _cleanup() -> None:
+    async with db._connect() as conn:
+        await db._execute(
+            conn,
+            "DELETE FROM user_stats WHERE user_id IN (SELECT id FROM users WHERE telegram_id <= ? AND telegram_id > ?)",
+            (BENCH_TELEGRAM_BASE, BENCH_TELEGRAM_BASE - 100_000_000),
+        )
+        await db._execute(
+            conn,
+            "DELETE FROM users WHERE telegram_id <= ? AND telegram_id > ?",
+            (BENCH_TELEGRAM_BASE, BENCH_TELEGRAM_BASE - 100_000_000),
+        )
+
+
+async def _fill(users: int) -> None:
+    async with db._connect() as conn:
+        await db._execute(
+            conn,
+            "INSERT INTO users (telegram_id, username, max_floor, xp) "
+            "SELECT ? - g, 'cold_' || g, g % 120, g % 5000 FROM generate_series(1, ?) AS g",
+            (BENCH_TELEGRAM_BASE, users),
+        )
+        await db._execute(
+            conn,
+            "INSERT INTO user_stats (user_id, total_runs, deaths, hero_runs_json) "
+            "SELECT id, 3, 2, '{\"wanderer\": 3}'::jsonb FROM users WHERE telegram_id <= ? AND telegram_id > ?",
+            (BENCH_TELEGRAM_BASE, BENCH_TELEGRAM_BASE - 100_000_000),
+        )
+    async with db._read() as conn:
+        await db._execute(conn, "ANALYZE users")
+        await db._execute(conn, "ANALYZE user_stats")
+
+
+async def _table_rows() -> str:
+    async with db._read() as conn:
+        cursor = await db._execute(
+            conn,
+            "SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM runs), (SELECT COUNT(*) FROM user_stats), "
+            "(SELECT COUNT(*) FROM user_season_stats)",
+        )
+        users, runs, stats, season_stats = await cursor.fetchone()
+    return f"users={users} runs={runs} user_stats={stats} user_season_stats={season_stats}"
+
+
+async def _every_migration_ms() -> float:
+    # What init_db did on every boot before schema_version: all DDL, fills and backfill checks (rolled back).
+    elapsed = 0.0
+    try:
+        async with db._read() as conn:
+            async with conn.transaction():
+                started = time.perf_counter()
+                for _version, _name, migrate, _atomic in load_migrations():
+                    await migrate(conn)
+                elapsed = (time.perf_counter() - started) * 1000
+                raise _Rollback
+    except _Rollback:
+        pass
+    return elapsed
+
+
+async def _close_pool() -> None:
+    if db._POOL is not None:
+        await db._POOL.close()
+        db._POOL = None
+
+
+async def _versioned_start_ms(with_pool: bool) -> float:
+    if with_pool:
+        await _close_pool()
+    started = time.perf_counter()
+    await db.init_db()
+    return (time.perf_counter() - started) * 1000
+
+
+async def _bench(users: int, repeat: int, keep: bool) -> None:
+    started = time.perf_counter()
+    await db.init_db()
+    print(f"schema version {await db.get_schema_version()} ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if users:
+        await _cleanup()
+        started = time.perf_counter()
+        await _fill(users)
+        print(f"added {users} synthetic users in {time.perf_counter() - started:.1f} s")
+    try:
+        print(await _table_rows())
+        every = [await _every_migration_ms() for _ in range(repeat)]
+        cold = [await _versioned_start_ms(True) for _ in range(repeat)]
+        warm = [await _versioned_start_ms(False) for _ in range(repeat)]
+        print(f"{'startup':<40} {'mean ms':>10} {'max ms':>10}")
+        for label, values in (
+            ("all migrations every boot (old init_db)", every),
+            ("version check, new pool", cold),
+            ("version check, pool ready", warm),
+        ):
+            print(f"{label:<40} {sum(values) / len(values):>10.2f} {max(values):>10.2f}")
+    finally:
+        if users and not keep:
+            await _cleanup()
+        elif users:
+            await db.rebuild_admin_counters()
+        await _close_pool()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare startup with and without schema_version (old path is rolled back; local database only)."
+    )
+    parser.add_argument("--users", type=int, default=0, help="Synthetic users (with user_stats) to add first.")
+    parser.add_argument("--repeat", type=int, default=5, help="Startups per measurement.")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic users.")
+    args = parser.parse_args()
+    await _bench(max(0, args.users), max(1, args.repeat), args.keep)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
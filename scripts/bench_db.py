@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+
+from bot import db
+
+LEADERBOARD_PAGE_SIZE = 10
+TRANSACTION_COMMANDS = ("BEGIN", "COMMIT", "ROLLBACK")
+
+
+def _translation_ns(rounds: int) -> tuple[int, int]:
+    statements = list(db._SQL_CACHE)
+    if not statements:
+        return 0, 0
+    started = time.perf_counter_ns()
+    for _ in range(rounds):
+        for sql in statements:
+            db._translate_placeholders(sql)
+    uncached = (time.perf_counter_ns() - started) // (rounds * len(statements))
+    started = time.perf_counter_ns()
+    for _ in range(rounds):
+        for sql in statements:
+            db._translate_sql(sql)
+    cached = (time.perf_counter_ns() - started) // (rounds * len(statements))
+    return uncached, cached
+
+
+class _RoundTrips:
+    def __init__(self) -> None:
+        self.count = 0
+        self._originals: list[tuple[Any, str, Any]] = []
+
+    def _wrap(self, owner: Any, name: str, counts: Callable[..., bool]) -> None:
+        original = getattr(owner, name)
+
+        async def wrapper(*args, **kwargs):
+            if counts(*args, **kwargs):
+                self.count += 1
+            return await original(*args, **kwargs)
+
+        self._originals.append((owner, name, original))
+        setattr(owner, name, wrapper)
+
+    def __enter__(self) -> "_RoundTrips":
+        self._wrap(db, "_execute", lambda *args, **kwargs: True)
+        self._wrap(db, "_execute_named", lambda *args, **kwargs: True)
+        self._wrap(
+            asyncpg.Connection,
+            "execute",
+            lambda conn, query, *args, **kwargs: query.strip().upper().startswith(TRANSACTION_COMMANDS),
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+
+
+def _read_calls(targets: list[tuple[int, int]]) -> list[tuple[str, Callable[[], Awaitable[Any]]]]:
+    user_id, telegram_id = targets[0]
+    return [
+        ("get_user", lambda: db.get_user(user_id)),
+        ("get_user_by_telegram", lambda: db.get_user_by_telegram(telegram_id)),
+        ("get_setting", lambda: db.get_setting("last_processed_season")),
+        ("get_leaderboard_total", db.get_leaderboard_total),
+        ("get_active_season", db.get_active_season),
+        ("get_user_stats", lambda: db.get_user_stats(user_id)),
+    ]
+
+
+async def _measure_reads(calls, rounds: int) -> dict[str, tuple[float, float]]:
+    results = {}
+    for name, call in calls:
+        await call()
+        with _RoundTrips() as trips:
+            started = time.perf_counter_ns()
+            for _ in range(rounds):
+                await call()
+            elapsed = time.perf_counter_ns() - started
+        results[name] = (trips.count / rounds, elapsed / rounds / 1000)
+    return results
+
+
+async def _bench_reads(targets: list[tuple[int, int]], rounds: int) -> None:
+    calls = _read_calls(targets)
+    read_path = db._read
+    db._read = db._connect
+    try:
+        before = await _measure_reads(calls, rounds)
+    finally:
+        db._read = read_path
+    after = await _measure_reads(calls, rounds)
+    print(f"reads: rounds={rounds} (before = transaction per read, after = read-only path)")
+    print(f"{'read':<24} {'trips before':>12} {'trips after':>12} {'us before':>10} {'us after':>10}")
+    for name, _call in calls:
+        trips_before, us_before = before[name]
+        trips_after, us_after = after[name]
+        print(f"{name:<24} {trips_before:>12.1f} {trips_after:>12.1f} {us_before:>10.0f} {us_after:>10.0f}")
+
+
+async def _bench(users: int, rounds: int, write: bool, reads: int) -> None:
+    targets = (await db.get_all_user_targets())[:users]
+    if not targets:
+        raise RuntimeError("No users found. Nothing to benchmark.")
+    season = await db.get_active_season()
+    total = await db.get_leaderboard_total()
+    pages = max(1, min(5, (total + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE))
+    db.reset_statement_stats()
+
+    for _ in range(rounds):
+        for user_id, telegram_id in targets:
+            user = await db.get_user_by_telegram(telegram_id)
+            if write and user:
+                await db.ensure_user(telegram_id, user[2])
+            active = await db.get_active_run(user_id)
+            if write and active:
+                await db.update_run(active[0], active[1])
+        for page in range(pages):
+            await db.get_leaderboard_page(LEADERBOARD_PAGE_SIZE, page * LEADERBOARD_PAGE_SIZE)
+            if season:
+                await db.get_season_leaderboard_page(season[0], LEADERBOARD_PAGE_SIZE, page * LEADERBOARD_PAGE_SIZE)
+        await db.get_leaderboard_total()
+        if season:
+            await db.get_season_leaderboard_total(season[0])
+
+    print(f"users={len(targets)} rounds={rounds} leaderboard_pages={pages} write={write}")
+    for line in db.format_statement_stats():
+        print(line)
+    uncached, cached = _translation_ns(1000)
+    print(f"sql translation: {uncached} ns uncached, {cached} ns cached ({len(db._SQL_CACHE)} statements)")
+    if reads:
+        await _bench_reads(targets, reads)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark hot database statements and report per-statement timings.")
+    parser.add_argument("--users", type=int, default=50, help="Number of users to read per round.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Also run ensure_user and update_run (rewrites the same values).",
+    )
+    parser.add_argument(
+        "--reads",
+        type=int,
+        default=0,
+        help="Also compare round trips and latency of single reads with and without a transaction (calls per read).",
+    )
+    args = parser.parse_args()
+    await _bench(max(1, args.users), max(1, args.rounds), args.write, max(0, args.reads))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
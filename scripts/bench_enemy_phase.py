@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import random
+import time
+from typing import Any
+
+from bot.game.characters import CHARACTERS
+from bot.game.common import use_run_rng
+from bot.game.data import WEAPONS
+from bot.game.logic import advance_floor, enemy_phase, new_run_state
+
+
+def _parse_floors(value: str, step: int) -> list[int]:
+    if "-" in value:
+        low, high = (int(part) for part in value.split("-", 1))
+        floors = set(range(low, high + 1, step))
+        floors.update({low, high})
+        return sorted(floors)
+    return sorted({int(part) for part in value.split(",") if part.strip()})
+
+
+def _deep_states(character_id: str, floors: list[int], seeds: int) -> list[dict[str, Any]]:
+    states: list[dict[str, Any]] = []
+    for seed in range(1, seeds + 1):
+        for floor in floors:
+            with use_run_rng(random.Random(seed * 1000 + floor)):
+                state = new_run_state(character_id)
+                player = state["player"]
+                player["hp_max"] = player["hp"] = 10_000 + floor * 50
+                player["ap_max"] = max(int(player.get("ap_max", 1)), 4 + floor // 10)
+                state["floor"] = floor - 1
+                advance_floor(state)
+            if state["phase"] == "battle":
+                states.append(state)
+    return states
+
+
+def _phases_per_sec(states: list[dict[str, Any]], rounds: int, seed: int) -> float:
+    elapsed = 0
+    for round_idx in range(rounds):
+        batch = [copy.deepcopy(state) for state in states]
+        with use_run_rng(random.Random(seed + round_idx)):
+            started = time.perf_counter_ns()
+            for state in batch:
+                enemy_phase(state)
+            elapsed += time.perf_counter_ns() - started
+    return rounds * len(states) * 1e9 / max(1, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark enemy_phase throughput on deep floors.")
+    parser.add_argument("--hero", action="append", help="Character id (repeatable). Defaults to all heroes.")
+    parser.add_argument("--floors", default="100-500", help="Floor range (100-500) or list (150,300).")
+    parser.add_argument("--step", type=int, default=25, help="Floor step for ranges.")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if not WEAPONS:
+        raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+    floors = _parse_floors(args.floors, max(1, args.step))
+    print(f"floors={floors[0]}-{floors[-1]}")
+    print(f"{'hero':<12} {'states':>8} {'phases/s':>12} {'ns/phase':>10}")
+    for character_id in args.hero or list(CHARACTERS):
+        states = _deep_states(character_id, floors, args.seeds)
+        if not states:
+            print(f"{character_id:<12} {0:>8} {'-':>12} {'-':>10}")
+            continue
+        rate = _phases_per_sec(states, args.rounds, args.seed)
+        print(f"{character_id:<12} {len(states):>8} {rate:>12.0f} {1e9 / rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
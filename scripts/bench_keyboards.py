@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import time
+from typing import Any, Iterator
+
+import bot.keyboards as keyboards
+from bot.game.characters import CHARACTERS
+from bot.game.data import WEAPONS
+from bot.game.simulate import simulate_run
+from bot.handlers import game
+
+
+def _collect_states(heroes: list[str], seeds: int, max_floor: int) -> list[dict[str, Any]]:
+    states: list[dict[str, Any]] = []
+
+    def on_step(state: dict[str, Any], _action: str) -> None:
+        states.append(copy.deepcopy(state))
+
+    for character_id in heroes:
+        for seed in range(1, seeds + 1):
+            simulate_run(character_id, seed, max_floor, on_step=on_step)
+    return states
+
+
+@contextlib.contextmanager
+def _uncached() -> Iterator[None]:
+    cached = {id(func): func for func in keyboards._KEYBOARD_CACHES.values()}
+    patched = []
+    for module in (keyboards, game):
+        for name, value in list(vars(module).items()):
+            if id(value) in cached:
+                patched.append((module, name, value))
+                setattr(module, name, value.__wrapped__)
+    try:
+        yield
+    finally:
+        for module, name, value in patched:
+            setattr(module, name, value)
+
+
+def _run(states: list[dict[str, Any]], rounds: int) -> tuple[int, int]:
+    started = time.perf_counter_ns()
+    for _ in range(rounds):
+        for state in states:
+            game._markup_for_state(state)
+    markup_ns = time.perf_counter_ns() - started
+    started = time.perf_counter_ns()
+    for _ in range(rounds):
+        for state in states:
+            keyboards.markup_json(game._markup_for_state(state))
+    json_ns = time.perf_counter_ns() - started - markup_ns
+    calls = max(1, rounds * len(states))
+    return markup_ns // calls, max(0, json_ns) // calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark _markup_for_state with and without the keyboard cache.")
+    parser.add_argument("--hero", action="append", help="Character id (repeatable). Defaults to all heroes.")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--floors", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if not WEAPONS:
+        raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+    states = _collect_states(args.hero or list(CHARACTERS), args.seeds, args.floors)
+    if not states:
+        raise RuntimeError("Simulation produced no states.")
+
+    with _uncached():
+        before_ns, before_json_ns = _run(states, args.rounds)
+    keyboards.clear_keyboard_caches()
+    after_ns, after_json_ns = _run(states, args.rounds)
+    calls = args.rounds * len(states)
+
+    print(f"states={len(states)} calls={calls}")
+    print(f"uncached  markup_ns={before_ns:<8} json_ns={before_json_ns}")
+    print(f"cached    markup_ns={after_ns:<8} json_ns={after_json_ns}")
+    print(f"speedup   markup=x{before_ns / max(1, after_ns):.1f} json=x{before_json_ns / max(1, after_json_ns):.1f}")
+    for name, (hits, misses, size) in sorted(keyboards.keyboard_cache_stats().items()):
+        if hits or misses:
+            print(f"  {name:<28} hits={hits:<8} misses={misses:<6} size={size}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
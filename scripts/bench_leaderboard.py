@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from bot import db
+
+BENCH_SEASON_KEY = "bench-leaderboard"
+BENCH_TELEGRAM_BASE = -8_000_000_000
+PAGE_SIZE = 10
+MAX_FLOOR = 300
+OFFSET_PAGE_SQL = (
+    "SELECT users.username, user_season_stats.max_floor, users.xp, user_season_stats.max_floor_character "
+    "FROM user_season_stats JOIN users ON users.id = user_season_stats.user_id "
+    "WHERE user_season_stats.season_id = ? "
+    "ORDER BY user_season_stats.max_floor DESC, users.username ASC LIMIT ? OFFSET ?"
+)
+ROW_NUMBER_RANK_SQL = (
+    "SELECT rank FROM ("
+    "SELECT user_id, ROW_NUMBER() OVER (ORDER BY max_floor DESC, user_id ASC) AS rank "
+    "FROM user_season_stats WHERE season_id = ? AND max_floor > 0"
+    ") AS ranked WHERE user_id = ?"
+)
+
+
+async def _cleanup() -> None:
+    async with db._connect() as conn:
+        await db._execute(
+            conn,
+            "DELETE FROM user_season_stats WHERE season_id IN (SELECT id FROM seasons WHERE season_key = ?)",
+            (BENCH_SEASON_KEY,),
+        )
+        await db._execute(conn, "DELETE FROM seasons WHERE season_key = ?", (BENCH_SEASON_KEY,))
+        await db._execute(
+            conn,
+            "DELETE FROM users WHERE telegram_id <= ? AND telegram_id > ?",
+            (BENCH_TELEGRAM_BASE, BENCH_TELEGRAM_BASE - 100_000_000),
+        )
+
+
+async def _prepare(users: int) -> int:
+    await db.init_db()
+    await _cleanup()
+    async with db._connect() as conn:
+        cursor = await db._execute(
+            conn,
+            "INSERT INTO seasons (season_key, ended_at) VALUES (?, CURRENT_TIMESTAMP) RETURNING id",
+            (BENCH_SEASON_KEY,),
+        )
+        season_id = int((await cursor.fetchone())[0])
+        await db._execute(
+            conn,
+            "INSERT INTO users (telegram_id, username) "
+            "SELECT ? - g, 'bench_' || g FROM generate_series(1, ?) AS g",
+            (BENCH_TELEGRAM_BASE, users),
+        )
+        await db._execute(
+            conn,
+            "INSERT INTO user_season_stats (user_id, season_id, max_floor, total_runs) "
+            "SELECT id, ?, 1 + floor(power(random(), 2) * ?)::integer, 1 FROM users "
+            "WHERE telegram_id <= ? AND telegram_id > ?",
+            (season_id, MAX_FLOOR, BENCH_TELEGRAM_BASE, BENCH_TELEGRAM_BASE - 100_000_000),
+        )
+    async with db._read() as conn:
+        await db._execute(conn, "ANALYZE user_season_stats")
+        await db._execute(conn, "ANALYZE users")
+    return season_id
+
+
+async def _timed_ms(call, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await call()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+async def _offset_page(season_id: int, offset: int) -> None:
+    async with db._read() as conn:
+        cursor = await db._execute(conn, OFFSET_PAGE_SQL, (season_id, PAGE_SIZE, offset))
+        await cursor.fetchall()
+
+
+async def _row_number_rank(season_id: int, user_id: int) -> None:
+    async with db._read() as conn:
+        cursor = await db._execute(conn, ROW_NUMBER_RANK_SQL, (season_id, user_id))
+        await cursor.fetchone()
+
+
+async def _bench(users: int, repeat: int, seed: int, keep: bool) -> None:
+    started = time.perf_counter()
+    season_id = await _prepare(users)
+    print(f"users={users} season_id={season_id} prepared in {time.perf_counter() - started:.1f} s")
+    try:
+        total = await db.get_season_leaderboard_total(season_id)
+        depths = sorted({0, PAGE_SIZE * 10, total // 10, total // 2, max(0, total - PAGE_SIZE)})
+
+        ttl = db.SEASON_RANK_CACHE_TTL
+        cache_ttl = ttl or 300.0
+        db.SEASON_RANK_CACHE_TTL = 0
+        sql_pages = {
+            depth: await _timed_ms(lambda: db.get_season_leaderboard_page(season_id, PAGE_SIZE, depth), repeat)
+            for depth in depths
+        }
+        db.SEASON_RANK_CACHE_TTL = cache_ttl
+        started = time.perf_counter()
+        ranks = await db.refresh_season_ranks(season_id)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        print(f"rank cache: {len(ranks.keys)} keys, {len(ranks.keys) * ranks.keys.itemsize / 1e6:.1f} MB, "
+              f"loaded in {load_ms:.0f} ms")
+        print(f"{'offset':>9} {'old offset ms':>14} {'index offset ms':>16} {'keyset ms':>10}")
+        for depth in depths:
+            old = await _timed_ms(lambda: _offset_page(season_id, depth), repeat)
+            cached = await _timed_ms(lambda: db.get_season_leaderboard_page(season_id, PAGE_SIZE, depth), repeat)
+            print(f"{depth:>9} {old:>14.2f} {sql_pages[depth]:>16.2f} {cached:>10.2f}")
+
+        rng = random.Random(seed)
+        sample = [ranks.cursor_at(rng.randint(1, total)) for _ in range(repeat)]
+        problems = 0
+        old_ms = count_ms = cache_ms = 0.0
+        for max_floor, user_id in sample:
+            old_ms += await _timed_ms(lambda: _row_number_rank(season_id, user_id), 1)
+            db.SEASON_RANK_CACHE_TTL = 0
+            count_ms += await _timed_ms(lambda: db.get_user_season_rank(user_id, season_id), 1)
+            expected = await db.get_user_season_rank(user_id, season_id)
+            db.SEASON_RANK_CACHE_TTL = cache_ttl
+            cache_ms += await _timed_ms(lambda: db.get_user_season_rank(user_id, season_id), 1)
+            if await db.get_user_season_rank(user_id, season_id) != expected:
+                problems += 1
+        db.SEASON_RANK_CACHE_TTL = ttl
+        print(
+            f"rank lookup: row_number {old_ms / len(sample):.2f} ms, "
+            f"count {count_ms / len(sample):.2f} ms, cache {cache_ms / len(sample):.2f} ms"
+        )
+    finally:
+        db._SEASON_RANKS.pop(season_id, None)
+        if not keep:
+            await _cleanup()
+    if problems:
+        raise RuntimeError(f"Rank cache disagrees with SQL for {problems} users.")
+    print("Rank cache matches SQL ranks.")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fill a synthetic season and compare leaderboard pages and rank lookups (local database only)."
+    )
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per measurement.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic users and season.")
+    args = parser.parse_args()
+    await _bench(max(PAGE_SIZE, args.users), max(1, args.repeat), args.seed, args.keep)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+from bot.game.actions import apply_action
+from bot.game.characters import CHARACTERS
+from bot.game.common import MESSAGE_LIMIT, use_run_rng
+from bot.game.data import WEAPONS
+from bot.game.logic import (
+    _format_reward_details,
+    advance_floor,
+    build_enemy_info_text,
+    clear_enemy_info_cache,
+    clear_render_cache,
+    render_state,
+)
+from bot.game.run_tasks import run_tasks_lines
+from bot.game.simulate import default_choice, simulate_run
+from bot.game.tutorial import new_tutorial_state
+from bot.handlers.game import _markup_for_state
+from bot.keyboards import clear_keyboard_caches
+
+DEFAULT_BASELINE = Path(__file__).with_name("bench_presentation_baseline.json")
+BRANCH_ACTIONS = ("action:potion", "action:inventory", "action:run_tasks", "action:forfeit", "action:info")
+FAST_FORWARD_STEPS = 80
+MIN_REGRESSION_NS = 1000
+
+
+def _snapshot(state: dict[str, Any]) -> dict[str, Any]:
+    return json.loads(json.dumps(state, ensure_ascii=False))
+
+
+def _parse_floors(value: str, step: int) -> list[int]:
+    if "-" in value:
+        low, high = (int(part) for part in value.split("-", 1))
+        floors = set(range(low, high + 1, step))
+        floors.update({low, high})
+        return sorted(floors)
+    return sorted({int(part) for part in value.split(",") if part.strip()})
+
+
+def _hero_corpus(character_id: str, floors: list[int], seed: int, per_phase: int) -> list[dict[str, Any]]:
+    corpus: list[dict[str, Any]] = []
+    wanted = set(floors)
+    counts: dict[tuple, int] = defaultdict(int)
+    branch_rng = random.Random(seed * 1000)
+
+    def keep(state: dict[str, Any]) -> None:
+        key = (state["floor"], state["phase"], bool(state.get("show_info")))
+        if state["floor"] not in wanted or counts[key] >= per_phase:
+            return
+        counts[key] += 1
+        corpus.append(_snapshot(state))
+
+    def on_step(state: dict[str, Any], _action: str) -> None:
+        keep(state)
+        if state["phase"] != "battle" or state["floor"] not in wanted:
+            return
+        for action in BRANCH_ACTIONS:
+            branch = _snapshot(state)
+            with use_run_rng(branch_rng):
+                applied = apply_action(branch, action)
+            if applied:
+                keep(branch)
+
+    state = simulate_run(character_id, seed, max(floors), on_step=on_step)
+    rng = random.Random(seed)
+    for floor in floors:
+        if floor <= state["floor"]:
+            continue
+        jumped = _snapshot(state)
+        player = jumped["player"]
+        player["hp"] = player["hp_max"]
+        jumped["floor"] = floor - 1
+        with use_run_rng(random.Random(seed * 1000 + floor)):
+            advance_floor(jumped)
+            keep(jumped)
+            for _ in range(FAST_FORWARD_STEPS):
+                action = default_choice(jumped, rng)
+                if action is None or not apply_action(jumped, action):
+                    break
+                on_step(jumped, action)
+                if jumped["floor"] != floor:
+                    break
+    return corpus
+
+
+def _build_corpus(heroes: list[str], floors: list[int], seed: int, per_phase: int) -> list[dict[str, Any]]:
+    corpus = [_snapshot(new_tutorial_state())]
+    for character_id in heroes:
+        corpus.extend(_hero_corpus(character_id, floors, seed, per_phase))
+    return corpus
+
+
+def _reward_items(state: dict[str, Any]) -> list[tuple[str, dict[str, Any], bool]]:
+    show_splash = state.get("character_id") != "duelist"
+    rewards = list(state.get("rewards") or [])
+    if state.get("treasure_reward"):
+        rewards.append(state["treasure_reward"])
+    return [(reward["type"], reward["item"], show_splash) for reward in rewards]
+
+
+def _clear_caches() -> None:
+    clear_render_cache()
+    clear_enemy_info_cache()
+    clear_keyboard_caches()
+
+
+def _time_calls(calls: list[Callable[[], Any]], rounds: int) -> dict[str, int]:
+    best = [0] * len(calls)
+    for round_idx in range(rounds):
+        _clear_caches()
+        for idx, call in enumerate(calls):
+            started = time.perf_counter_ns()
+            call()
+            elapsed = time.perf_counter_ns() - started
+            if round_idx == 0 or elapsed < best[idx]:
+                best[idx] = elapsed
+    timings = sorted(best)
+    if not timings:
+        return {"count": 0, "mean_ns": 0, "p50_ns": 0, "p95_ns": 0}
+    return {
+        "count": len(timings),
+        "mean_ns": sum(timings) // len(timings),
+        "p50_ns": timings[len(timings) // 2],
+        "p95_ns": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def _run_suite(corpus: list[dict[str, Any]], rounds: int) -> tuple[dict[str, dict[str, int]], list[str]]:
+    battle = [state for state in corpus if state["phase"] in {"battle", "forfeit_confirm", "tutorial"}]
+    rewards = [item for state in corpus for item in _reward_items(state)]
+    results = {
+        "render_state": _time_calls([lambda state=state: render_state(state) for state in corpus], rounds),
+        "build_enemy_info_text": _time_calls(
+            [
+                lambda state=state: build_enemy_info_text(
+                    state["enemies"],
+                    state["player"],
+                    state["floor"],
+                    character_id=state.get("character_id"),
+                )
+                for state in battle
+            ],
+            rounds,
+        ),
+        "_format_reward_details": _time_calls(
+            [
+                lambda reward=reward: _format_reward_details(reward[0], reward[1], show_splash=reward[2])
+                for reward in rewards
+            ],
+            rounds,
+        ),
+        "run_tasks_lines": _time_calls([lambda state=state: run_tasks_lines(state) for state in corpus], rounds),
+        "_markup_for_state": _time_calls([lambda state=state: _markup_for_state(state) for state in corpus], rounds),
+    }
+
+    problems = []
+    longest = 0
+    for state in corpus:
+        length = len(render_state(state))
+        longest = max(longest, length)
+        if length > MESSAGE_LIMIT:
+            problems.append(
+                f"{state.get('character_id')} floor {state['floor']} phase {state['phase']}: "
+                f"{length} chars > MESSAGE_LIMIT {MESSAGE_LIMIT}"
+            )
+    results["render_state"]["max_len"] = longest
+    return results, problems
+
+
+def _compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    problems = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("mean_ns", "p95_ns"):
+            limit = previous.get(metric, 0) * (1.0 + tolerance)
+            if limit and current[metric] > limit and current[metric] - previous[metric] > MIN_REGRESSION_NS:
+                problems.append(f"{name} {metric}: {current[metric]} > baseline {previous[metric]} (+{tolerance:.0%})")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark presentation renderers on engine-generated states.")
+    parser.add_argument("--hero", action="append", help="Character id (repeatable). Defaults to all heroes.")
+    parser.add_argument("--floors", default="1-300", help="Floor range (1-300) or list (1,10,50).")
+    parser.add_argument("--step", type=int, default=10, help="Floor step for ranges.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--per-phase", type=int, default=3, help="States kept per floor and phase.")
+    parser.add_argument("--rounds", type=int, default=3, help="Timing rounds; the fastest round per call is kept.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Store results as the new baseline.")
+    parser.add_argument("--check", action="store_true", help="Fail if results regress against the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if not WEAPONS:
+        raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+    floors = _parse_floors(args.floors, max(1, args.step))
+    corpus = _build_corpus(args.hero or list(CHARACTERS), floors, args.seed, args.per_phase)
+    results, problems = _run_suite(corpus, max(1, args.rounds))
+
+    phases = defaultdict(int)
+    for state in corpus:
+        phases[state["phase"]] += 1
+    print(f"states={len(corpus)} floors={floors[0]}-{floors[-1]} phases={dict(sorted(phases.items()))}")
+    print(f"{'renderer':<24} {'count':>8} {'mean ns':>10} {'p50 ns':>10} {'p95 ns':>10}")
+    for name, item in results.items():
+        print(f"{name:<24} {item['count']:>8} {item['mean_ns']:>10} {item['p50_ns']:>10} {item['p95_ns']:>10}")
+    print(f"longest render: {results['render_state']['max_len']} / {MESSAGE_LIMIT}")
+
+    if args.check:
+        if not args.baseline.exists():
+            raise RuntimeError(f"Baseline {args.baseline} not found. Run with --save first.")
+        problems.extend(_compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance))
+    if args.save and not problems:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}.")
+    if problems:
+        raise RuntimeError("Presentation check failed:\n" + "\n".join(problems))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
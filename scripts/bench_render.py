@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+from bot.game.characters import CHARACTERS
+from bot.game.data import WEAPONS
+from bot.game.journal import iter_replay
+from bot.game.logic import clear_render_cache, render_state
+from bot.game.simulate import simulate_run
+
+PAGE_SIZE = 200
+
+
+def _snapshot(state: dict[str, Any]) -> dict[str, Any]:
+    return json.loads(json.dumps(state, ensure_ascii=False))
+
+
+def _simulated_corpus(heroes: list[str], seeds: int, max_floor: int) -> list[dict[str, Any]]:
+    corpus: list[dict[str, Any]] = []
+
+    def on_step(state: dict[str, Any], _action: str) -> None:
+        corpus.append(_snapshot(state))
+
+    for character_id in heroes:
+        for seed in range(1, seeds + 1):
+            simulate_run(character_id, seed, max_floor, on_step=on_step, allow_auto=False)
+    return corpus
+
+
+async def _journal_corpus(limit: int) -> list[dict[str, Any]]:
+    from bot import db
+
+    corpus: list[dict[str, Any]] = []
+    loaded = 0
+    after_run_id = 0
+    while loaded < limit:
+        run_ids = await db.get_journaled_run_ids(min(PAGE_SIZE, limit - loaded), after_run_id)
+        if not run_ids:
+            break
+        after_run_id = run_ids[-1]
+        for run_id in run_ids:
+            loaded += 1
+            try:
+                for _entry, state in iter_replay(await db.get_run_journal(run_id)):
+                    corpus.append(_snapshot(state))
+            except (KeyError, ValueError) as exc:
+                print(f"run {run_id}: replay failed: {exc}")
+    return corpus
+
+
+def _percentile(ordered: list[int], ratio: float) -> int:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def _measure(corpus: list[dict[str, Any]], cold: bool) -> tuple[list[int], list[str]]:
+    timings = []
+    texts = []
+    clear_render_cache()
+    for state in corpus:
+        if cold:
+            clear_render_cache()
+        started = time.perf_counter_ns()
+        text = render_state(state)
+        timings.append(time.perf_counter_ns() - started)
+        texts.append(text)
+    return sorted(timings), texts
+
+
+def _report(name: str, ordered: list[int]) -> None:
+    mean = sum(ordered) // len(ordered)
+    print(
+        f"{name:<8} mean_ns={mean:<8} p50_ns={_percentile(ordered, 0.5):<8} "
+        f"p95_ns={_percentile(ordered, 0.95):<8} p99_ns={_percentile(ordered, 0.99)}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark render_state with cold and warm section caches.")
+    parser.add_argument("--source", choices=("sim", "journal"), default="sim")
+    parser.add_argument("--hero", action="append", help="Character id (repeatable). Defaults to all heroes.")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--floors", type=int, default=60)
+    parser.add_argument("--limit", type=int, default=500, help="Recorded runs to load with --source journal.")
+    args = parser.parse_args()
+
+    if args.source == "journal":
+        corpus = asyncio.run(_journal_corpus(args.limit))
+    else:
+        if not WEAPONS:
+            raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+        corpus = _simulated_corpus(args.hero or list(CHARACTERS), args.seeds, args.floors)
+    if not corpus:
+        raise RuntimeError("Render corpus is empty.")
+
+    cold, cold_texts = _measure(corpus, cold=True)
+    warm, warm_texts = _measure(corpus, cold=False)
+    mismatches = sum(1 for left, right in zip(cold_texts, warm_texts) if left != right)
+
+    print(f"states={len(corpus)}")
+    _report("cold", cold)
+    _report("warm", warm)
+    print(f"p50 speedup x{_percentile(cold, 0.5) / max(1, _percentile(warm, 0.5)):.1f}")
+    if mismatches:
+        raise RuntimeError(f"Cached render differs from cold render in {mismatches} states.")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import time
+import tracemalloc
+from typing import Any
+
+from bot.game.characters import CHARACTERS
+from bot.game.data import WEAPONS
+from bot.game.models import RunState
+from bot.game.simulate import simulate_run
+
+
+def _measure_memory(build) -> tuple[int, Any]:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    value = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before, value
+
+
+def _per_call_ns(func, repeat: int) -> int:
+    started = time.perf_counter_ns()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter_ns() - started) // repeat
+
+
+def _bench_hero(character_id: str, seed: int, max_floor: int, repeat: int) -> None:
+    snapshots: list[dict[str, Any]] = []
+    actions = 0
+    last_floor = 0
+
+    def on_step(state: dict[str, Any], _action: str) -> None:
+        nonlocal actions, last_floor
+        actions += 1
+        if state["floor"] != last_floor:
+            last_floor = state["floor"]
+            snapshots.append(copy.deepcopy(state))
+
+    started = time.perf_counter_ns()
+    state = simulate_run(character_id, seed, max_floor, on_step=on_step)
+    elapsed = time.perf_counter_ns() - started
+    encoded = [json.dumps(item) for item in snapshots]
+
+    dict_bytes, _dicts = _measure_memory(lambda: [json.loads(item) for item in encoded])
+    model_bytes, models = _measure_memory(
+        lambda: [RunState.from_dict(json.loads(item)) for item in encoded]
+    )
+    mismatched = sum(1 for item, model in zip(encoded, models) if json.dumps(model.to_dict()) != item)
+    if mismatched:
+        raise RuntimeError(f"{character_id}: {mismatched} snapshots changed after from_dict/to_dict")
+    sample = snapshots[-1]
+    sample_model = models[-1]
+    from_dict_ns = _per_call_ns(lambda: RunState.from_dict(sample), repeat)
+    to_dict_ns = _per_call_ns(sample_model.to_dict, repeat)
+    json_ns = _per_call_ns(lambda: json.loads(json.dumps(sample)), repeat)
+    dict_get_ns = _per_call_ns(lambda: sample["player"].get("ap", 0), repeat * 10)
+    attr_ns = _per_call_ns(lambda: sample_model.player.ap, repeat * 10)
+
+    print(
+        f"{character_id:<12} floor={state['floor']:<4} actions={actions:<6} "
+        f"ns/action={elapsed // max(1, actions):<8} "
+        f"snapshots={len(snapshots):<4} dict_kb={dict_bytes // 1024:<6} model_kb={model_bytes // 1024:<6} "
+        f"from_dict_ns={from_dict_ns:<7} to_dict_ns={to_dict_ns:<7} json_roundtrip_ns={json_ns:<7} "
+        f"dict_get_ns={dict_get_ns:<4} attr_ns={attr_ns}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dict and slotted run state models on a simulated run.")
+    parser.add_argument("--hero", action="append", help="Character id (repeatable). Defaults to all heroes.")
+    parser.add_argument("--floors", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    if not WEAPONS:
+        raise RuntimeError("Game data is not loaded. Put weapons/enemies/upgrades JSON into data/.")
+    for character_id in args.hero or list(CHARACTERS):
+        _bench_hero(character_id, args.seed, args.floors, args.repeat)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any
+
+from bot import db
+
+BENCH_TELEGRAM_ID = -9_000_000_001
+BENCH_SEASON_KEY = "bench-stats-upsert"
+ENEMY_IDS = ("skeleton", "ghoul", "wraith", "cultist", "lich")
+HERO_IDS = ("wanderer", "knight", "rogue")
+
+
+def _finished_runs(count: int, seed: int) -> list[tuple[dict[str, Any], bool]]:
+    rng = random.Random(seed)
+    runs = []
+    for _ in range(count):
+        kills = {enemy_id: rng.randint(1, 6) for enemy_id in rng.sample(ENEMY_IDS, rng.randint(1, 3))}
+        state = {
+            "floor": rng.randint(1, 120),
+            "character_id": rng.choice(HERO_IDS),
+            "kills": kills,
+            "treasures_found": rng.randint(0, 2),
+            "chests_opened": rng.randint(0, 3),
+            "xp_bonus": rng.randint(0, 40),
+        }
+        runs.append((state, rng.random() < 0.7))
+    return runs
+
+
+def _expected(runs: list[tuple[dict[str, Any], bool]]) -> dict[str, Any]:
+    totals: dict[str, Any] = {
+        "total_runs": len(runs),
+        "deaths": 0,
+        "deaths_by_floor": {},
+        "kills": {},
+        "hero_runs": {},
+        "treasures_found": 0,
+        "chests_opened": 0,
+        "xp_gained": 0,
+        "max_floor": 0,
+    }
+    for state, died in runs:
+        if died:
+            floor = str(state["floor"])
+            totals["deaths"] += 1
+            totals["deaths_by_floor"][floor] = totals["deaths_by_floor"].get(floor, 0) + 1
+        for enemy_id, count in state["kills"].items():
+            totals["kills"][enemy_id] = totals["kills"].get(enemy_id, 0) + count
+        hero_id = state["character_id"]
+        totals["hero_runs"][hero_id] = totals["hero_runs"].get(hero_id, 0) + 1
+        totals["treasures_found"] += state["treasures_found"]
+        totals["chests_opened"] += state["chests_opened"]
+        totals["xp_gained"] += state["floor"] + state["xp_bonus"]
+        totals["max_floor"] = max(totals["max_floor"], state["floor"])
+    return totals
+
+
+async def _prepare() -> tuple[int, int]:
+    await db.init_db()
+    await _cleanup()
+    async with db._connect() as conn:
+        cursor = await db._execute(
+            conn,
+            "INSERT INTO users (telegram_id, username) VALUES (?, ?) RETURNING id",
+            (BENCH_TELEGRAM_ID, "bench_stats_upsert"),
+        )
+        user_id = int((await cursor.fetchone())[0])
+        cursor = await db._execute(
+            conn,
+            "INSERT INTO seasons (season_key, ended_at) VALUES (?, CURRENT_TIMESTAMP) RETURNING id",
+            (BENCH_SEASON_KEY,),
+        )
+        season_id = int((await cursor.fetchone())[0])
+    return user_id, season_id
+
+
+async def _cleanup() -> None:
+    async with db._connect() as conn:
+        for table in ("user_kills", "user_deaths"):
+            await db._execute(
+                conn,
+                f"DELETE FROM {table} WHERE user_id IN (SELECT id FROM users WHERE telegram_id = ?)",
+                (BENCH_TELEGRAM_ID,),
+            )
+        await db._execute(
+            conn,
+            "DELETE FROM user_season_stats WHERE season_id IN (SELECT id FROM seasons WHERE season_key = ?)",
+            (BENCH_SEASON_KEY,),
+        )
+        await db._execute(
+            conn,
+            "DELETE FROM user_stats WHERE user_id IN (SELECT id FROM users WHERE telegram_id = ?)",
+            (BENCH_TELEGRAM_ID,),
+        )
+        await db._execute(conn, "DELETE FROM seasons WHERE season_key = ?", (BENCH_SEASON_KEY,))
+        await db._execute(conn, "DELETE FROM users WHERE telegram_id = ?", (BENCH_TELEGRAM_ID,))
+
+
+async def _record_all(
+    user_id: int,
+    season_id: int,
+    runs: list[tuple[dict[str, Any], bool]],
+    concurrency: int,
+) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def record(state: dict[str, Any], died: bool) -> None:
+        async with semaphore:
+            await db.record_run_stats(user_id, state, died)
+            await db.record_season_stats(user_id, season_id, state, died=died)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(record(state, died) for state, died in runs))
+    return time.perf_counter() - started
+
+
+async def _normalized(user_id: int, season_id: int) -> dict[str, Any]:
+    async with db._read() as conn:
+        cursor = await db._execute(
+            conn,
+            "SELECT enemy_id, count FROM user_kills WHERE user_id = ? AND season_id = ?",
+            (user_id, season_id),
+        )
+        kills = {enemy_id: int(count) for enemy_id, count in await cursor.fetchall()}
+        cursor = await db._execute(
+            conn,
+            "SELECT floor, deaths FROM user_deaths WHERE user_id = ? AND season_id = ?",
+            (user_id, season_id),
+        )
+        deaths_by_floor = {str(floor): int(deaths) for floor, deaths in await cursor.fetchall()}
+    return {"kills": kills, "deaths_by_floor": deaths_by_floor}
+
+
+async def _top_killer_problems() -> list[str]:
+    async with db._read() as conn:
+        cursor = await db._execute(conn, "SELECT COUNT(*) FROM admin_top_killers")
+        rows = int((await cursor.fetchone())[0])
+        cursor = await db._execute(
+            conn,
+            "SELECT user_id, kills FROM admin_top_killers ORDER BY kills DESC, user_id ASC LIMIT 3",
+        )
+        top = [(int(user_id), int(kills)) for user_id, kills in await cursor.fetchall()]
+        cursor = await db._execute(
+            conn,
+            "SELECT user_id, kills FROM user_kill_totals WHERE season_id = ? AND kills > 0 "
+            "ORDER BY kills DESC, user_id ASC LIMIT 3",
+            (db.ALL_TIME_SEASON_ID,),
+        )
+        expected = [(int(user_id), int(kills)) for user_id, kills in await cursor.fetchall()]
+    problems = []
+    if rows > db.ADMIN_TOP_KILLERS:
+        problems.append(f"admin_top_killers has {rows} rows, limit is {db.ADMIN_TOP_KILLERS}")
+    if top != expected:
+        problems.append(f"admin_top_killers top 3: {top!r} != user_kill_totals {expected!r}")
+    return problems
+
+
+def _mismatches(
+    expected: dict[str, Any],
+    stats: dict[str, Any] | None,
+    season: dict[str, Any],
+    normalized: dict[str, dict[str, Any]],
+) -> list[str]:
+    problems = []
+    for scope, rows in normalized.items():
+        for key in ("kills", "deaths_by_floor"):
+            if rows[key] != expected[key]:
+                problems.append(f"{scope}.{key}: {rows[key]!r} != {expected[key]!r}")
+    if stats is None:
+        return problems + ["user_stats row is missing"]
+    for key in ("total_runs", "deaths", "deaths_by_floor", "kills", "hero_runs", "treasures_found", "chests_opened"):
+        if stats.get(key) != expected[key]:
+            problems.append(f"user_stats.{key}: {stats.get(key)!r} != {expected[key]!r}")
+    for key in ("total_runs", "deaths", "deaths_by_floor", "kills", "treasures_found", "chests_opened", "xp_gained",
+                "max_floor"):
+        if season.get(key) != expected[key]:
+            problems.append(f"user_season_stats.{key}: {season.get(key)!r} != {expected[key]!r}")
+    return problems
+
+
+async def _bench(runs_count: int, concurrency: int, seed: int, keep: bool) -> None:
+    user_id, season_id = await _prepare()
+    try:
+        runs = _finished_runs(runs_count, seed)
+        db.reset_statement_stats()
+        elapsed = await _record_all(user_id, season_id, runs, concurrency)
+        stats = await db.get_user_stats(user_id)
+        season = await db.get_user_season_stats(user_id, season_id)
+        normalized = {
+            "user_kills/user_deaths (all time)": await _normalized(user_id, db.ALL_TIME_SEASON_ID),
+            "user_kills/user_deaths (season)": await _normalized(user_id, season_id),
+        }
+        problems = _mismatches(_expected(runs), stats, season, normalized) + await _top_killer_problems()
+    finally:
+        if not keep:
+            await _cleanup()
+            await db.rebuild_admin_counters()
+
+    print(f"runs={runs_count} concurrency={concurrency} elapsed={elapsed * 1000:.1f} ms")
+    print(f"throughput: {runs_count / max(elapsed, 1e-9):.0f} finished runs/s (2 upserts per run)")
+    for line in db.format_statement_stats():
+        print(line)
+    if problems:
+        shown = "\n".join(problems[:20])
+        raise RuntimeError(f"Lost updates detected ({len(problems)}):\n{shown}")
+    print("Concurrent upserts match the expected totals.")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Record many finished runs for one user concurrently, verify totals and report throughput."
+    )
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20, help="Finishes in flight at once.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic user and season rows.")
+    args = parser.parse_args()
+    await _bench(max(1, args.runs), max(1, args.concurrency), args.seed, args.keep)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
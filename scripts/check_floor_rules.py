@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import argparse
+
+from bot.game import logic
+from bot.game.logic import (
+    AP_MAX_BASE_CAP,
+    AP_MAX_STEP_PER_TIER,
+    ARMOR_CAP_BEFORE_50,
+    ARMOR_CAP_BEFORE_100,
+    BOSS_FLOOR,
+    ENEMY_ARMOR_PIERCE_BASE,
+    ENEMY_ARMOR_PIERCE_MAX,
+    ENEMY_ARMOR_PIERCE_PER_FLOOR,
+    ENEMY_ARMOR_PIERCE_START_FLOOR,
+    ENEMY_DAMAGE_BUDGET_RATIO,
+    ENEMY_DAMAGE_BUDGET_RATIO_POST_BOSS,
+    EVASION_CAP_BEFORE_50,
+    EVASION_CAP_BEFORE_100,
+    EVASION_REDUCTION_MAX,
+    EVASION_REDUCTION_PER_FLOOR,
+    EVASION_REDUCTION_START_FLOOR,
+    FLOOR_RULES_MAX_CACHED,
+    WEAPON_RARITY_TIERS,
+)
+
+EVASION_SAMPLES = (0.0, 0.05, 0.17, 0.3, 0.55, 0.8)
+
+
+def _ap_max_cap(floor):
+    safe_floor = max(1, int(floor or 1))
+    return AP_MAX_BASE_CAP + AP_MAX_STEP_PER_TIER * (safe_floor // 10)
+
+
+def _armor_cap(floor):
+    safe_floor = max(1, int(floor or 1))
+    if safe_floor < 50:
+        return ARMOR_CAP_BEFORE_50
+    if safe_floor < 100:
+        return ARMOR_CAP_BEFORE_100
+    return None
+
+
+def _evasion_cap(floor):
+    safe_floor = max(1, int(floor or 1))
+    if safe_floor < 50:
+        return EVASION_CAP_BEFORE_50
+    if safe_floor < 100:
+        return EVASION_CAP_BEFORE_100
+    return None
+
+
+def _budget_ratio(floor):
+    base = ENEMY_DAMAGE_BUDGET_RATIO_POST_BOSS if floor > BOSS_FLOOR else ENEMY_DAMAGE_BUDGET_RATIO
+    if floor > 20:
+        base += 0.1 * ((floor - 20) // 10)
+    return min(base, 1.0)
+
+
+def _armor_pierce(floor):
+    if floor <= ENEMY_ARMOR_PIERCE_START_FLOOR:
+        return 0.0
+    pierce = ENEMY_ARMOR_PIERCE_BASE + ENEMY_ARMOR_PIERCE_PER_FLOOR * (floor - ENEMY_ARMOR_PIERCE_START_FLOOR)
+    return min(ENEMY_ARMOR_PIERCE_MAX, pierce)
+
+
+def _effective_evasion(evasion, floor):
+    if floor is None or floor < EVASION_REDUCTION_START_FLOOR:
+        return evasion
+    reduction = min(EVASION_REDUCTION_MAX, EVASION_REDUCTION_PER_FLOOR * (floor - EVASION_REDUCTION_START_FLOOR))
+    return max(0.0, evasion * (1.0 - reduction))
+
+
+def _rarity_prefix(floor):
+    prefix = None
+    for min_floor, name in WEAPON_RARITY_TIERS:
+        if floor >= min_floor:
+            prefix = name
+    return prefix
+
+
+def _max_group_size(floor):
+    if floor <= 3:
+        return 1
+    if floor <= 6:
+        return 2
+    return 3
+
+
+CHECKS = (
+    ("_ap_max_cap_for_floor", _ap_max_cap),
+    ("_armor_cap_for_floor", _armor_cap),
+    ("_evasion_cap_for_floor", _evasion_cap),
+    ("_enemy_damage_budget_ratio", _budget_ratio),
+    ("_enemy_armor_pierce_for_floor", _armor_pierce),
+    ("_weapon_rarity_prefix", _rarity_prefix),
+    ("_max_group_size_for_floor", _max_group_size),
+)
+
+
+def _mismatches(floors: list[int]) -> list[str]:
+    problems = []
+    for name, reference in CHECKS:
+        current = getattr(logic, name)
+        for floor in floors:
+            expected, actual = reference(floor), current(floor)
+            if expected != actual:
+                problems.append(f"{name}({floor}): {actual!r} != {expected!r}")
+    for floor in [None, *floors]:
+        for evasion in EVASION_SAMPLES:
+            expected, actual = _effective_evasion(evasion, floor), logic._effective_evasion(evasion, floor)
+            if expected != actual:
+                problems.append(f"_effective_evasion({evasion}, {floor}): {actual!r} != {expected!r}")
+    for name, reference in CHECKS[:3]:
+        if getattr(logic, name)(None) != reference(None):
+            problems.append(f"{name}(None) differs")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the per-floor rules table with the reference formulas.")
+    parser.add_argument("--max-floor", type=int, default=FLOOR_RULES_MAX_CACHED + 500)
+    args = parser.parse_args()
+
+    floors = list(range(-5, args.max_floor + 1))
+    problems = _mismatches(floors)
+    print(f"floors={floors[0]}..{floors[-1]} checks={len(CHECKS) + 1} cached={len(logic._FLOOR_RULES) - 1}")
+    if problems:
+        shown = "\n".join(problems[:20])
+        raise RuntimeError(f"Floor rules mismatch ({len(problems)}):\n{shown}")
+    print("Floor rules match the reference formulas.")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)
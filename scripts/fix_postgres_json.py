@@ -8,6 +8,8 @@ from typing import Any, Literal
 
 import asyncpg
 
+from bot import maintenance
+
 JsonKind = Literal["dict", "list"]
 
 # table, primary_key, column, expected json type
@@ -55,86 +57,143 @@ def _normalize_json(raw: Any, kind: JsonKind) -> str:
     return json.dumps(data, ensure_ascii=False)
 
 
-async def _fix_column(
-    conn: asyncpg.Connection,
+def _table_job(
     table: str,
     pk_expr: str,
-    column: str,
-    kind: JsonKind,
-    apply_changes: bool,
-) -> tuple[int, int]:
-    rows = await conn.fetch(f"SELECT {pk_expr}, {column} FROM {table}")
-    checked = 0
-    changed = 0
-
-    for row in rows:
-        checked += 1
-        raw = row[column]
-        normalized = _normalize_json(raw, kind)
-        if isinstance(raw, str):
-            same = _normalize_json(raw, kind) == normalized and raw == normalized
-        else:
-            same = False
-        if same:
-            continue
-
-        changed += 1
-        if not apply_changes:
-            continue
-
-        if "," in pk_expr:
-            pk_cols = [part.strip() for part in pk_expr.split(",")]
-            where = " AND ".join(f"{col} = ${idx + 2}" for idx, col in enumerate(pk_cols))
-            values = [row[col] for col in pk_cols]
-            await conn.execute(
-                f"UPDATE {table} SET {column} = $1 WHERE {where}",
-                normalized,
-                *values,
-            )
-        else:
-            pk_col = pk_expr.strip()
-            await conn.execute(
-                f"UPDATE {table} SET {column} = $1 WHERE {pk_col} = $2",
-                normalized,
-                row[pk_col],
-            )
-    return checked, changed
+    columns: list[tuple[str, JsonKind, str]],
+    staged: dict[tuple[str, str], int],
+    changed: dict[tuple[str, str], int],
+) -> maintenance.BatchJob:
+    pk_cols = [part.strip() for part in pk_expr.split(",")]
+    names = [column for column, _kind, _type in columns]
+    placeholders = ", ".join(f"${idx + 1}" for idx in range(len(pk_cols)))
+    originals = [f"{column}::text AS {column}_original" for column in names]
+    select_sql = (
+        f"SELECT {', '.join(pk_cols + names + originals)} FROM {table} "
+        f"WHERE ({', '.join(pk_cols)}) > ({placeholders}) ORDER BY {', '.join(pk_cols)}"
+    )
+    # rows are read from one snapshot while the bot keeps writing, so a value is replaced only if the locked row
+    # still holds the text that was read; the per-column flags are returned to count what was really changed
+    flags = ", ".join(
+        f"(stage.{column} IS NOT NULL AND {table}.{column}::text IS NOT DISTINCT FROM stage.{column}_original) "
+        f"AS apply_{column}"
+        for column in names
+    )
+    join = " AND ".join(f"{table}.{col} = stage.{col}" for col in pk_cols)
+    assignments = ", ".join(
+        f"{column} = CASE WHEN target.apply_{column} THEN target.{column}::{sql_type} ELSE {table}.{column} END"
+        for column, _kind, sql_type in columns
+    )
+    where = " AND ".join(f"{table}.{col} = target.{col}" for col in pk_cols)
+    any_applied = " OR ".join(f"target.apply_{column}" for column in names)
+    apply_sql = (
+        f"WITH target AS (SELECT stage.*, {flags} FROM {{stage}} AS stage JOIN {table} ON {join} "
+        f"FOR UPDATE OF {table}) "
+        f"UPDATE {table} SET {assignments} FROM target WHERE {where} AND ({any_applied}) "
+        f"RETURNING {', '.join(f'target.apply_{column}' for column in names)}"
+    )
+
+    def transform(rows: list[asyncpg.Record]) -> list[tuple[Any, ...]]:
+        fixed = []
+        for row in rows:
+            values = []
+            for column, kind, _sql_type in columns:
+                raw = row[column]
+                normalized = _normalize_json(raw, kind)
+                if isinstance(raw, str) and raw == normalized:
+                    values.extend((None, None))
+                    continue
+                staged[(table, column)] += 1
+                values.extend((normalized, row[f"{column}_original"]))
+            if any(value is not None for value in values):
+                fixed.append(tuple(row[col] for col in pk_cols) + tuple(values))
+        return fixed
+
+    def on_applied(rows: list[asyncpg.Record]) -> None:
+        for row in rows:
+            for column in names:
+                if row[f"apply_{column}"]:
+                    changed[(table, column)] += 1
+
+    return maintenance.BatchJob(
+        name=f"fix_json_{table}",
+        select_sql=select_sql,
+        start=tuple(0 for _ in pk_cols),
+        key=lambda row: tuple(row[col] for col in pk_cols),
+        transform=transform,
+        stage_columns=[(col, "BIGINT") for col in pk_cols]
+        + [(name, "TEXT") for column in names for name in (column, f"{column}_original")],
+        apply_sql=apply_sql,
+        on_applied=on_applied,
+    )
+
+
+async def _column_types(pool: asyncpg.Pool) -> dict[tuple[str, str], str]:
+    rows = await pool.fetch(
+        "SELECT table_name, column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = current_schema()"
+    )
+    return {(row["table_name"], row["column_name"]): row["data_type"] for row in rows}
 
 
 async def main() -> None:
     parser = argparse.ArgumentParser(description="Fix double-encoded JSON fields in PostgreSQL.")
     parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", ""))
     parser.add_argument("--dry-run", action="store_true", help="Only report changes without updating rows.")
+    parser.add_argument("--parallel", type=int, default=1, help="Tables processed at once.")
+    parser.add_argument("--chunk-rows", type=int, default=maintenance.MAINTENANCE_CHUNK_ROWS)
     args = parser.parse_args()
 
     if not args.database_url.strip():
         raise RuntimeError("DATABASE_URL is not set. Pass --database-url or export DATABASE_URL.")
 
-    conn = await asyncpg.connect(args.database_url)
+    parallel = max(1, args.parallel)
+    pool = await asyncpg.create_pool(args.database_url, min_size=1, max_size=2 * parallel)
     try:
-        async with conn.transaction():
-            total_checked = 0
-            total_changed = 0
-            for table, pk_expr, column, kind in JSON_COLUMNS:
-                checked, changed = await _fix_column(
-                    conn,
-                    table=table,
-                    pk_expr=pk_expr,
-                    column=column,
-                    kind=kind,
-                    apply_changes=not args.dry_run,
-                )
-                total_checked += checked
-                total_changed += changed
-                print(f"{table}.{column}: checked={checked}, changed={changed}")
-            if args.dry_run:
-                raise RuntimeError(
-                    f"Dry run complete. checked={total_checked}, would_change={total_changed}. "
-                    "No rows were updated."
-                )
-            print(f"Done. checked={total_checked}, changed={total_changed}")
+        types = await _column_types(pool)
+        tables: dict[str, tuple[str, list[tuple[str, JsonKind, str]]]] = {}
+        for table, pk_expr, column, kind in JSON_COLUMNS:
+            sql_type = types.get((table, column))
+            if sql_type is None:
+                print(f"{table}.{column}: missing, skipped")
+                continue
+            tables.setdefault(table, (pk_expr, []))[1].append((column, kind, sql_type))
+        staged = {
+            (table, column): 0 for table, (_pk_expr, columns) in tables.items() for column, _kind, _type in columns
+        }
+        changed = dict(staged)
+        jobs = [
+            _table_job(table, pk_expr, columns, staged, changed) for table, (pk_expr, columns) in tables.items()
+        ]
+        results = await maintenance.run_jobs(
+            pool,
+            jobs,
+            parallel=parallel,
+            chunk_rows=max(1, args.chunk_rows),
+            dry_run=args.dry_run,
+        )
     finally:
-        await conn.close()
+        await pool.close()
+
+    total_checked = 0
+    total_staged = 0
+    total_changed = 0
+    for table, result in zip(tables, results):
+        resumed = " (resumed from checkpoint)" if result.resumed else ""
+        for column, _kind, _type in tables[table][1]:
+            key = (table, column)
+            print(f"{table}.{column}: checked={result.read}, staged={staged[key]}, changed={changed[key]}{resumed}")
+            total_checked += result.read
+            total_staged += staged[key]
+            total_changed += changed[key]
+        print(f"{table}: {result.chunks} chunks, {result.applied} rows updated in {result.elapsed:.1f} s")
+    if args.dry_run:
+        raise RuntimeError(
+            f"Dry run complete. checked={total_checked}, would_change={total_staged}. "
+            "No rows were updated."
+        )
+    # staged values that the bot rewrote during the run are left alone and not counted as changed
+    print(f"Done. checked={total_checked}, staged={total_staged}, changed={total_changed}")
 
 
 if __name__ == "__main__":
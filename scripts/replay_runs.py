@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Any
+
+from bot import db
+from bot.game.actions import action_type, normalize_run_state
+from bot.game.journal import replay, replay_start, replay_step
+
+PAGE_SIZE = 200
+
+
+def _canonical(state: dict[str, Any]) -> str:
+    return json.dumps(state, ensure_ascii=False, sort_keys=True)
+
+
+def _diff_keys(expected: dict[str, Any], actual: dict[str, Any]) -> list[str]:
+    normalize_run_state(expected)
+    keys = set(expected) | set(actual)
+    return sorted(
+        key
+        for key in keys
+        if json.dumps(expected.get(key), sort_keys=True) != json.dumps(actual.get(key), sort_keys=True)
+    )
+
+
+async def _rebuild(run_id: int, apply_changes: bool) -> None:
+    journal = await db.get_run_journal(run_id)
+    if not journal:
+        raise RuntimeError(f"Run {run_id} has no journal.")
+    stored = await db.get_run_by_id(run_id)
+    rebuilt = json.loads(_canonical(replay(journal)))
+    if stored:
+        _user_id, _is_active, state = stored
+        changed = _diff_keys(state, rebuilt)
+        print(f"run {run_id}: entries={len(journal)}, differing keys={', '.join(changed) or '-'}")
+    else:
+        print(f"run {run_id}: entries={len(journal)}, stored state missing")
+    if not apply_changes:
+        raise RuntimeError("Dry run complete. No rows were updated.")
+    await db.update_run(run_id, rebuilt)
+    print(f"run {run_id}: state rebuilt from journal.")
+
+
+def _replay_timed(journal: list[dict[str, Any]], timings: dict[str, list[int]]) -> dict[str, Any]:
+    started = time.perf_counter_ns()
+    state = replay_start(journal[0])
+    timings["start"].append(time.perf_counter_ns() - started)
+    for entry in journal[1:]:
+        started = time.perf_counter_ns()
+        replay_step(state, entry)
+        timings[action_type(entry["action"])].append(time.perf_counter_ns() - started)
+    return state
+
+
+async def _bench(limit: int, check: bool) -> None:
+    timings: dict[str, list[int]] = defaultdict(list)
+    replayed = 0
+    failed = 0
+    mismatched = 0
+    after_run_id = 0
+    while replayed + failed < limit:
+        run_ids = await db.get_journaled_run_ids(min(PAGE_SIZE, limit - replayed - failed), after_run_id)
+        if not run_ids:
+            break
+        after_run_id = run_ids[-1]
+        for run_id in run_ids:
+            journal = await db.get_run_journal(run_id)
+            try:
+                state = _replay_timed(journal, timings)
+            except (KeyError, ValueError) as exc:
+                failed += 1
+                print(f"run {run_id}: replay failed: {exc}")
+                continue
+            replayed += 1
+            if not check:
+                continue
+            stored = await db.get_run_by_id(run_id)
+            if not stored:
+                continue
+            changed = _diff_keys(stored[2], json.loads(_canonical(state)))
+            if changed:
+                mismatched += 1
+                print(f"run {run_id}: state mismatch in {', '.join(changed)}")
+
+    print(f"runs replayed={replayed}, failed={failed}, mismatched={mismatched}")
+    print(f"{'action':<32} {'count':>8} {'ns/action':>12} {'p95 ns':>12}")
+    for name, samples in sorted(timings.items(), key=lambda item: -sum(item[1])):
+        ordered = sorted(samples)
+        mean = sum(ordered) // len(ordered)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"{name:<32} {len(ordered):>8} {mean:>12} {p95:>12}")
+    if failed or mismatched:
+        raise RuntimeError(f"Regression check failed: failed={failed}, mismatched={mismatched}.")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay journaled runs through the game engine.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="Rebuild a run state from its action journal.")
+    rebuild_parser.add_argument("run_id", type=int)
+    rebuild_parser.add_argument("--dry-run", action="store_true", help="Only report differences.")
+    bench_parser = subparsers.add_parser("bench", help="Replay recorded runs and report ns/action.")
+    bench_parser.add_argument("--limit", type=int, default=5000)
+    bench_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Compare replayed states with stored state_json.",
+    )
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        await _rebuild(args.run_id, apply_changes=not args.dry_run)
+    else:
+        await _bench(args.limit, args.check)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except RuntimeError as exc:
+        print(str(exc))
+        raise SystemExit(1)